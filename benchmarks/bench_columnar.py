@@ -0,0 +1,101 @@
+"""Memory and throughput of columnar results versus the legacy list[dict] rows.
+
+Usage: python benchmarks/bench_columnar.py [--rows 100000 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import orjson
+
+from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.columnar import ColumnarRows
+from fia_agent.config import Settings
+from fia_agent.models import QueryExecutionResult
+from fia_agent.services.security import RBACService
+
+_SEGMENTS = ["Cloud", "Payments", "Lending", "Wealth", "Markets"]
+_GEOS = ["NA", "EMEA", "APAC", "LATAM"]
+RESTRICTED = {"salary", "ssn"}
+
+
+def synthetic_columns(count: int, seed: int = 11) -> dict[str, list[Any]]:
+    rng = random.Random(seed)
+    return {
+        "fiscal_quarter": [f"20{20 + index % 5}-Q{index % 4 + 1}" for index in range(count)],
+        "segment": [rng.choice(_SEGMENTS) for _ in range(count)],
+        "geo": [rng.choice(_GEOS) for _ in range(count)],
+        "revenue_usd": [rng.uniform(100, 5000) for _ in range(count)],
+        "ebitda_usd": [rng.uniform(-100, 1500) for _ in range(count)],
+        "salary": [rng.uniform(50_000, 250_000) for _ in range(count)],
+    }
+
+
+def measure_memory(build: Callable[[], Any]) -> tuple[Any, float]:
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current / 2**20
+
+
+def timed(label: str, func: Callable[[], Any], repeat: int = 3) -> None:
+    best = min(_once(func) for _ in range(repeat))
+    print(f"  {label:<34} {best * 1000:9.1f} ms")
+
+
+def _once(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def legacy_redact(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{key: ("***" if key in RESTRICTED else value) for key, value in row.items()} for row in rows]
+
+
+def legacy_chart(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    top = max(rows, key=lambda row: row.get("revenue_usd", 0)).get("segment")
+    return {"data": {"values": rows}, "insight": top}
+
+
+def run(count: int) -> None:
+    columns = synthetic_columns(count)
+    names = list(columns)
+    rows, rows_mb = measure_memory(lambda: [dict(zip(names, values, strict=True)) for values in zip(*columns.values(), strict=True)])
+    table, columnar_mb = measure_memory(lambda: ColumnarRows.from_columns(columns))
+
+    security = RBACService(Settings())
+    visualizer = VisualizationAgent()
+    execution = QueryExecutionResult(rows=table, row_count=count)
+
+    print(f"rows={count:,}")
+    print(f"  memory list[dict]                  {rows_mb:9.1f} MiB")
+    print(f"  memory columnar                    {columnar_mb:9.1f} MiB")
+    timed("redact list[dict]", lambda: legacy_redact(rows))
+    timed("redact columnar", lambda: security.redact_columns(table, RESTRICTED))
+    timed("redact compiled policy (default)", lambda: security.redact(table, "analyst"))
+    timed("chart list[dict]", lambda: legacy_chart(rows))
+    timed("chart columnar", lambda: visualizer.build(execution, "chart"))
+    timed("serialize list[dict] (orjson)", lambda: orjson.dumps(rows))
+    timed("serialize columnar -> rows edge", lambda: orjson.dumps(table.to_rows()))
+    timed("pivot list[dict] -> columnar", lambda: ColumnarRows.from_rows(rows), repeat=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+    for count in args.rows:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
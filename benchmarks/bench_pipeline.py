@@ -0,0 +1,239 @@
+"""Load and micro-benchmarks for the full /query pipeline, gated against a JSON baseline.
+
+The app is built in-process with ``build_app()`` against a fake Snowflake
+connector that serves a synthetic catalog and answers every query after a
+fixed delay, so runs are reproducible and need no network. Each request asks
+a distinct question, which keeps the translation and result caches cold and
+times the whole pipeline.
+
+Usage:
+  python benchmarks/bench_pipeline.py --update-baseline       # record benchmarks/baseline.json
+  python benchmarks/bench_pipeline.py                         # compare; exit 1 on regression
+  python benchmarks/bench_pipeline.py --concurrency 1 16 64 --tables 2000 --threshold 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from synthetic import QUESTIONS, synthetic_schema
+
+from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.app import build_app
+from fia_agent.columnar import ColumnarRows
+from fia_agent.config import Settings
+from fia_agent.models import QueryExecutionResult, QueryResponse, TableDefinition
+from fia_agent.services.fakes import FakeConnector, financial_rows
+from fia_agent.services.memory import MemoryManager
+from fia_agent.services.security import RBACService
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+RESTRICTED = {"revenue_usd"}
+
+
+def catalog_rows(schema: list[TableDefinition]) -> list[tuple[str, str, str, str | None]]:
+    return [(table.name, column.name, column.type, column.description) for table in schema for column in table.columns]
+
+
+def question(index: int) -> str:
+    # Distinct per request so no cache short-circuits the pipeline being measured.
+    return f"{QUESTIONS[index % len(QUESTIONS)]} for cost center {index}"
+
+
+def bench_settings(workdir: Path, concurrency: int) -> Settings:
+    return Settings(
+        _env_file=None,
+        SNOWFLAKE_ACCOUNT="bench",
+        SNOWFLAKE_USER="bench",
+        SNOWFLAKE_PASSWORD="bench",
+        WAREHOUSE_POOL_SIZE=max(8, concurrency),
+        SCHEDULER_GLOBAL_CONCURRENCY=max(16, concurrency),
+        SCHEDULER_MAX_QUEUE_DEPTH=max(256, concurrency * 4),
+        TRANSLATION_CACHE_PATH=workdir / "translation_cache.json",
+        AUDIT_DB_PATH=workdir / "audit.sqlite3",
+    )
+
+
+async def run_load(args: argparse.Namespace, concurrency: int) -> dict[str, float]:
+    connector = FakeConnector(
+        query_latency=args.warehouse_ms / 1000,
+        row_count=args.rows,
+        catalog=catalog_rows(synthetic_schema(args.tables, args.columns)),
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        app = build_app(bench_settings(Path(workdir), concurrency), connectors={"snowflake": connector})
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                sequence = itertools.count()
+                latencies: list[float] = []
+                errors = 0
+
+                async def worker(worker_id: int, total: int, record: bool) -> None:
+                    nonlocal errors
+                    while (index := next(sequence)) < total:
+                        body = {"question": question(index), "user_id": f"bench-{worker_id}", "role": "analyst"}
+                        start = time.perf_counter()
+                        response = await client.post("/query", json=body)
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        if not record:
+                            continue
+                        if response.status_code == 200:
+                            latencies.append(elapsed_ms)
+                        else:
+                            errors += 1
+
+                warmup = concurrency * 2
+                await asyncio.gather(*(worker(w, warmup, False) for w in range(concurrency)))
+                sequence = itertools.count(warmup)
+                total = warmup + args.requests
+                start = time.perf_counter()
+                await asyncio.gather(*(worker(w, total, True) for w in range(concurrency)))
+                elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (float("nan"),) * 3
+    return {
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "errors": errors,
+    }
+
+
+def per_op_us(func: Callable[[], Any], iterations: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best * 1e6
+
+
+def run_micro(args: argparse.Namespace) -> dict[str, float]:
+    schema = synthetic_schema(args.tables, args.columns)
+    translator = Text2SQLTranslator()
+    translator._pick_table(QUESTIONS[0], schema)  # build the index outside the timed loop
+    picks = itertools.cycle(QUESTIONS)
+
+    names = ("fiscal_quarter", "revenue_usd", "segment")
+    table = ColumnarRows.from_columns(
+        {name: list(values) for name, values in zip(names, zip(*financial_rows(args.rows), strict=True), strict=True)}
+    )
+    security = RBACService(Settings(_env_file=None))
+    visualizer = VisualizationAgent()
+    execution = QueryExecutionResult(rows=table, row_count=args.rows, source="snowflake")
+    response = QueryResponse(
+        sql_query="SELECT fiscal_quarter, revenue_usd, segment FROM financials_quarterly",
+        execution=execution,
+        visualization=visualizer.build(execution, "chart"),
+        schema_used=schema[:5],
+    )
+
+    memory = MemoryManager()
+    loop = asyncio.new_event_loop()
+    try:
+        for index in range(200):
+            loop.run_until_complete(memory.record_success("bench", f"SELECT {index} FROM t{index}", question(index)))
+        recall_us = per_op_us(
+            lambda: loop.run_until_complete(memory.recall("bench-session", "bench", QUESTIONS[1])), 200
+        )
+    finally:
+        loop.close()
+
+    return {
+        "pick_table_us": per_op_us(lambda: translator._pick_table(next(picks), schema), 2_000),
+        "redact_columns_us": per_op_us(lambda: security.redact_columns(table, RESTRICTED), 50),
+        "visualize_chart_us": per_op_us(lambda: visualizer.build(execution, "chart"), 50),
+        "memory_recall_us": recall_us,
+        "serialize_response_us": per_op_us(lambda: JSONResponse(jsonable_encoder(response)), 20),
+    }
+
+
+def compare(current: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Metrics that moved the wrong way by more than ``threshold`` (a fraction of the baseline)."""
+
+    regressions = []
+    for name, base in baseline.items():
+        value = current.get(name)
+        if value is None or not base or name.endswith("errors"):
+            continue
+        change = (value - base) / base
+        if name.endswith("_rps"):
+            change = -change  # throughput regresses when it drops
+        if change > threshold:
+            regressions.append(f"{name}: {base:.2f} -> {value:.2f} ({change:+.0%} worse)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400, help="measured requests per concurrency level")
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=1_000, help="rows returned per query and used by micro-benchmarks")
+    parser.add_argument("--warehouse-ms", type=float, default=20.0, help="fixed fake warehouse latency")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write this run's results here")
+    parser.add_argument("--skip-load", action="store_true")
+    args = parser.parse_args()
+
+    results: dict[str, float] = {}
+    if not args.skip_load:
+        for concurrency in args.concurrency:
+            for name, value in asyncio.run(run_load(args, concurrency)).items():
+                results[f"load.c{concurrency}.{name}"] = value
+    results.update({f"micro.{name}": value for name, value in run_micro(args).items()})
+    for name, value in results.items():
+        print(f"  {name:<36} {value:12.2f}")
+
+    config = {key: value for key, value in vars(args).items() if key in {"requests", "tables", "columns", "rows", "warehouse_ms"}}
+    report = {
+        "config": config,
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()},
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    failed = [name for name, value in results.items() if name.endswith("errors") and value]
+    if failed:
+        print(f"requests failed: {', '.join(failed)}")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+        sys.exit(1 if failed else 0)
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --update-baseline first")
+        sys.exit(1 if failed else 0)
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != config:
+        print(f"warning: baseline config {baseline.get('config')} differs from this run {config}")
+    regressions = compare(results, baseline["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions beyond {args.threshold:.0%} of {args.baseline}")
+    sys.exit(1 if regressions or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Benchmark Text2SQLTranslator._pick_table against large synthetic catalogs.
+
+Usage: python benchmarks/bench_schema_index.py [--tables 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from synthetic import QUESTIONS, synthetic_schema
+
+from fia_agent.services.schema_index import SchemaIndex
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+
+    schema = synthetic_schema(args.tables)
+    start = time.perf_counter()
+    SchemaIndex(schema)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    translator = Text2SQLTranslator()
+    translator._pick_table(QUESTIONS[0], schema)  # warm the index
+    start = time.perf_counter()
+    for iteration in range(args.iterations):
+        translator._pick_table(QUESTIONS[iteration % len(QUESTIONS)], schema)
+    pick_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+    print(f"tables={args.tables} index_build_ms={build_ms:.1f} pick_table_us={pick_us:.1f}")
+
+
+if __name__ == "__main__":
+    main()
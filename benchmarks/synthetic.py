@@ -0,0 +1,45 @@
+"""Synthetic schemas for benchmarks."""
+
+from __future__ import annotations
+
+import random
+
+from fia_agent.models import ColumnDefinition, TableDefinition
+
+_DOMAINS = ["revenue", "ebitda", "cash", "payroll", "ledger", "invoice", "trade", "risk", "fx", "tax"]
+_ENTITIES = ["segment", "region", "desk", "account", "vendor", "customer", "product", "entity"]
+_GRAINS = ["daily", "monthly", "quarterly", "annual"]
+_COLUMN_TYPES = ["STRING", "FLOAT", "NUMBER", "DATE", "TIMESTAMP"]
+
+
+def synthetic_schema(table_count: int, columns_per_table: int = 12, seed: int = 7) -> list[TableDefinition]:
+    rng = random.Random(seed)
+    tables = []
+    for index in range(table_count):
+        domain = rng.choice(_DOMAINS)
+        entity = rng.choice(_ENTITIES)
+        grain = rng.choice(_GRAINS)
+        columns = [
+            ColumnDefinition(
+                name=f"{rng.choice(_DOMAINS)}_{rng.choice(_ENTITIES)}_{column}",
+                type=rng.choice(_COLUMN_TYPES),
+            )
+            for column in range(columns_per_table)
+        ]
+        tables.append(
+            TableDefinition(
+                name=f"{domain}_{entity}_{grain}_{index}",
+                description=f"{grain.title()} {domain} metrics by {entity} for reporting area {index % 97}.",
+                columns=columns,
+            )
+        )
+    return tables
+
+
+QUESTIONS = [
+    "Show revenue by segment for 2024 Q1",
+    "What was quarterly ebitda per region?",
+    "List monthly cash balances by account",
+    "fx trade exposure by desk",
+    "invoice totals per vendor last year",
+]
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Literal, TypedDict
+import asyncio
+import time
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Literal, Sequence, TypedDict
 
+from fastapi import HTTPException
 from langgraph.graph import END, StateGraph
 
 from fia_agent.agents.query_generator import QueryGenerationAgent
@@ -18,20 +22,28 @@ from fia_agent.models import (
     VisualizationSpec,
 )
 from fia_agent.services.audit import AuditService
+from fia_agent.services.circuit_breaker import CircuitOpenError, is_transient
 from fia_agent.services.memory import MemoryManager
-from fia_agent.services.schema_discovery import SchemaDiscoveryService
+from fia_agent.services.metrics import Span, StageMetrics
+from fia_agent.services.schema_discovery import SchemaDiscoveryService, SchemaSnapshot
+from fia_agent.services.singleflight import SingleFlight
+from fia_agent.services.sql_validator import SqlIssue, SqlValidator, format_issues
 
 
 class AgentState(TypedDict, total=False):
     request: QueryRequest
     schema: list[TableDefinition]
+    schema_fingerprint: str
     sql_query: str | None
     execution: QueryExecutionResult | None
     visual: object | None
     self_corrections: list[str]
     rationales: list[str]
     last_error: str | None
+    issues: list[SqlIssue]
+    repairable: bool
     attempts: int
+    prompt_tokens: int
 
 
 class ConductorGraph:
@@ -43,6 +55,8 @@ class ConductorGraph:
         visualizer: VisualizationAgent,
         memory: MemoryManager,
         audit: AuditService,
+        validator: SqlValidator | None = None,
+        metrics: StageMetrics | None = None,
     ) -> None:
         self._schema_service = schema_service
         self._generator = generator
@@ -50,18 +64,31 @@ class ConductorGraph:
         self._visualizer = visualizer
         self._memory = memory
         self._audit = audit
+        self._validator = validator
+        self._metrics = metrics or StageMetrics()
+        self._inflight: SingleFlight[tuple[str, str, str, str], tuple[QueryResponse, str | None]] = SingleFlight()
         self._graph = self._build_graph()
 
     def _build_graph(self):
         graph = StateGraph(AgentState)
         graph.add_node("generate_sql", self._node_generate)
+        graph.add_node("validate_sql", self._node_validate)
         graph.add_node("execute_sql", self._node_execute)
         graph.add_node("repair_sql", self._node_repair)
         graph.add_node("visualize", self._node_visualize)
         graph.add_node("finalize", self._node_finalize)
 
         graph.set_entry_point("generate_sql")
-        graph.add_edge("generate_sql", "execute_sql")
+        graph.add_edge("generate_sql", "validate_sql")
+        graph.add_conditional_edges(
+            "validate_sql",
+            self._after_validate,
+            {
+                "execute": "execute_sql",
+                "retry": "repair_sql",
+                "visualize": "visualize",
+            },
+        )
         graph.add_conditional_edges(
             "execute_sql",
             self._needs_repair,
@@ -70,32 +97,207 @@ class ConductorGraph:
                 "visualize": "visualize",
             },
         )
-        graph.add_edge("repair_sql", "execute_sql")
+        graph.add_edge("repair_sql", "validate_sql")
         graph.add_edge("visualize", "finalize")
         graph.add_edge("finalize", END)
         return graph.compile()
 
     async def run(self, request: QueryRequest) -> QueryResponse:
-        schema = await self._schema_service.get_schema(request.preferred_source)
+        """Run the pipeline, sharing one execution between identical in-flight requests.
+
+        Memory and audit entries are still written once per caller.
+        """
+
+        with self._span("query", request) as span:
+            try:
+                (response, last_error), shared = await self._inflight.do(
+                    coalesce_key(request), lambda: self._run_pipeline(request)
+                )
+            except Exception as exc:  # pragma: no cover - defensive logging
+                self._record_failure(request, exc)
+                raise
+            span.source = response.execution.source
+            return await self._finish(request, response, last_error, shared)
+
+    async def run_many(
+        self, requests: Sequence[QueryRequest], concurrency: int = 8
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Run a batch of requests and yield one frame per request in completion order.
+
+        The schema snapshot is resolved once per preferred source, identical
+        requests (by :func:`coalesce_key`) share a single pipeline run, and at
+        most ``concurrency`` pipelines run at a time. Frames look like
+        ``{"index", "status": "ok", "response"}`` or ``{"index", "status": "error", "detail"}``.
+        """
+
+        snapshots: dict[str, SchemaSnapshot] = {}
+        for source in dict.fromkeys(request.preferred_source for request in requests):
+            snapshots[source] = await self._schema_service.get_snapshot(source)
+        groups: dict[tuple[str, str, str, str], list[int]] = {}
+        for index, request in enumerate(requests):
+            groups.setdefault(coalesce_key(request), []).append(index)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def run_group(key: tuple[str, str, str, str], indices: list[int]):
+            leader = requests[indices[0]]
+            async with semaphore:
+                try:
+                    outcome, shared = await self._inflight.do(
+                        key, lambda: self._run_pipeline(leader, snapshots[leader.preferred_source])
+                    )
+                except Exception as exc:
+                    return indices, exc, False
+            return indices, outcome, shared
+
+        tasks = [asyncio.create_task(run_group(key, indices)) for key, indices in groups.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, outcome, shared = await next_done
+                for position, index in enumerate(indices):
+                    request = requests[index]
+                    if isinstance(outcome, Exception):
+                        self._record_failure(request, outcome)
+                        yield {"index": index, "status": "error", **error_fields(outcome)}
+                        continue
+                    response, last_error = outcome
+                    response = await self._finish(request, response, last_error, shared or position > 0)
+                    yield {"index": index, "status": "ok", "response": response}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _finish(
+        self, request: QueryRequest, response: QueryResponse, last_error: str | None, shared: bool
+    ) -> QueryResponse:
+        """Write this caller's memory and audit entries for a (possibly shared) pipeline result."""
+
+        if shared:
+            response = response.model_copy()
+            if request.session_id:
+                await self._memory.capture_turn(request.session_id, "assistant", response.sql_query)
+        await self._memory.record_success(request.user_id, response.sql_query, request.question)
+        self._audit.record(
+            response_to_audit(
+                response,
+                request,
+                status="success",
+                error=last_error,
+            )
+        )
+        return response
+
+    def _record_failure(self, request: QueryRequest, exc: Exception) -> None:
+        failure_response = QueryResponse(
+            sql_query="",
+            execution=QueryExecutionResult(),
+            visualization=VisualizationSpec(kind="text", spec={"text": "Pipeline failure"}),
+        )
+        self._audit.record(response_to_audit(failure_response, request, status="failed", error=str(exc)))
+
+    async def stream(self, request: QueryRequest, batch_size: int = 500) -> AsyncIterator[dict[str, Any]]:
+        """Yield a metadata frame, redacted row batches as they arrive, then a summary frame.
+
+        Streaming skips the repair loop and visualization: the SQL is generated
+        once and rows are forwarded without being materialized.
+        """
+
+        start = time.perf_counter()
+        with self._span("schema", request):
+            snapshot = await self._schema_service.get_snapshot(request.preferred_source)
+        prompt_stats: dict[str, Any] = {}
+        with self._span("generate_sql", request):
+            sql, _ = await self._generator.run(
+                question=request.question,
+                schema=snapshot.tables,
+                session_id=request.session_id,
+                user_id=request.user_id,
+                schema_fingerprint=snapshot.fingerprint,
+                stats=prompt_stats,
+            )
+        source = self._verifier.source_for(request.preferred_source, sql)
+        yield {
+            "type": "metadata",
+            "sql_query": sql,
+            "source": source,
+            "schema_version": snapshot.version,
+            "prompt_tokens": prompt_stats.get("prompt_tokens"),
+        }
+        with self._span("validate_sql", request):
+            issues = self._preflight(sql, snapshot.tables, snapshot.fingerprint)
+        if issues:
+            # Streaming has no repair loop; report the findings instead of paying for a warehouse error.
+            detail = format_issues(issues)
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            self._audit.record(stream_audit(request, sql, "failed", latency_ms, detail))
+            yield {"type": "error", "detail": detail, "issues": [asdict(issue) for issue in issues]}
+            return
+        row_count = 0
+        first_row_ms: int | None = None
+        execution_stats: dict[str, Any] = {}
+        try:
+            async for batch in self._verifier.stream(
+                sql,
+                request.preferred_source,
+                request.role,
+                batch_size,
+                stats=execution_stats,
+                user_id=request.user_id,
+                priority=request.priority,
+            ):
+                if not batch:
+                    continue
+                if first_row_ms is None:
+                    first_row_ms = int((time.perf_counter() - start) * 1000)
+                    self._metrics.observe("first_row", first_row_ms, source, request.role)
+                row_count += len(batch)
+                yield {"type": "rows", "rows": batch}
+        except Exception as exc:
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            self._audit.record(stream_audit(request, sql, "failed", latency_ms, str(exc)))
+            # Headers are already sent, so e.g. a 429 from admission is reported in-band.
+            yield {"type": "error", **error_fields(exc)}
+            return
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        self._metrics.observe("stream", latency_ms, source, request.role)
+        await self._memory.record_success(request.user_id, sql, request.question)
+        self._audit.record(stream_audit(request, sql, "success", latency_ms, None))
+        yield {
+            "type": "summary",
+            "row_count": row_count,
+            "latency_ms": latency_ms,
+            "time_to_first_row_ms": first_row_ms,
+            "bytes_scanned": execution_stats.get("bytes_scanned"),
+        }
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": self._inflight.in_flight, "coalesced": self._inflight.shared}
+
+    def _span(self, stage: str, request: QueryRequest, source: str | None = None) -> Span:
+        # Until the executor picks a warehouse, stages are labelled with the requested source.
+        return self._metrics.span(stage, source or request.preferred_source, request.role)
+
+    def _preflight(self, sql: str, schema: list[TableDefinition], fingerprint: str | None) -> list[SqlIssue]:
+        if self._validator is None:
+            return []
+        return self._validator.validate(sql, schema, fingerprint)
+
+    async def _run_pipeline(
+        self, request: QueryRequest, snapshot: SchemaSnapshot | None = None
+    ) -> tuple[QueryResponse, str | None]:
+        if snapshot is None:
+            with self._span("schema", request):
+                snapshot = await self._schema_service.get_snapshot(request.preferred_source)
+        schema = snapshot.tables
         state: AgentState = {
             "request": request,
             "schema": schema,
+            "schema_fingerprint": snapshot.fingerprint,
             "self_corrections": [],
             "rationales": [],
             "attempts": 0,
+            "prompt_tokens": 0,
         }
-        try:
-            final_state: AgentState = await self._graph.ainvoke(state)
-        except Exception as exc:  # pragma: no cover - defensive logging
-            failure_response = QueryResponse(
-                sql_query="",
-                execution=QueryExecutionResult(),
-                visualization=VisualizationSpec(kind="text", spec={"text": "Pipeline failure"}),
-            )
-            self._audit.record(
-                response_to_audit(failure_response, request, status="failed", error=str(exc))
-            )
-            raise
+        final_state: AgentState = await self._graph.ainvoke(state)
         execution = final_state.get("execution") or QueryExecutionResult()
         visual = final_state.get("visual") or VisualizationSpec(kind="text", spec={"text": "No data"})
         sql = final_state.get("sql_query") or ""
@@ -105,52 +307,76 @@ class ConductorGraph:
             visualization=visual,
             self_corrections=final_state.get("self_corrections", []),
             schema_used=schema,
+            schema_version=snapshot.version,
+            prompt_tokens=final_state.get("prompt_tokens") or None,
         )
-        self._memory.record_success(request.user_id, sql)
-        self._audit.record(
-            response_to_audit(
-                response,
-                request,
-                status="success",
-                error=final_state.get("last_error"),
-            )
-        )
-        return response
+        return response, final_state.get("last_error")
 
     async def _node_generate(self, state: AgentState) -> AgentState:
         request = state["request"]
-        sql, rationale = await self._generator.run(
-            question=request.question,
-            schema=state["schema"],
-            session_id=request.session_id,
-            user_id=request.user_id,
-        )
+        prompt_stats: dict[str, Any] = {}
+        with self._span("generate_sql", request):
+            sql, rationale = await self._generator.run(
+                question=request.question,
+                schema=state["schema"],
+                session_id=request.session_id,
+                user_id=request.user_id,
+                schema_fingerprint=state.get("schema_fingerprint"),
+                stats=prompt_stats,
+            )
+        state["prompt_tokens"] = state.get("prompt_tokens", 0) + prompt_stats.get("prompt_tokens", 0)
         state["sql_query"] = sql
         state.setdefault("rationales", []).append(rationale)
         return state
 
+    async def _node_validate(self, state: AgentState) -> AgentState:
+        with self._span("validate_sql", state["request"]):
+            issues = self._preflight(state.get("sql_query") or "", state["schema"], state.get("schema_fingerprint"))
+        state["issues"] = issues
+        if issues:
+            state["last_error"] = format_issues(issues)
+            state["execution"] = None
+            state["repairable"] = True
+        return state
+
     async def _node_execute(self, state: AgentState) -> AgentState:
         request = state["request"]
         try:
-            state["execution"] = await self._verifier.run(
-                sql=state["sql_query"],
-                preferred_source=request.preferred_source,
-                role=request.role,
-            )
+            with self._span("execute_sql", request) as span:
+                execution = await self._verifier.run(
+                    sql=state["sql_query"],
+                    preferred_source=request.preferred_source,
+                    role=request.role,
+                    user_id=request.user_id,
+                    priority=request.priority,
+                )
+                span.source = execution.source
+            state["execution"] = execution
             state["last_error"] = None
+        except HTTPException:
+            # Authorization and admission failures are not SQL problems; repair cannot help.
+            raise
         except Exception as exc:  # pragma: no cover - orchestrated at runtime
             state["last_error"] = str(exc)
             state["execution"] = None
+            # Rewriting the SQL cannot fix an unreachable or overloaded warehouse.
+            state["repairable"] = not (is_transient(exc) or isinstance(exc, CircuitOpenError))
         return state
 
     async def _node_repair(self, state: AgentState) -> AgentState:
         request = state["request"]
-        sql, rationale = await self._generator.repair(
-            question=request.question,
-            schema=state["schema"],
-            previous_sql=state.get("sql_query", ""),
-            error=state.get("last_error", "engine failure"),
-        )
+        prompt_stats: dict[str, Any] = {}
+        with self._span("repair_sql", request):
+            sql, rationale = await self._generator.repair(
+                question=request.question,
+                schema=state["schema"],
+                previous_sql=state.get("sql_query", ""),
+                error=state.get("last_error", "engine failure"),
+                issues=state.get("issues", []),
+                schema_fingerprint=state.get("schema_fingerprint"),
+                stats=prompt_stats,
+            )
+        state["prompt_tokens"] = state.get("prompt_tokens", 0) + prompt_stats.get("prompt_tokens", 0)
         state["sql_query"] = sql
         state.setdefault("self_corrections", []).append(rationale)
         state["attempts"] = state.get("attempts", 0) + 1
@@ -159,19 +385,40 @@ class ConductorGraph:
     async def _node_visualize(self, state: AgentState) -> AgentState:
         request = state["request"]
         execution = state.get("execution")
-        visual = self._visualizer.build(execution, request.output_format) if execution else None
+        with self._span("visualize", request, execution.source if execution else None):
+            visual = self._visualizer.build(execution, request.output_format) if execution else None
         state["visual"] = visual
         return state
 
     async def _node_finalize(self, state: AgentState) -> AgentState:
         return state
 
+    def _after_validate(self, state: AgentState) -> Literal["execute", "retry", "visualize"]:
+        if not state.get("issues"):
+            return "execute"
+        return "retry" if state.get("attempts", 0) < 2 else "visualize"
+
     def _needs_repair(self, state: AgentState) -> Literal["retry", "visualize"]:
-        if state.get("last_error") and state.get("attempts", 0) < 2:
+        if state.get("last_error") and state.get("repairable", True) and state.get("attempts", 0) < 2:
             return "retry"
         return "visualize"
 
 
+def error_fields(exc: Exception) -> dict[str, Any]:
+    """``detail`` (plus ``status_code`` for HTTP errors) for frames reporting a failure in-band."""
+
+    if isinstance(exc, HTTPException):
+        return {"detail": exc.detail, "status_code": exc.status_code}
+    return {"detail": str(exc)}
+
+
+def coalesce_key(request: QueryRequest) -> tuple[str, str, str, str]:
+    """Requests with the same key produce the same response and may share a pipeline run."""
+
+    question = " ".join(request.question.lower().split())
+    return question, request.role.lower(), request.preferred_source, request.output_format
+
+
 def response_to_audit(
     response: QueryResponse,
     request: QueryRequest,
@@ -187,3 +434,21 @@ def response_to_audit(
         latency_ms=response.execution.latency_ms if response.execution else 0,
         error=error,
     )
+
+
+def stream_audit(
+    request: QueryRequest,
+    sql: str,
+    status: Literal["success", "failed"],
+    latency_ms: int,
+    error: str | None,
+) -> AuditRecord:
+    return AuditRecord(
+        user_id=request.user_id,
+        role=request.role,
+        question=request.question,
+        sql_query=sql,
+        status=status,
+        latency_ms=latency_ms,
+        error=error,
+    )
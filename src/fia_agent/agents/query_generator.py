@@ -2,15 +2,29 @@
 
 from __future__ import annotations
 
+from typing import Any, Sequence
+
 from fia_agent.models import TableDefinition
 from fia_agent.services.memory import MemoryManager
+from fia_agent.services.prompt_builder import PromptBuilder
+from fia_agent.services.schema_index import SchemaIndex
+from fia_agent.services.sql_validator import SqlIssue
 from fia_agent.services.text2sql import Text2SQLTranslator
+from fia_agent.services.translation_cache import TranslationCache
 
 
 class QueryGenerationAgent:
-    def __init__(self, translator: Text2SQLTranslator, memory: MemoryManager) -> None:
+    def __init__(
+        self,
+        translator: Text2SQLTranslator,
+        memory: MemoryManager,
+        cache: TranslationCache | None = None,
+        prompts: PromptBuilder | None = None,
+    ) -> None:
         self._translator = translator
         self._memory = memory
+        self._cache = cache
+        self._prompts = prompts
 
     async def run(
         self,
@@ -18,13 +32,28 @@ class QueryGenerationAgent:
         schema: list[TableDefinition],
         session_id: str | None,
         user_id: str,
+        schema_fingerprint: str | None = None,
+        stats: dict[str, Any] | None = None,
     ) -> tuple[str, str]:
-        short_context = self._memory.recall_short_term(session_id or "")
-        long_context = list(self._memory.recall_long_term(user_id))
-        merged_context = [*short_context, *long_context]
-        sql, rationale = await self._translator.generate_sql(question, schema, merged_context)
+        """Generate SQL for ``question``; ``stats`` receives ``prompt_tokens`` when a prompt was built."""
+
+        short_context, long_context = await self._memory.recall(session_id, user_id, question)
+
+        async def generate() -> tuple[str, str]:
+            tables, history, index = self._prompt(
+                question, schema, short_context, long_context, schema_fingerprint, stats
+            )
+            return await self._translator.generate_sql(question, tables, history, **index)
+
+        if self._cache is None or schema_fingerprint is None:
+            sql, rationale = await generate()
+        else:
+            # Session turns and recall change on every request; key only on what can change the SQL.
+            context = self._translator.cache_context(question, [*short_context, *long_context])
+            key = self._cache.make_key(question, schema_fingerprint, context)
+            (sql, rationale), _ = await self._cache.get_or_generate(key, schema_fingerprint, generate)
         if session_id:
-            self._memory.capture_turn(session_id, "assistant", sql)
+            await self._memory.capture_turn(session_id, "assistant", sql)
         return sql, rationale
 
     async def repair(
@@ -33,5 +62,31 @@ class QueryGenerationAgent:
         schema: list[TableDefinition],
         previous_sql: str,
         error: str,
+        issues: Sequence[SqlIssue] = (),
+        schema_fingerprint: str | None = None,
+        stats: dict[str, Any] | None = None,
     ) -> tuple[str, str]:
-        return await self._translator.repair_sql(question, schema, error, previous_sql)
+        tables, _, index = self._prompt(question, schema, (), (), schema_fingerprint, stats)
+        return await self._translator.repair_sql(question, tables, error, previous_sql, issues, **index)
+
+    def _prompt(
+        self,
+        question: str,
+        schema: list[TableDefinition],
+        session: Sequence[str],
+        recalled: Sequence[str],
+        schema_fingerprint: str | None,
+        stats: dict[str, Any] | None,
+    ) -> tuple[list[TableDefinition], list[str], dict[str, SchemaIndex]]:
+        """Prune schema and history to the prompt budget, or pass everything through without a builder.
+
+        The third item holds the snapshot's ``index`` keyword for the translator
+        when the schema was pruned; it is empty otherwise.
+        """
+
+        if self._prompts is None:
+            return schema, [*session, *recalled], {}
+        context = self._prompts.build(question, schema, session, recalled, schema_fingerprint)
+        if stats is not None:
+            stats["prompt_tokens"] = stats.get("prompt_tokens", 0) + context.tokens
+        return context.tables, context.history, {"index": context.index} if context.index is not None else {}
@@ -2,19 +2,63 @@
 
 from __future__ import annotations
 
+from typing import Any, AsyncIterator
+
+from fia_agent.columnar import ColumnarRows
 from fia_agent.models import QueryExecutionResult
+from fia_agent.services.metrics import StageMetrics
 from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.scheduler import Priority
 from fia_agent.services.security import RBACService
 
 
 class QueryVerificationAgent:
-    def __init__(self, executor: QueryExecutor, security: RBACService) -> None:
+    def __init__(self, executor: QueryExecutor, security: RBACService, metrics: StageMetrics | None = None) -> None:
         self._executor = executor
         self._security = security
+        self._metrics = metrics or StageMetrics()
 
-    async def run(self, sql: str, preferred_source: str, role: str) -> QueryExecutionResult:
+    async def run(
+        self,
+        sql: str,
+        preferred_source: str,
+        role: str,
+        user_id: str | None = None,
+        priority: Priority = "interactive",
+    ) -> QueryExecutionResult:
         self._security.assert_role(role)
-        result = await self._executor.execute(sql, preferred_source, role)
-        restricted = {"salary", "ssn"}
-        result.rows = self._security.redact_columns(result.rows, restricted)
+        with self._metrics.span("warehouse", preferred_source, role) as span:
+            result = await self._executor.execute(sql, preferred_source, role, user_id=user_id, priority=priority)
+            span.source = result.source
+        with self._metrics.span("redact", result.source, role):
+            result.rows = self._security.redact(result.rows, role)
         return result
+
+    async def stream(
+        self,
+        sql: str,
+        preferred_source: str,
+        role: str,
+        batch_size: int = 500,
+        stats: dict[str, Any] | None = None,
+        user_id: str | None = None,
+        priority: Priority = "interactive",
+    ) -> AsyncIterator[ColumnarRows]:
+        """Execute ``sql`` and yield redacted row batches as they arrive."""
+
+        self._security.assert_role(role)
+        compiled = None
+        async for batch in self._executor.stream(
+            sql, preferred_source, batch_size, stats=stats, role=role, user_id=user_id, priority=priority
+        ):
+            if compiled is None or compiled.columns != batch.columns:
+                compiled = self._security.compile_policy(role, batch.columns)
+            if compiled.is_noop:
+                yield batch
+                continue
+            with self._metrics.span("redact", preferred_source, role):
+                batch = compiled.apply(batch)
+            yield batch
+
+    def source_for(self, preferred_source: str, sql: str | None = None) -> str:
+        return self._executor.source_for(preferred_source, sql)
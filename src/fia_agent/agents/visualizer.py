@@ -2,24 +2,184 @@
 
 from __future__ import annotations
 
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+
+from fia_agent.columnar import ColumnarRows
 from fia_agent.models import QueryExecutionResult, VisualizationSpec
 
+# Specs name the result set instead of embedding it; clients bind ``execution.rows`` to this dataset.
+RESULT_DATASET = "result"
+
+_TEMPORAL_HINTS = ("date", "time", "day", "week", "month", "quarter", "year", "period", "ts")
+_PREFERRED_METRIC = "revenue_usd"
+_PREFERRED_CATEGORY = "segment"
+
 
 class VisualizationAgent:
+    """Build Vega-Lite specs sized for the browser, not for the result set.
+
+    Small results are referenced by name (``{"data": {"name": "result"}}``) so
+    rows are serialized once, in ``execution.rows``. Larger ones are reduced
+    before they are inlined: line charts keep ``max_points`` points chosen by
+    Largest-Triangle-Three-Buckets, and bar charts keep the ``top_n``
+    categories by total plus an ``Other`` bucket. Insight statistics come from
+    vectorized NumPy passes over the metric column.
+    """
+
+    def __init__(self, max_points: int = 1000, top_n: int = 12) -> None:
+        self._max_points = max(max_points, 3)
+        self._top_n = max(top_n, 1)
+
     def build(self, execution: QueryExecutionResult, output_mode: str) -> VisualizationSpec:
-        if output_mode == "chart" and execution.rows:
-            spec = {
-                "mark": "bar",
-                "encoding": {
-                    "x": {"field": "segment", "type": "nominal"},
-                    "y": {"field": "revenue_usd", "type": "quantitative"},
-                    "color": {"field": "segment", "type": "nominal"},
-                },
-                "data": {"values": execution.rows},
-            }
-            insight = f"Top segment: {max(execution.rows, key=lambda r: r.get('revenue_usd', 0)).get('segment')}"
-            return VisualizationSpec(kind="bar", spec=spec, insight_summary=insight)
+        rows = execution.rows
+        if output_mode == "chart" and rows:
+            metric = _metric_column(rows)
+            if metric is not None:
+                category = _category_column(rows, exclude=metric)
+                temporal = _temporal_column(rows, exclude=metric)
+                if temporal is not None and (category is None or category == temporal):
+                    return self._line(rows, temporal, metric)
+                if category is not None:
+                    return self._bar(rows, category, metric)
         if output_mode == "narrative":
             summary = f"Returned {execution.row_count} rows in {execution.latency_ms} ms from {execution.source}."
             return VisualizationSpec(kind="text", spec={"text": summary}, insight_summary=summary)
-        return VisualizationSpec(kind="table", spec={"rows": execution.rows})
+        return VisualizationSpec(kind="table", spec={"columns": list(rows.columns), "data": {"name": RESULT_DATASET}})
+
+    def _bar(self, rows: ColumnarRows, category: str, metric: str) -> VisualizationSpec:
+        labels, totals = _group_sum(rows.column(category), _values(rows, metric))
+        order = np.argsort(-totals, kind="stable")
+        grand_total = float(totals.sum())
+        top = labels[order[0]] if len(order) else None
+        share = float(totals[order[0]]) / grand_total if len(order) and grand_total else 0.0
+        encoding = {
+            "x": {"field": category, "type": "nominal", "sort": "-y"},
+            "y": {"field": metric, "type": "quantitative", "aggregate": "sum"},
+            "color": {"field": category, "type": "nominal"},
+        }
+        if len(labels) <= self._top_n and len(rows) <= self._max_points:
+            data: dict[str, Any] = {"name": RESULT_DATASET}
+            reduction = None
+        else:
+            kept = order[: self._top_n]
+            values = [{category: labels[i], metric: float(totals[i])} for i in kept]
+            if len(order) > self._top_n:
+                values.append({category: "Other", metric: float(totals[order[self._top_n :]].sum())})
+            data = {"values": values}
+            reduction = "top_n"
+        spec = {"mark": "bar", "encoding": encoding, "data": data, "usermeta": _usermeta(rows, reduction)}
+        insight = f"Top {category}: {top} ({share:.0%} of total {metric} across {len(labels)} {category} values)"
+        return VisualizationSpec(kind="bar", spec=spec, insight_summary=insight)
+
+    def _line(self, rows: ColumnarRows, temporal: str, metric: str) -> VisualizationSpec:
+        x_values = rows.column(temporal)
+        numeric_x = rows.numeric(temporal)
+        y = _values(rows, metric)
+        order = np.argsort(numeric_x if numeric_x is not None else np.asarray(x_values, dtype=str), kind="stable")
+        y_sorted = y[order]
+        encoding = {
+            "x": {"field": temporal, "type": "ordinal" if rows.column_type(temporal) == "string" else "quantitative"},
+            "y": {"field": metric, "type": "quantitative"},
+        }
+        if len(rows) <= self._max_points:
+            data: dict[str, Any] = {"name": RESULT_DATASET}
+            reduction = None
+        else:
+            positions = numeric_x[order].astype(float) if numeric_x is not None else np.arange(len(order), dtype=float)
+            kept = order[_lttb(positions, np.nan_to_num(y_sorted), self._max_points)]
+            x_kept = np.asarray(x_values, dtype=object)[kept].tolist()
+            data = {"values": [{temporal: x, metric: float(value)} for x, value in zip(x_kept, y[kept], strict=True)]}
+            reduction = "lttb"
+        spec = {"mark": "line", "encoding": encoding, "data": data, "usermeta": _usermeta(rows, reduction)}
+        finite = y_sorted[np.isfinite(y_sorted)]
+        if finite.size:
+            first, last = float(finite[0]), float(finite[-1])
+            change = f" ({(last - first) / abs(first):+.1%} vs first)" if first else ""
+            insight = f"{metric} ranged {finite.min():,.2f} to {finite.max():,.2f}; latest {last:,.2f}{change}"
+        else:
+            insight = f"No numeric {metric} values"
+        return VisualizationSpec(kind="line", spec=spec, insight_summary=insight)
+
+
+def _usermeta(rows: ColumnarRows, reduction: str | None) -> dict[str, Any]:
+    return {"source_rows": len(rows), "reduction": reduction}
+
+
+def _metric_column(rows: ColumnarRows) -> str | None:
+    numeric = [name for name in rows.columns if rows.numeric(name) is not None or _is_decimal(rows, name)]
+    if _PREFERRED_METRIC in numeric:
+        return _PREFERRED_METRIC
+    # Prefer a measure over an id-like or temporal number such as fiscal_year.
+    measures = [name for name in numeric if not _is_temporal_name(name) and not name.endswith("_id")]
+    return (measures or numeric or [None])[0]
+
+
+def _is_decimal(rows: ColumnarRows, name: str) -> bool:
+    # Exact NUMERIC/DECIMAL values stay Decimal objects; chart them like floats.
+    first = next((value for value in rows.column(name) if value is not None), None)
+    return rows.column_type(name) == "object" and isinstance(first, Decimal)
+
+
+def _category_column(rows: ColumnarRows, exclude: str) -> str | None:
+    strings = [name for name in rows.columns if name != exclude and rows.column_type(name) == "string"]
+    if _PREFERRED_CATEGORY in strings:
+        return _PREFERRED_CATEGORY
+    categorical = [name for name in strings if not _is_temporal_name(name)]
+    return (categorical or [None])[0]
+
+
+def _temporal_column(rows: ColumnarRows, exclude: str) -> str | None:
+    for name in rows.columns:
+        if name != exclude and _is_temporal_name(name):
+            return name
+    return None
+
+
+def _is_temporal_name(name: str) -> bool:
+    parts = name.lower().split("_")
+    return any(hint in parts for hint in _TEMPORAL_HINTS)
+
+
+def _values(rows: ColumnarRows, metric: str) -> np.ndarray:
+    values = rows.numeric(metric)
+    if values is not None:
+        return values.astype(float, copy=False)
+    return np.array([np.nan if value is None else value for value in rows.column(metric)], dtype=float)
+
+
+def _group_sum(labels: Any, values: np.ndarray) -> tuple[list[str], np.ndarray]:
+    """Per-label totals in one vectorized pass; ``None`` labels group under ``"None"``."""
+
+    keys, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=np.nan_to_num(values), minlength=len(keys))
+    return keys.tolist(), totals
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the Largest-Triangle-Three-Buckets downsample of ``(x, y)`` to ``threshold`` points.
+
+    Keeps the first and last points; each bucket in between contributes the
+    point forming the largest triangle with the previously kept point and the
+    mean of the next bucket, which preserves peaks and troughs that plain
+    striding would skip.
+    """
+
+    length = len(x)
+    if threshold >= length:
+        return np.arange(length)
+    edges = np.linspace(1, length - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else length
+        mean_x, mean_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - mean_x) * (y[start:stop] - py) - (px - x[start:stop]) * (mean_y - py))
+        previous = start + int(np.argmax(areas)) if stop > start else start
+        selected[bucket + 1] = previous
+    return selected
@@ -2,42 +2,127 @@
 
 from __future__ import annotations
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator, Literal, Mapping
+
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 
 from fia_agent.agents.conductor import ConductorGraph
 from fia_agent.agents.query_generator import QueryGenerationAgent
 from fia_agent.agents.verifier import QueryVerificationAgent
 from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.columnar import ColumnarRows
 from fia_agent.config import BASE_DIR, Settings, get_settings
 from fia_agent.models import QueryRequest, QueryResponse, TableDefinition
-from fia_agent.services.audit import AuditService
-from fia_agent.services.memory import MemoryManager
+from fia_agent.services.audit import AuditFilter, AuditService, SQLiteAuditStore
+from fia_agent.services.circuit_breaker import CircuitBreaker
+from fia_agent.services.connection_pool import Connector
+from fia_agent.services.memory import memory_from_settings
+from fia_agent.services.metrics import CONTENT_TYPE, StageMetrics
+from fia_agent.services.profiling import ProfilingMiddleware, RequestProfiler
+from fia_agent.services.prompt_builder import PromptBuilder
 from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.result_cache import QueryResultCache
+from fia_agent.services.router import SourceRouter
+from fia_agent.services.scheduler import AdmissionScheduler
 from fia_agent.services.schema_discovery import SchemaDiscoveryService
-from fia_agent.services.security import RBACService
+from fia_agent.services.security import RBACService, load_policies
+from fia_agent.services.sql_validator import SqlValidator
 from fia_agent.services.text2sql import Text2SQLTranslator
+from fia_agent.services.translation_cache import TranslationCache
 from fia_agent.services.athena_client import AthenaClient
 from fia_agent.services.snowflake_client import SnowflakeClient
 
 
-def build_app(settings: Settings | None = None) -> FastAPI:
+def build_app(settings: Settings | None = None, connectors: Mapping[str, Connector[Any]] | None = None) -> FastAPI:
+    """Wire the services into an app; ``connectors`` swaps warehouse drivers by source name (benchmarks pass fakes)."""
+
     settings = settings or get_settings()
+    connectors = connectors or {}
 
-    memory = MemoryManager()
+    memory = memory_from_settings(settings)
     translator = Text2SQLTranslator()
-    snowflake = SnowflakeClient(settings) if settings.snowflake_enabled else None
-    athena = AthenaClient(settings) if settings.athena_enabled else None
+    snowflake = SnowflakeClient(settings, connectors.get("snowflake")) if settings.snowflake_enabled else None
+    athena = AthenaClient(settings, connectors.get("athena")) if settings.athena_enabled else None
+    warehouses = {name: client for name, client in (("snowflake", snowflake), ("athena", athena)) if client is not None}
     schema_service = SchemaDiscoveryService(
         sample_schema_path=BASE_DIR / "src" / "fia_agent" / "data" / "sample_schema.yaml",
         snowflake_client=snowflake,
         athena_client=athena,
+        ttl_seconds=settings.schema_ttl_seconds,
+        discovery_timeout=settings.schema_discovery_timeout_seconds,
+    )
+    translation_cache = TranslationCache(
+        path=settings.translation_cache_path or BASE_DIR / "var" / "translation_cache.json",
+        max_entries=settings.translation_cache_max_entries,
+        ttl_seconds=settings.translation_cache_ttl_seconds,
+        flush_interval=settings.translation_cache_flush_seconds,
+    )
+    schema_service.add_refresh_listener(lambda: translation_cache.retain(schema_service.fingerprints()))
+    prompts = PromptBuilder(
+        token_budget=settings.prompt_token_budget,
+        max_tables=settings.prompt_max_tables,
+        max_columns=settings.prompt_max_columns,
+        history_share=settings.prompt_history_share,
+    )
+    generator = QueryGenerationAgent(translator=translator, memory=memory, cache=translation_cache, prompts=prompts)
+    result_cache = QueryResultCache(
+        max_entries=settings.result_cache_max_entries,
+        ttl_seconds=settings.result_cache_ttl_seconds,
+    )
+    schema_service.add_refresh_listener(result_cache.invalidate)
+    scheduler = AdmissionScheduler(
+        global_limit=settings.scheduler_global_concurrency,
+        per_user_limit=settings.scheduler_per_user_concurrency,
+        role_limits=settings.scheduler_role_concurrency,
+        queue_timeout=settings.scheduler_queue_timeout_seconds,
+        max_queue_depth=settings.scheduler_max_queue_depth,
+    )
+    router = SourceRouter(
+        schema_service,
+        hedging=settings.router_hedging_enabled,
+        min_samples=settings.router_hedge_min_samples,
+    )
+    breakers = {
+        source: CircuitBreaker(
+            source,
+            failure_threshold=settings.breaker_failure_threshold,
+            reset_timeout=settings.breaker_reset_seconds,
+            half_open_probes=settings.breaker_half_open_probes,
+        )
+        for source in ("snowflake", "athena")
+    }
+    executor = QueryExecutor(
+        snowflake=snowflake,
+        athena=athena,
+        cache=result_cache,
+        scheduler=scheduler,
+        router=router,
+        breakers=breakers,
+        max_attempts=settings.executor_max_attempts,
+    )
+    security = RBACService(
+        settings,
+        policies=load_policies(
+            settings.redaction_policy_path or BASE_DIR / "src" / "fia_agent" / "data" / "redaction_policies.yaml"
+        ),
     )
-    generator = QueryGenerationAgent(translator=translator, memory=memory)
-    executor = QueryExecutor(snowflake=snowflake, athena=athena)
-    security = RBACService(settings)
-    verifier = QueryVerificationAgent(executor=executor, security=security)
-    visualizer = VisualizationAgent()
-    audit = AuditService()
+    metrics = StageMetrics(latency_target_ms=settings.metrics_latency_target_ms)
+    verifier = QueryVerificationAgent(executor=executor, security=security, metrics=metrics)
+    visualizer = VisualizationAgent(max_points=settings.visualization_max_points, top_n=settings.visualization_top_n)
+    audit = AuditService(
+        store=SQLiteAuditStore(settings.audit_db_path or BASE_DIR / "var" / "audit.sqlite3")
+        if settings.audit_durable
+        else None,
+        queue_size=settings.audit_queue_size,
+        batch_size=settings.audit_batch_size,
+    )
+    validator = SqlValidator()
     orchestrator = ConductorGraph(
         schema_service=schema_service,
         generator=generator,
@@ -45,29 +130,198 @@ def build_app(settings: Settings | None = None) -> FastAPI:
         visualizer=visualizer,
         memory=memory,
         audit=audit,
+        validator=validator if settings.sql_preflight_enabled else None,
+        metrics=metrics,
     )
+    for component, collector in (
+        ("result_cache", result_cache.stats),
+        ("translation_cache", translation_cache.stats),
+        ("prompts", prompts.stats),
+        ("preflight", validator.stats),
+        ("memory", memory.stats),
+        ("audit", audit.stats),
+        ("coalescing", orchestrator.stats),
+        ("scheduler", scheduler.stats),
+    ):
+        metrics.register(component, collector)
+    metrics.register("routing", router.stats, label="source")
+    metrics.register("pool", lambda: {name: client.pool_stats() for name, client in warehouses.items()}, label="source")
+    if athena is not None:
+        metrics.register("athena", athena.stats)
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI):
+        for client in warehouses.values():
+            await client.start()
+        await translation_cache.start()
+        await audit.start()
+        await schema_service.start()
+        try:
+            yield
+        finally:
+            await schema_service.stop()
+            await translation_cache.stop()
+            await memory.close()
+            await audit.stop()
+            for client in warehouses.values():
+                await client.close()
 
-    app = FastAPI(title="Financial Intelligence Agent", version="0.1.0")
+    app = FastAPI(title="Financial Intelligence Agent", version="0.1.0", lifespan=lifespan)
+    profiler = (
+        RequestProfiler(
+            sample_rate=settings.profiling_sample_rate,
+            interval_ms=settings.profiling_interval_ms,
+            max_captures=settings.profiling_max_captures,
+        )
+        if settings.profiling_enabled
+        else None
+    )
+    if profiler is not None:
+        app.add_middleware(ProfilingMiddleware, profiler=profiler)
 
     @app.get("/health")
-    async def health() -> dict[str, str]:
-        return {"status": "ok", "environment": settings.environment}
+    async def health() -> dict[str, Any]:
+        sources = executor.breaker_states()
+        degraded = any(source["state"] != "closed" for source in sources.values())
+        return {"status": "degraded" if degraded else "ok", "environment": settings.environment, "sources": sources}
 
     @app.get("/schemas", response_model=list[TableDefinition])
-    async def schema() -> list[TableDefinition]:
-        return await schema_service.get_schema()
+    async def schema(
+        response: Response, source: Literal["snowflake", "athena", "auto"] = "auto"
+    ) -> list[TableDefinition]:
+        snapshot = await schema_service.get_snapshot(source)
+        response.headers["X-Schema-Version"] = str(snapshot.version)
+        return snapshot.tables
 
     @app.post("/query", response_model=QueryResponse)
     async def query(request: QueryRequest) -> QueryResponse:
-        memory.capture_turn(request.session_id or request.user_id, "user", request.question)
+        await memory.capture_turn(request.session_id or request.user_id, "user", request.question)
         response = await orchestrator.run(request)
         return response
 
+    @app.post("/query/stream")
+    async def query_stream(
+        request: QueryRequest, format: Literal["ndjson", "sse"] = "ndjson"
+    ) -> StreamingResponse:
+        security.assert_role(request.role)
+        await memory.capture_turn(request.session_id or request.user_id, "user", request.question)
+        frames = orchestrator.stream(request, batch_size=settings.stream_batch_size)
+        if format == "sse":
+            return StreamingResponse(_sse(frames), media_type="text/event-stream")
+        return StreamingResponse(_ndjson(frames), media_type="application/x-ndjson")
+
+    @app.post("/query/batch")
+    async def query_batch(requests: list[QueryRequest], concurrency: int | None = None) -> StreamingResponse:
+        """Stream one NDJSON frame per request, in completion order, tagged with its ``index``."""
+
+        if len(requests) > settings.batch_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch exceeds {settings.batch_max_items} requests",
+            )
+        # Batch work yields to interactive traffic unless the caller chose a priority.
+        requests = [
+            request if "priority" in request.model_fields_set else request.model_copy(update={"priority": "batch"})
+            for request in requests
+        ]
+        for request in requests:
+            await memory.capture_turn(request.session_id or request.user_id, "user", request.question)
+        limit = min(concurrency or settings.batch_max_concurrency, settings.batch_max_concurrency)
+        frames = orchestrator.run_many(requests, concurrency=limit)
+        return StreamingResponse(_ndjson(frames), media_type="application/x-ndjson")
+
+    @app.get("/stats")
+    async def stats() -> dict[str, dict]:
+        return {
+            "result_cache": result_cache.stats(),
+            "translation_cache": translation_cache.stats(),
+            "prompts": prompts.stats(),
+            "preflight": validator.stats(),
+            "memory": memory.stats(),
+            "audit": audit.stats(),
+            "profiling": profiler.stats() if profiler is not None else {},
+            "coalescing": orchestrator.stats(),
+            "scheduler": scheduler.stats(),
+            "routing": router.stats(),
+            "pools": {name: client.pool_stats() for name, client in warehouses.items()},
+            "athena": athena.stats() if athena is not None else {},
+        }
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics_feed() -> PlainTextResponse:
+        """Prometheus text exposition: per-stage latency summaries plus cache, pool and queue gauges."""
+
+        return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/debug/profiles")
+    async def profiles() -> list[dict[str, Any]]:
+        """Summaries of the retained captures, newest first."""
+
+        return [profile.summary() for profile in _require_profiler(profiler).captures()]
+
+    @app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+    async def profile_stacks(profile_id: int) -> PlainTextResponse:
+        """One capture as collapsed stacks, ready for ``flamegraph.pl`` or speedscope."""
+
+        profile = _require_profiler(profiler).get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found or evicted")
+        return PlainTextResponse(profile.collapsed())
+
     @app.get("/audit")
-    async def audit_feed(limit: int = 20):
-        return [record.model_dump() for record in audit.recent(limit=limit)]
+    async def audit_feed(
+        response: Response,
+        limit: int = Query(20, ge=1, le=500),
+        user_id: str | None = None,
+        role: str | None = None,
+        status_filter: Literal["success", "failed"] | None = Query(None, alias="status"),
+        since: datetime | None = None,
+        until: datetime | None = None,
+        cursor: int | None = None,
+    ):
+        """Newest records first; pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next page."""
+
+        where = AuditFilter(user_id=user_id, role=role, status=status_filter, since=since, until=until)
+        records, next_cursor = await audit.search(where, limit=limit, cursor=cursor)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = str(next_cursor)
+        return [record.model_dump() for record in records]
 
     return app
 
 
-app = build_app()
+def _require_profiler(profiler: RequestProfiler | None) -> RequestProfiler:
+    if profiler is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled (PROFILING_ENABLED)")
+    return profiler
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, ColumnarRows):
+        return value.to_rows()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+async def _ndjson(frames: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for frame in frames:
+        yield orjson.dumps(frame, default=_encode) + b"\n"
+
+
+async def _sse(frames: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for frame in frames:
+        yield b"event: " + frame["type"].encode() + b"\ndata: " + orjson.dumps(frame, default=_encode) + b"\n\n"
+
+
+@lru_cache(maxsize=1)
+def _default_app() -> FastAPI:
+    return build_app()
+
+
+def __getattr__(name: str) -> Any:
+    # ``uvicorn fia_agent.app:app`` still works, but importing this module (as the
+    # benchmarks do) no longer builds a default app pointed at the repo's var/ tree.
+    if name == "app":
+        return _default_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
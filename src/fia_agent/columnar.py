@@ -0,0 +1,206 @@
+"""Column-major result sets shared by the executor, security, and visualization layers."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+
+Column = Sequence[Any]
+
+
+def _typed(values: list[Any]) -> tuple[Column, str]:
+    """Store all-numeric or all-boolean columns as NumPy arrays, everything else as lists."""
+
+    if values and isinstance(values[0], (bool, int, float)):
+        try:
+            array = np.array(values)
+        except (TypeError, ValueError, OverflowError):
+            return values, "object"
+        if array.dtype.kind in "iufb":
+            return array, array.dtype.name
+    if values and isinstance(values[0], str):
+        return values, "string"
+    return values, "object"
+
+
+class ColumnarRows:
+    """Query rows stored once per column, with column names kept a single time.
+
+    Instances are treated as immutable: transformations such as
+    :meth:`with_column` return a new object that shares every untouched column.
+    ``list[dict]`` is only produced by :meth:`to_rows`, which pydantic calls when
+    a model holding this type is serialized at the API edge.
+    """
+
+    __slots__ = ("_columns", "_types", "_data", "_length", "_positions")
+
+    def __init__(
+        self,
+        columns: Sequence[str] = (),
+        data: Sequence[Column] = (),
+        types: Sequence[str] | None = None,
+    ) -> None:
+        if len(columns) != len(data):
+            raise ValueError("columns and data must have the same length")
+        self._columns = tuple(columns)
+        self._data = tuple(data)
+        self._types = tuple(types) if types is not None else tuple("object" for _ in self._columns)
+        self._length = len(self._data[0]) if self._data else 0
+        self._positions = {name: position for position, name in enumerate(self._columns)}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> ColumnarRows:
+        """Pivot row mappings into columns in one pass; missing keys become ``None``."""
+
+        names: list[str] = []
+        positions: dict[str, int] = {}
+        values: list[list[Any]] = []
+        previous_keys: tuple[str, ...] | None = None
+        count = 0
+        for row in rows:
+            keys = tuple(row)
+            if keys == previous_keys:
+                for column, value in zip(values, row.values(), strict=True):
+                    column.append(value)
+            else:
+                for key, value in row.items():
+                    position = positions.get(key)
+                    if position is None:
+                        position = positions[key] = len(names)
+                        names.append(key)
+                        values.append([None] * count)
+                    values[position].append(value)
+                for column in values:
+                    if len(column) <= count:
+                        column.append(None)
+                previous_keys = keys if len(keys) == len(names) and keys == tuple(names) else None
+            count += 1
+        return cls.from_columns(dict(zip(names, values, strict=True)))
+
+    @classmethod
+    def from_tuples(cls, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> ColumnarRows:
+        """Transpose DB-API row tuples into columns."""
+
+        if not rows:
+            return cls.from_columns({name: [] for name in columns})
+        return cls.from_columns(dict(zip(columns, map(list, zip(*rows, strict=True)), strict=True)))
+
+    @classmethod
+    def concat(cls, batches: Sequence[ColumnarRows]) -> ColumnarRows:
+        """Join batches that share one column layout."""
+
+        if len(batches) == 1:
+            return batches[0]
+        if not batches:
+            return cls()
+        merged: dict[str, list[Any]] = {name: [] for name in batches[0].columns}
+        for batch in batches:
+            for name, column in zip(batch.columns, batch._plain_columns(), strict=True):
+                merged[name].extend(column)
+        return cls.from_columns(merged)
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, list[Any]]) -> ColumnarRows:
+        typed = [_typed(values if isinstance(values, list) else list(values)) for values in columns.values()]
+        return cls(list(columns), [column for column, _ in typed], [kind for _, kind in typed])
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self._columns
+
+    @property
+    def types(self) -> tuple[str, ...]:
+        return self._types
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._positions
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ColumnarRows):
+            return NotImplemented
+        return self._columns == other._columns and self.to_rows() == other.to_rows()
+
+    def __repr__(self) -> str:
+        return f"ColumnarRows(columns={list(self._columns)!r}, rows={self._length})"
+
+    def column(self, name: str) -> Column:
+        return self._data[self._positions[name]]
+
+    def column_type(self, name: str) -> str:
+        return self._types[self._positions[name]]
+
+    def numeric(self, name: str) -> np.ndarray | None:
+        """The column as a NumPy array when it is numeric, otherwise ``None``."""
+
+        column = self._data[self._positions[name]]
+        return column if isinstance(column, np.ndarray) and column.dtype.kind in "iuf" else None
+
+    def with_column(self, name: str, values: Column, kind: str = "object") -> ColumnarRows:
+        """Replace (or append) one column, sharing all the others."""
+
+        columns = list(self._columns)
+        data = list(self._data)
+        types = list(self._types)
+        position = self._positions.get(name)
+        if position is None:
+            columns.append(name)
+            data.append(values)
+            types.append(kind)
+        else:
+            data[position] = values
+            types[position] = kind
+        return ColumnarRows(columns, data, types)
+
+    def without(self, names: Iterable[str]) -> ColumnarRows:
+        dropped = set(names)
+        keep = [position for position, name in enumerate(self._columns) if name not in dropped]
+        return ColumnarRows(
+            [self._columns[position] for position in keep],
+            [self._data[position] for position in keep],
+            [self._types[position] for position in keep],
+        )
+
+    def slice(self, start: int, stop: int) -> ColumnarRows:
+        return ColumnarRows(self._columns, [column[start:stop] for column in self._data], self._types)
+
+    def iter_rows(self) -> Iterator[dict[str, Any]]:
+        names = self._columns
+        for values in zip(*self._plain_columns(), strict=True):
+            yield dict(zip(names, values, strict=True))
+
+    def to_rows(self) -> list[dict[str, Any]]:
+        names = self._columns
+        return [dict(zip(names, values, strict=True)) for values in zip(*self._plain_columns(), strict=True)]
+
+    def _plain_columns(self) -> list[list[Any]]:
+        return [column.tolist() if isinstance(column, np.ndarray) else column for column in self._data]
+
+    @classmethod
+    def _validate(cls, value: Any) -> ColumnarRows:
+        if isinstance(value, ColumnarRows):
+            return value
+        if isinstance(value, list):
+            return cls.from_rows(value)
+        raise TypeError("expected ColumnarRows or a list of row mappings")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source: Any, _handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: value.to_rows(), when_used="always"
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, _schema: core_schema.CoreSchema, _handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        return {"type": "array", "items": {"type": "object"}}
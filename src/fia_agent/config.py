@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -37,6 +37,83 @@ class Settings(BaseSettings):
     redis_url: str = Field("redis://localhost:6379/0", alias="REDIS_URL")
     mcp_endpoint: str | None = Field(None, alias="MCP_ENDPOINT")
 
+    warehouse_pool_size: int = Field(8, alias="WAREHOUSE_POOL_SIZE")
+    warehouse_pool_min_size: int = Field(1, alias="WAREHOUSE_POOL_MIN_SIZE")
+    warehouse_pool_acquire_timeout: float = Field(10.0, alias="WAREHOUSE_POOL_ACQUIRE_TIMEOUT")
+    warehouse_pool_idle_seconds: float = Field(300.0, alias="WAREHOUSE_POOL_IDLE_SECONDS")
+    warehouse_pool_health_check_seconds: float = Field(30.0, alias="WAREHOUSE_POOL_HEALTH_CHECK_SECONDS")
+    warehouse_io_threads: int = Field(16, alias="WAREHOUSE_IO_THREADS")
+
+    query_timeout_seconds: float = Field(300.0, alias="QUERY_TIMEOUT_SECONDS")
+    athena_poll_max_seconds: float = Field(2.0, alias="ATHENA_POLL_MAX_SECONDS")
+    athena_prefetch_pages: int = Field(2, alias="ATHENA_PREFETCH_PAGES")
+
+    scheduler_global_concurrency: int = Field(16, alias="SCHEDULER_GLOBAL_CONCURRENCY")
+    scheduler_per_user_concurrency: int = Field(2, alias="SCHEDULER_PER_USER_CONCURRENCY")
+    scheduler_role_concurrency: Dict[str, int] = Field(default_factory=dict, alias="SCHEDULER_ROLE_CONCURRENCY")
+    scheduler_queue_timeout_seconds: float = Field(5.0, alias="SCHEDULER_QUEUE_TIMEOUT_SECONDS")
+    scheduler_max_queue_depth: int = Field(256, alias="SCHEDULER_MAX_QUEUE_DEPTH")
+
+    router_hedging_enabled: bool = Field(True, alias="ROUTER_HEDGING_ENABLED")
+    router_hedge_min_samples: int = Field(20, alias="ROUTER_HEDGE_MIN_SAMPLES")
+
+    breaker_failure_threshold: int = Field(5, alias="BREAKER_FAILURE_THRESHOLD")
+    breaker_reset_seconds: float = Field(30.0, alias="BREAKER_RESET_SECONDS")
+    breaker_half_open_probes: int = Field(1, alias="BREAKER_HALF_OPEN_PROBES")
+    executor_max_attempts: int = Field(3, alias="EXECUTOR_MAX_ATTEMPTS")
+
+    redaction_policy_path: Path | None = Field(None, alias="REDACTION_POLICY_PATH")
+    redaction_hash_secret: str | None = Field(None, alias="REDACTION_HASH_SECRET")
+
+    schema_ttl_seconds: float = Field(300.0, alias="SCHEMA_TTL_SECONDS")
+    schema_discovery_timeout_seconds: float = Field(10.0, alias="SCHEMA_DISCOVERY_TIMEOUT_SECONDS")
+
+    stream_batch_size: int = Field(500, alias="STREAM_BATCH_SIZE")
+
+    batch_max_concurrency: int = Field(8, alias="BATCH_MAX_CONCURRENCY")
+    batch_max_items: int = Field(500, alias="BATCH_MAX_ITEMS")
+
+    translation_cache_path: Path | None = Field(None, alias="TRANSLATION_CACHE_PATH")
+    translation_cache_max_entries: int = Field(2048, alias="TRANSLATION_CACHE_MAX_ENTRIES")
+    translation_cache_ttl_seconds: float = Field(86400.0, alias="TRANSLATION_CACHE_TTL_SECONDS")
+    translation_cache_flush_seconds: float = Field(30.0, alias="TRANSLATION_CACHE_FLUSH_SECONDS")
+
+    prompt_token_budget: int = Field(2000, alias="PROMPT_TOKEN_BUDGET")
+    prompt_max_tables: int = Field(5, alias="PROMPT_MAX_TABLES")
+    prompt_max_columns: int = Field(24, alias="PROMPT_MAX_COLUMNS")
+    prompt_history_share: float = Field(0.25, alias="PROMPT_HISTORY_SHARE")
+
+    sql_preflight_enabled: bool = Field(True, alias="SQL_PREFLIGHT_ENABLED")
+
+    memory_backend: Literal["memory", "redis"] = Field("memory", alias="MEMORY_BACKEND")
+    memory_max_turns: int = Field(6, ge=1, alias="MEMORY_MAX_TURNS")
+    memory_max_patterns: int = Field(50, ge=1, alias="MEMORY_MAX_PATTERNS")
+    memory_max_sessions: int = Field(10_000, alias="MEMORY_MAX_SESSIONS")
+    memory_max_users: int = Field(10_000, alias="MEMORY_MAX_USERS")
+    memory_session_ttl_seconds: float = Field(3600.0, alias="MEMORY_SESSION_TTL_SECONDS")
+    memory_user_ttl_seconds: float = Field(30 * 86400.0, alias="MEMORY_USER_TTL_SECONDS")
+    memory_max_bytes: int = Field(64 * 1024 * 1024, alias="MEMORY_MAX_BYTES")
+    memory_recall_top_k: int = Field(5, alias="MEMORY_RECALL_TOP_K")
+    memory_recall_min_score: float = Field(0.05, alias="MEMORY_RECALL_MIN_SCORE")
+
+    audit_durable: bool = Field(True, alias="AUDIT_DURABLE")
+    audit_db_path: Path | None = Field(None, alias="AUDIT_DB_PATH")
+    audit_queue_size: int = Field(10_000, alias="AUDIT_QUEUE_SIZE")
+    audit_batch_size: int = Field(500, alias="AUDIT_BATCH_SIZE")
+
+    visualization_max_points: int = Field(1000, alias="VISUALIZATION_MAX_POINTS")
+    visualization_top_n: int = Field(12, alias="VISUALIZATION_TOP_N")
+
+    metrics_latency_target_ms: float = Field(5000.0, alias="METRICS_LATENCY_TARGET_MS")
+
+    profiling_enabled: bool = Field(False, alias="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(0.0, alias="PROFILING_SAMPLE_RATE")
+    profiling_interval_ms: float = Field(5.0, alias="PROFILING_INTERVAL_MS")
+    profiling_max_captures: int = Field(20, alias="PROFILING_MAX_CAPTURES")
+
+    result_cache_max_entries: int = Field(256, alias="RESULT_CACHE_MAX_ENTRIES")
+    result_cache_ttl_seconds: float = Field(60.0, alias="RESULT_CACHE_TTL_SECONDS")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
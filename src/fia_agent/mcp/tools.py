@@ -25,6 +25,7 @@ class QueryTool:
         self._orchestrator = orchestrator
 
     async def __call__(self, *, question: str, user_id: str, role: str) -> dict:
-        request = QueryRequest(question=question, user_id=user_id, role=role)
+        # Agent-driven calls queue behind interactive and batch work in the admission scheduler.
+        request = QueryRequest(question=question, user_id=user_id, role=role, priority="mcp")
         response = await self._orchestrator.run(request)
         return response.model_dump()
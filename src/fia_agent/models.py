@@ -5,7 +5,9 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
+
+from fia_agent.columnar import ColumnarRows
 
 
 class ColumnDefinition(BaseModel):
@@ -18,6 +20,7 @@ class TableDefinition(BaseModel):
     name: str
     description: str | None = None
     columns: list[ColumnDefinition] = Field(default_factory=list)
+    source: Literal["snowflake", "athena"] | None = Field(None, description="Warehouse that owns the table")
 
 
 class QueryRequest(BaseModel):
@@ -27,13 +30,19 @@ class QueryRequest(BaseModel):
     session_id: str | None = Field(None, description="Conversation session identifier")
     output_format: Literal["table", "chart", "narrative"] = "table"
     preferred_source: Literal["snowflake", "athena", "auto"] = "auto"
+    priority: Literal["interactive", "batch", "mcp"] = Field(
+        "interactive", description="Scheduling class; interactive requests are admitted first"
+    )
 
 
 class QueryExecutionResult(BaseModel):
-    rows: list[dict[str, Any]] = Field(default_factory=list)
+    # Accepts a list of row dicts and serializes back to one; columnar in between.
+    rows: ColumnarRows = Field(default_factory=ColumnarRows)
     row_count: int = 0
     latency_ms: int = 0
     source: Literal["snowflake", "athena", "mock"] = "mock"
+    cache_hit: bool = False
+    bytes_scanned: int | None = None
 
 
 class VisualizationSpec(BaseModel):
@@ -41,6 +50,18 @@ class VisualizationSpec(BaseModel):
     spec: dict[str, Any] = Field(default_factory=dict)
     insight_summary: str | None = None
 
+    @field_serializer("spec")
+    def _expand_columnar(self, spec: dict[str, Any]) -> dict[str, Any]:
+        return _expand(spec)
+
+
+def _expand(value: Any) -> Any:
+    if isinstance(value, ColumnarRows):
+        return value.to_rows()
+    if isinstance(value, dict):
+        return {key: _expand(item) for key, item in value.items()}
+    return value
+
 
 class QueryResponse(BaseModel):
     sql_query: str
@@ -48,6 +69,8 @@ class QueryResponse(BaseModel):
     visualization: VisualizationSpec
     self_corrections: list[str] = Field(default_factory=list)
     schema_used: list[TableDefinition] = Field(default_factory=list)
+    schema_version: int | None = None
+    prompt_tokens: int | None = Field(None, description="Estimated prompt size; unset when the translation was cached")
     generated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -3,26 +3,296 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable
+
+from fia_agent.columnar import ColumnarRows
 from fia_agent.config import Settings
-from fia_agent.models import QueryExecutionResult, TableDefinition
+from fia_agent.models import ColumnDefinition, QueryExecutionResult, TableDefinition
+from fia_agent.services.connection_pool import AsyncConnectionPool, Connector, pool_from_settings
 
+logger = logging.getLogger(__name__)
+
+POLL_BACKOFF = 1.5
+TERMINAL_STATES = frozenset({"SUCCEEDED", "FAILED", "CANCELLED"})
+MAX_PAGE_SIZE = 1000
+_CONVERTERS: dict[str, Callable[[str], Any]] = {
+    "tinyint": int,
+    "smallint": int,
+    "integer": int,
+    "bigint": int,
+    "float": float,
+    "real": float,
+    "double": float,
+    "decimal": Decimal,  # exact, like the Snowflake driver's NUMBER values
+    "boolean": lambda value: value == "true",
+}
+
+
+class AthenaQueryError(RuntimeError):
+    """The query finished in a FAILED or CANCELLED state."""
+
+
+class AthenaTimeoutError(TimeoutError):
+    """The query did not finish before the request deadline and was stopped."""
+
+
+@dataclass
+class AthenaExecution:
+    """State of one submitted query as last reported by ``GetQueryExecution``."""
+
+    execution_id: str
+    state: str = "QUEUED"
+    reason: str | None = None
+    bytes_scanned: int | None = None
+    engine_ms: int | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def update(self, payload: dict[str, Any]) -> None:
+        status = payload.get("Status", {})
+        statistics = payload.get("Statistics", {})
+        self.state = status.get("State", self.state)
+        self.reason = status.get("StateChangeReason")
+        self.bytes_scanned = statistics.get("DataScannedInBytes", self.bytes_scanned)
+        self.engine_ms = statistics.get("EngineExecutionTimeInMillis", self.engine_ms)
+
+
+class AthenaConnector:
+    """Creates boto3 Athena clients; each pooled client bounds one in-flight query."""
 
-class AthenaClient:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
 
+    def connect(self) -> Any:
+        import boto3
+
+        return boto3.client(
+            "athena",
+            region_name=self._settings.athena_region,
+            aws_access_key_id=self._settings.aws_access_key_id,
+            aws_secret_access_key=self._settings.aws_secret_access_key,
+        )
+
+    def ping(self, connection: Any) -> bool:
+        # Clients are stateless HTTP sessions; there is no server-side session to verify.
+        return True
+
+    def close(self, connection: Any) -> None:
+        close = getattr(connection, "close", None)
+        if close is not None:
+            close()
+
+
+class AthenaClient:
+    def __init__(
+        self, settings: Settings, connector: Connector[Any] | None = None, poll_initial: float = 0.1
+    ) -> None:
+        self._settings = settings
+        self._poll_initial = poll_initial
+        self.submitted = 0
+        self.cancelled = 0
+        self.polls = 0
+        self._pool: AsyncConnectionPool[Any] = pool_from_settings(
+            connector or AthenaConnector(settings), settings, name="athena"
+        )
+
     @property
     def enabled(self) -> bool:
         return self._settings.athena_enabled
 
+    async def start(self) -> None:
+        if self.enabled:
+            await self._pool.start()
+
     async def describe(self) -> list[TableDefinition]:
         if not self.enabled:
             return []
-        await asyncio.sleep(0.05)
-        return []
+        database = (self._settings.athena_database or "").replace("'", "''")
+        result = await self.execute(
+            "SELECT table_name, column_name, data_type, comment FROM information_schema.columns "
+            f"WHERE table_schema = '{database}' ORDER BY table_name, ordinal_position"
+        )
+        tables: dict[str, TableDefinition] = {}
+        for row in result.rows.iter_rows():
+            table = tables.get(row["table_name"])
+            if table is None:
+                table = tables[row["table_name"]] = TableDefinition(name=row["table_name"], source="athena")
+            table.columns.append(
+                ColumnDefinition(name=row["column_name"], type=row["data_type"], description=row["comment"] or None)
+            )
+        return list(tables.values())
+
+    async def schema_marker(self) -> str | None:
+        """Cheap change token for the catalog; ``None`` forces a full describe.
+
+        Intentionally unsupported: Athena has no catalog-wide version, and
+        deriving one from Glue ``UpdateTime`` means paging every table through
+        a separate Glue client, which costs about as much as the describe.
+        """
+
+        return None
 
     async def execute(self, sql: str) -> QueryExecutionResult:
         if not self.enabled:
             raise RuntimeError("Athena is not configured")
-        await asyncio.sleep(0.1)
-        return QueryExecutionResult(rows=[{"message": "Not yet implemented"}], row_count=1, latency_ms=105, source="athena")
+        stats: dict[str, Any] = {}
+        batches = [batch async for batch in self.stream(sql, MAX_PAGE_SIZE, stats=stats)]
+        table = ColumnarRows.concat(batches)
+        return QueryExecutionResult(
+            rows=table, row_count=len(table), source="athena", bytes_scanned=stats.get("bytes_scanned")
+        )
+
+    async def stream(
+        self, sql: str, batch_size: int = 500, stats: dict[str, Any] | None = None
+    ) -> AsyncIterator[ColumnarRows]:
+        """Submit ``sql``, wait for it to finish, then yield result pages as they are fetched.
+
+        Pages are prefetched in the background while the consumer handles the
+        previous one. A query that has not finished when the consumer goes away
+        (client disconnect, cancellation) or the deadline passes is stopped on
+        the Athena side. ``stats`` receives ``bytes_scanned`` and ``engine_ms``.
+        """
+
+        if not self.enabled:
+            raise RuntimeError("Athena is not configured")
+        page_size = max(1, min(batch_size, MAX_PAGE_SIZE))
+        deadline = asyncio.get_running_loop().time() + self._settings.query_timeout_seconds
+        # A pooled client is held for the whole query, so the pool size bounds
+        # concurrent Athena queries as well as API sessions.
+        async with self._pool.connection() as client:
+            execution = await self._submit(client, sql)
+            try:
+                await self._wait(client, execution, deadline)
+            finally:
+                if not execution.finished:
+                    await self._cancel(client, execution)
+            if stats is not None:
+                stats.update(bytes_scanned=execution.bytes_scanned, engine_ms=execution.engine_ms)
+            async for batch in self._pages(client, execution, page_size, deadline):
+                yield batch
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+    def pool_stats(self) -> dict[str, float | int]:
+        return self._pool.stats()
+
+    def stats(self) -> dict[str, int]:
+        return {"submitted": self.submitted, "cancelled": self.cancelled, "polls": self.polls}
+
+    async def _submit(self, client: Any, sql: str) -> AthenaExecution:
+        request: dict[str, Any] = {
+            "QueryString": sql,
+            "QueryExecutionContext": {"Database": self._settings.athena_database},
+        }
+        if self._settings.athena_workgroup:
+            request["WorkGroup"] = self._settings.athena_workgroup
+        response = await self._pool.run(client.start_query_execution, **request)
+        self.submitted += 1
+        return AthenaExecution(response["QueryExecutionId"])
+
+    async def _wait(self, client: Any, execution: AthenaExecution, deadline: float) -> None:
+        """Poll until the query finishes, backing off geometrically up to the poll ceiling."""
+
+        loop = asyncio.get_running_loop()
+        delay = self._poll_initial
+        while True:
+            response = await self._pool.run(client.get_query_execution, QueryExecutionId=execution.execution_id)
+            self.polls += 1
+            execution.update(response["QueryExecution"])
+            if execution.state == "SUCCEEDED":
+                return
+            if execution.finished:
+                raise AthenaQueryError(execution.reason or f"Athena query {execution.state.lower()}")
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise AthenaTimeoutError(
+                    f"Athena query {execution.execution_id} exceeded {self._settings.query_timeout_seconds}s"
+                )
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * POLL_BACKOFF, self._settings.athena_poll_max_seconds)
+
+    async def _pages(
+        self, client: Any, execution: AthenaExecution, page_size: int, deadline: float
+    ) -> AsyncIterator[ColumnarRows]:
+        loop = asyncio.get_running_loop()
+        pages: asyncio.Queue[ColumnarRows | Exception | None] = asyncio.Queue(
+            maxsize=max(self._settings.athena_prefetch_pages, 1)
+        )
+
+        async def produce() -> None:
+            token: str | None = None
+            header_pending = True
+            try:
+                while True:
+                    if loop.time() > deadline:
+                        raise AthenaTimeoutError(
+                            f"Athena query {execution.execution_id} exceeded "
+                            f"{self._settings.query_timeout_seconds}s while fetching results"
+                        )
+                    kwargs: dict[str, Any] = {"QueryExecutionId": execution.execution_id, "MaxResults": page_size}
+                    if token:
+                        kwargs["NextToken"] = token
+                    page = await self._pool.run(client.get_query_results, **kwargs)
+                    rows = page["ResultSet"]["Rows"]
+                    if header_pending:
+                        # The first row of the first page repeats the column names.
+                        rows = rows[1:]
+                        header_pending = False
+                    await pages.put(_to_columnar(page["ResultSet"]["ResultSetMetadata"]["ColumnInfo"], rows))
+                    token = page.get("NextToken")
+                    if not token:
+                        break
+            except Exception as exc:
+                await pages.put(exc)
+                return
+            await pages.put(None)
+
+        producer = asyncio.create_task(produce())
+        yielded = False
+        empty: ColumnarRows | None = None
+        try:
+            while True:
+                item = await pages.get()
+                if item is None:
+                    if not yielded and empty is not None:
+                        yield empty  # a zero-row result still reports its columns
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                if len(item):
+                    yielded = True
+                    yield item
+                elif empty is None:
+                    empty = item
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def _cancel(self, client: Any, execution: AthenaExecution) -> None:
+        try:
+            # Shielded so a cancelled request still stops the query it started.
+            await asyncio.shield(self._pool.run(client.stop_query_execution, QueryExecutionId=execution.execution_id))
+        except Exception:
+            logger.warning("Stopping Athena query %s failed", execution.execution_id, exc_info=True)
+            return
+        execution.state = "CANCELLED"
+        self.cancelled += 1
+
+
+def _to_columnar(column_info: list[dict[str, Any]], rows: list[dict[str, Any]]) -> ColumnarRows:
+    names = [info["Name"] for info in column_info]
+    converters = [_CONVERTERS.get(info.get("Type", "").lower()) for info in column_info]
+    tuples = []
+    for row in rows:
+        values = []
+        for cell, convert in zip(row["Data"], converters, strict=True):
+            value = cell.get("VarCharValue")
+            values.append(convert(value) if convert is not None and value is not None else value)
+        tuples.append(values)
+    return ColumnarRows.from_tuples(names, tuples)
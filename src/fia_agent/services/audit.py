@@ -2,18 +2,277 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import sqlite3
+import threading
 from collections import deque
-from typing import Deque
+from datetime import datetime, timezone
+from itertools import count, islice
+from pathlib import Path
+from typing import Any, Deque, Iterable, Sequence
 
 from fia_agent.models import AuditRecord
 
+logger = logging.getLogger(__name__)
+
+_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.%f"  # fixed width, so text order is time order
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    question TEXT NOT NULL,
+    sql_query TEXT NOT NULL,
+    status TEXT NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS audit_user ON audit (user_id, id);
+CREATE INDEX IF NOT EXISTS audit_role ON audit (role, id);
+CREATE INDEX IF NOT EXISTS audit_status ON audit (status, id);
+CREATE INDEX IF NOT EXISTS audit_created ON audit (created_at);
+"""
+
+_COLUMNS = ("user_id", "role", "question", "sql_query", "status", "latency_ms", "created_at", "error")
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Records carry naive UTC timestamps; convert aware values so they compare and sort correctly."""
+
+    return value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class AuditFilter:
+    """Optional equality filters plus a ``[since, until)`` time window."""
+
+    __slots__ = ("user_id", "role", "status", "since", "until")
+
+    def __init__(
+        self,
+        user_id: str | None = None,
+        role: str | None = None,
+        status: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> None:
+        self.user_id = user_id
+        self.role = role
+        self.status = status
+        self.since = _utc_naive(since) if since is not None else None
+        self.until = _utc_naive(until) if until is not None else None
+
+    def matches(self, record: AuditRecord) -> bool:
+        created_at = _utc_naive(record.created_at)
+        return (
+            (self.user_id is None or record.user_id == self.user_id)
+            and (self.role is None or record.role == self.role)
+            and (self.status is None or record.status == self.status)
+            and (self.since is None or created_at >= self.since)
+            and (self.until is None or created_at < self.until)
+        )
+
+
+class SQLiteAuditStore:
+    """Append-only audit table in a SQLite database running in WAL mode.
+
+    Methods are blocking and meant to run in a worker thread. Writes and reads
+    use separate connections so paging through ``/audit`` never waits on a
+    batch insert.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+        self._writer: sqlite3.Connection | None = None
+        self._reader: sqlite3.Connection | None = None
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+    def open(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.executescript(_SCHEMA)
+        self._reader = sqlite3.connect(self._path, check_same_thread=False)
+        self._reader.execute("PRAGMA query_only=ON")
+
+    def write_many(self, records: Sequence[AuditRecord]) -> None:
+        assert self._writer is not None, "store is not open"
+        rows = [
+            (r.user_id, r.role, r.question, r.sql_query, r.status, r.latency_ms, _utc_naive(r.created_at).strftime(_TIMESTAMP), r.error)
+            for r in records
+        ]
+        with self._write_lock:
+            self._writer.execute("BEGIN")
+            try:
+                self._writer.executemany(
+                    f"INSERT INTO audit ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", rows
+                )
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    def query(self, where: AuditFilter, limit: int, cursor: int | None) -> tuple[list[AuditRecord], int | None]:
+        """Newest first; ``cursor`` is the id to continue below (keyset pagination)."""
+
+        assert self._reader is not None, "store is not open"
+        clauses: list[str] = []
+        params: list[Any] = []
+        for column in ("user_id", "role", "status"):
+            value = getattr(where, column)
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if where.since is not None:
+            clauses.append("created_at >= ?")
+            params.append(where.since.strftime(_TIMESTAMP))
+        if where.until is not None:
+            clauses.append("created_at < ?")
+            params.append(where.until.strftime(_TIMESTAMP))
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        sql = f"SELECT id, {', '.join(_COLUMNS)} FROM audit"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        records = [
+            AuditRecord(**dict(zip(_COLUMNS, row[1:], strict=True), created_at=datetime.fromisoformat(row[7])))
+            for row in rows[:limit]
+        ]
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return records, next_cursor
+
+    def close(self) -> None:
+        for connection in (self._writer, self._reader):
+            if connection is not None:
+                connection.close()
+        self._writer = self._reader = None
+
 
 class AuditService:
-    def __init__(self, max_records: int = 500) -> None:
-        self._records: Deque[AuditRecord] = deque(maxlen=max_records)
+    """Recent records in memory, plus an optional durable store fed off the hot path.
+
+    :meth:`record` never blocks: entries go into a bounded queue that a writer
+    task drains into the store in batches of up to ``batch_size``. If the
+    queue is full the entry is counted as dropped rather than stalling the
+    request.
+    """
+
+    def __init__(
+        self,
+        max_records: int = 500,
+        store: SQLiteAuditStore | None = None,
+        queue_size: int = 10_000,
+        batch_size: int = 500,
+    ) -> None:
+        # (id, record), newest first; ids increase like the SQLite rowid so cursors mean the same on both.
+        self._records: Deque[tuple[int, AuditRecord]] = deque(maxlen=max_records)
+        self._ids = count(1)
+        self._store = store
+        # ``None`` is the stop sentinel; it lets the writer finish its current flush.
+        self._queue: asyncio.Queue[AuditRecord | None] = asyncio.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._writer: asyncio.Task[None] | None = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        if self._store is None or self._writer is not None:
+            return
+        await asyncio.to_thread(self._store.open)
+        self._writer = asyncio.create_task(self._write_forever())
+
+    async def stop(self) -> None:
+        if self._writer is not None:
+            # Never cancel mid-write: the batch has already left the queue and would be lost.
+            await self._queue.put(None)
+            await self._writer
+            self._writer = None
+            await self._flush(self._drain())
+        if self._store is not None:
+            await asyncio.to_thread(self._store.close)
 
     def record(self, entry: AuditRecord) -> None:
-        self._records.appendleft(entry)
+        self._records.appendleft((next(self._ids), entry))
+        if self._store is None:
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Audit queue full; dropped record for user %s", entry.user_id)
 
     def recent(self, limit: int = 50) -> list[AuditRecord]:
-        return list(list(self._records)[:limit])
+        return [record for _, record in islice(self._records, limit)]
+
+    async def search(
+        self, where: AuditFilter, limit: int = 50, cursor: int | None = None
+    ) -> tuple[list[AuditRecord], int | None]:
+        """One page of records, newest first, and the cursor for the next page (``None`` at the end)."""
+
+        if self._store is not None and self._writer is not None:
+            return await asyncio.to_thread(self._store.query, where, limit, cursor)
+        # Same keyset as the store: continue below the cursor id, so new records never shift a page.
+        matching = (
+            (record_id, record)
+            for record_id, record in self._records
+            if (cursor is None or record_id < cursor) and where.matches(record)
+        )
+        page = list(islice(matching, limit + 1))
+        next_cursor = page[limit - 1][0] if len(page) > limit else None
+        return [record for _, record in page[:limit]], next_cursor
+
+    async def _write_forever(self) -> None:
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first, *self._drain(self._batch_size - 1)]
+            stopping = batch[-1] is None
+            await self._flush(batch)
+            if stopping:
+                return
+
+    def _drain(self, limit: int | None = None) -> list[AuditRecord | None]:
+        """Up to ``limit`` queued items, ending early after the stop sentinel."""
+
+        batch: list[AuditRecord | None] = []
+        while not self._queue.empty() and (limit is None or len(batch) < limit):
+            item = self._queue.get_nowait()
+            batch.append(item)
+            if item is None:
+                break
+        return batch
+
+    async def _flush(self, batch: Iterable[AuditRecord | None]) -> None:
+        records = [record for record in batch if record is not None]
+        if not records or self._store is None:
+            return
+        try:
+            await asyncio.to_thread(self._store.write_many, records)
+        except Exception:
+            self.failures += 1
+            logger.exception("Writing %d audit records failed", len(records))
+            return
+        self.written += len(records)
+        self.batches += 1
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "durable": self._store is not None,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
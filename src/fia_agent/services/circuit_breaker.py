@@ -0,0 +1,143 @@
+"""Per-source circuit breakers and classification of warehouse errors."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable, Literal
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+# Driver exception class names that signal an unhealthy source rather than a bad query.
+_TRANSIENT_ERROR_NAMES = frozenset(
+    {
+        "OperationalError",
+        "InterfaceError",
+        "ServiceUnavailable",
+        "EndpointConnectionError",
+        "ConnectTimeoutError",
+        "ReadTimeoutError",
+        "ThrottlingException",
+        "TooManyRequestsException",
+        "InternalServerException",
+    }
+)
+_TRANSIENT_CLIENT_CODES = frozenset(
+    {"ThrottlingException", "TooManyRequestsException", "InternalServerException", "ServiceUnavailable"}
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """The source's breaker is open; the call was rejected without reaching the warehouse."""
+
+    def __init__(self, source: str, retry_after: float) -> None:
+        super().__init__(f"{source} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.source = source
+        self.retry_after = retry_after
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether ``exc`` points at the source (network, capacity, outage) rather than the SQL."""
+
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if names & _TRANSIENT_ERROR_NAMES:
+        return True
+    # botocore.exceptions.ClientError carries the service error code in ``response``.
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code") in _TRANSIENT_CLIENT_CODES
+    return False
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive transient failures.
+
+    While open every call is rejected with :class:`CircuitOpenError`. After
+    ``reset_timeout`` the breaker turns half-open and lets ``half_open_probes``
+    concurrent calls through: a success closes it, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._half_open_probes = half_open_probes
+        self._clock = clock
+        self._state: BreakerState = "closed"
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state == "open" and self._clock() - self._opened_at >= self._reset_timeout:
+            self._state = "half_open"
+            self._probes = 0
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would be let through right now (does not reserve a probe)."""
+
+        state = self.state
+        return state == "closed" or (state == "half_open" and self._probes < self._half_open_probes)
+
+    def acquire(self) -> None:
+        """Reserve permission for one call; raises :class:`CircuitOpenError` when rejected."""
+
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and self._probes < self._half_open_probes:
+            self._probes += 1
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(self._reset_timeout - (self._clock() - self._opened_at), 0.0))
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        if self._state == "half_open":
+            self._state = "closed"
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self._state == "half_open" or self._consecutive_failures >= self._failure_threshold:
+            self._trip()
+
+    def release(self) -> None:
+        """Return an unused probe, e.g. when the call was cancelled before it finished."""
+
+        if self._state == "half_open" and self._probes > 0:
+            self._probes -= 1
+
+    def snapshot(self) -> dict[str, str | int | float]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after_s": round(max(self._reset_timeout - (self._clock() - self._opened_at), 0.0), 3)
+            if state == "open"
+            else 0.0,
+        }
+
+    def _trip(self) -> None:
+        self._state = "open"
+        self._opened_at = self._clock()
+        self._probes = 0
+        self.opened += 1
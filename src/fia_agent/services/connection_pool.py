@@ -0,0 +1,283 @@
+"""Bounded async connection pool for blocking warehouse connectors."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Generic, Protocol, TypeVar
+
+from fia_agent.config import Settings
+
+logger = logging.getLogger(__name__)
+
+C = TypeVar("C")
+R = TypeVar("R")
+
+# Thread calls submitted from inside a ``connection()`` block that have not returned yet.
+_in_flight: ContextVar[set[Future[Any]] | None] = ContextVar("in_flight", default=None)
+
+
+class Connector(Protocol[C]):
+    """Blocking connection factory; every method runs on the pool's I/O threads."""
+
+    def connect(self) -> C: ...
+
+    def ping(self, connection: C) -> bool: ...
+
+    def close(self, connection: C) -> None: ...
+
+
+class PoolTimeoutError(TimeoutError):
+    """No connection became available within the acquire timeout."""
+
+
+class PoolClosedError(RuntimeError):
+    """The pool was closed while a caller tried to use it."""
+
+
+@dataclass
+class PooledConnection(Generic[C]):
+    connection: C
+    last_used: float
+    last_checked: float
+
+
+class AsyncConnectionPool(Generic[C]):
+    """At most ``max_size`` connections, pre-warmed to ``min_size``.
+
+    Blocking connector calls and any work submitted through :meth:`run` execute
+    on a dedicated thread pool so they never stall the event loop. Idle
+    connections beyond ``min_size`` are reaped after ``idle_timeout`` and
+    connections idle longer than ``health_check_interval`` are pinged before
+    being handed out.
+    """
+
+    def __init__(
+        self,
+        connector: Connector[C],
+        *,
+        name: str = "warehouse",
+        max_size: int = 8,
+        min_size: int = 1,
+        acquire_timeout: float = 10.0,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        io_threads: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError("pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connector = connector
+        self.name = name
+        self._max_size = max_size
+        self._min_size = min_size
+        self._acquire_timeout = acquire_timeout
+        self._idle_timeout = idle_timeout
+        self._health_check_interval = health_check_interval
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(
+            max_workers=io_threads or max_size + 2, thread_name_prefix=f"{name}-io"
+        )
+        self._permits = asyncio.Semaphore(max_size)
+        self._idle: Deque[PooledConnection[C]] = deque()
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._reaper: asyncio.Task[None] | None = None
+        self.created = 0
+        self.destroyed = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.health_failures = 0
+        self.reaped = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    async def start(self) -> None:
+        """Pre-warm ``min_size`` connections and start the idle reaper."""
+
+        missing = self._min_size - self._open
+        if missing > 0:
+            results = await asyncio.gather(*(self._create() for _ in range(missing)), return_exceptions=True)
+            now = self._clock()
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.warning("Pre-warming %s pool failed: %s", self.name, result)
+                else:
+                    self._idle.append(PooledConnection(result, now, now))
+        if self._reaper is None and self._idle_timeout > 0:
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        while self._idle:
+            await self._destroy(self._idle.popleft().connection)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """Run a blocking callable on the pool's I/O threads."""
+
+        future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        in_flight = _in_flight.get()
+        if in_flight is not None:
+            in_flight.add(future)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            # A cancelled await leaves the call running on its thread; keep tracking it.
+            if in_flight is not None and future.done():
+                in_flight.discard(future)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[C]:
+        pooled = await self.acquire()
+        in_flight: set[Future[Any]] = set()
+        token = _in_flight.set(in_flight)
+        try:
+            yield pooled.connection
+        except BaseException:
+            # The connection may be in an unknown state; verify before reuse.
+            pooled.last_checked = float("-inf")
+            raise
+        finally:
+            _in_flight.reset(token)
+            pending = [future for future in in_flight if not future.done()]
+            if pending:
+                # The caller was cancelled while an I/O thread still uses the connection;
+                # hold it (and its permit) until that call returns.
+                asyncio.ensure_future(self._release_after(pooled, pending))
+            else:
+                self.release(pooled)
+
+    async def acquire(self) -> PooledConnection[C]:
+        if self._closed:
+            raise PoolClosedError(f"{self.name} pool is closed")
+        started = self._clock()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._permits.acquire(), timeout=self._acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self._acquire_timeout}s waiting for a {self.name} connection"
+            ) from None
+        finally:
+            self._waiting -= 1
+        waited_ms = (self._clock() - started) * 1000
+        self.wait_ms_total += waited_ms
+        self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+        try:
+            pooled = await self._checkout()
+        except BaseException:
+            self._permits.release()
+            raise
+        self._in_use += 1
+        self.acquired += 1
+        return pooled
+
+    def release(self, pooled: PooledConnection[C]) -> None:
+        self._in_use -= 1
+        if self._closed:
+            asyncio.ensure_future(self._destroy(pooled.connection))
+        else:
+            pooled.last_used = self._clock()
+            self._idle.append(pooled)
+        self._permits.release()
+
+    async def _release_after(self, pooled: PooledConnection[C], pending: list[Future[Any]]) -> None:
+        await asyncio.wait([asyncio.wrap_future(future) for future in pending])
+        self.release(pooled)
+
+    async def _checkout(self) -> PooledConnection[C]:
+        while self._idle:
+            pooled = self._idle.pop()
+            if self._clock() - pooled.last_checked < self._health_check_interval:
+                return pooled
+            healthy = False
+            try:
+                healthy = await self.run(self._connector.ping, pooled.connection)
+            except Exception:  # pragma: no cover - connector specific failures
+                healthy = False
+            if healthy:
+                pooled.last_checked = self._clock()
+                return pooled
+            self.health_failures += 1
+            await self._destroy(pooled.connection)
+        now = self._clock()
+        return PooledConnection(await self._create(), now, now)
+
+    async def _create(self) -> C:
+        self._open += 1
+        try:
+            connection = await self.run(self._connector.connect)
+        except BaseException:
+            self._open -= 1
+            raise
+        self.created += 1
+        return connection
+
+    async def _destroy(self, connection: C) -> None:
+        self._open -= 1
+        self.destroyed += 1
+        try:
+            await self.run(self._connector.close, connection)
+        except Exception:  # pragma: no cover - best effort
+            logger.debug("Closing %s connection failed", self.name, exc_info=True)
+
+    async def reap_idle(self) -> int:
+        """Close idle connections unused for ``idle_timeout``, keeping ``min_size`` open."""
+
+        cutoff = self._clock() - self._idle_timeout
+        expired = [pooled for pooled in self._idle if pooled.last_used <= cutoff]
+        expired = expired[: max(self._open - self._min_size, 0)]
+        for pooled in expired:
+            self._idle.remove(pooled)
+            await self._destroy(pooled.connection)
+        self.reaped += len(expired)
+        return len(expired)
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(max(min(self._idle_timeout / 2, 30.0), 0.01))
+            await self.reap_idle()
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "max_size": self._max_size,
+            "open": self._open,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "created": self.created,
+            "destroyed": self.destroyed,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "health_failures": self.health_failures,
+            "reaped": self.reaped,
+            "wait_ms_avg": round(self.wait_ms_total / self.acquired, 3) if self.acquired else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+        }
+
+
+def pool_from_settings(connector: Connector[C], settings: Settings, name: str) -> AsyncConnectionPool[C]:
+    return AsyncConnectionPool(
+        connector,
+        name=name,
+        max_size=settings.warehouse_pool_size,
+        min_size=min(settings.warehouse_pool_min_size, settings.warehouse_pool_size),
+        acquire_timeout=settings.warehouse_pool_acquire_timeout,
+        idle_timeout=settings.warehouse_pool_idle_seconds,
+        health_check_interval=settings.warehouse_pool_health_check_seconds,
+        io_threads=settings.warehouse_io_threads,
+    )
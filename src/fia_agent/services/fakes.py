@@ -0,0 +1,355 @@
+"""Local stand-ins for external services, used by tests and benchmarks."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, Callable, Sequence
+
+_CATALOG: list[tuple[str, str, str, str | None]] = [
+    ("financials_quarterly", "fiscal_quarter", "TEXT", "Fiscal quarter in YYYY-Q format."),
+    ("financials_quarterly", "revenue_usd", "FLOAT", "Reported revenue in USD."),
+    ("financials_quarterly", "ebitda_usd", "FLOAT", "Reported EBITDA in USD."),
+    ("financials_quarterly", "segment", "TEXT", "Business segment name."),
+    ("guidance", "fiscal_year", "TEXT", "Fiscal year string"),
+    ("guidance", "revenue_low", "FLOAT", None),
+    ("guidance", "revenue_high", "FLOAT", None),
+]
+_SEGMENTS = ("Cloud", "Payments", "Lending", "Wealth")
+_RESULT_COLUMNS = (("fiscal_quarter", "varchar"), ("revenue_usd", "double"), ("segment", "varchar"))
+
+
+def financial_rows(count: int) -> list[tuple[Any, ...]]:
+    return [
+        (f"2024-Q{index % 4 + 1}", 1000.0 + index, _SEGMENTS[index % len(_SEGMENTS)])
+        for index in range(count)
+    ]
+
+
+class FakeCursor:
+    """Minimal DB-API cursor returning deterministic financial rows."""
+
+    def __init__(self, connection: FakeConnection) -> None:
+        self._connection = connection
+        self._rows: Sequence[tuple[Any, ...]] = ()
+        self._position = 0
+        self.description: list[tuple[Any, ...]] | None = None
+
+    def execute(self, sql: str, params: Sequence[Any] | None = None) -> FakeCursor:
+        connector = self._connection.connector
+        connector.enter_query()
+        try:
+            if connector.query_latency:
+                time.sleep(connector.query_latency)
+            if connector.fail_next:
+                connector.fail_next -= 1
+                raise RuntimeError("fake warehouse error")
+            lowered = sql.lower()
+            if "information_schema.columns" in lowered:
+                names = ("table_name", "column_name", "data_type", "comment")
+                self._rows = connector.catalog
+            elif "last_altered" in lowered:
+                names = ("last_altered",)
+                self._rows = [(connector.catalog_version,)]
+            elif lowered.strip() == "select 1":
+                names = ("1",)
+                self._rows = [(1,)]
+            else:
+                names = tuple(name for name, _ in _RESULT_COLUMNS)
+                self._rows = financial_rows(connector.row_count)
+        finally:
+            connector.exit_query()
+        self.description = [(name, None, None, None, None, None, None) for name in names]
+        self._position = 0
+        return self
+
+    def fetchmany(self, size: int = 1) -> list[tuple[Any, ...]]:
+        batch = self._rows[self._position : self._position + size]
+        self._position += len(batch)
+        if self._connection.connector.fetch_latency and batch:
+            time.sleep(self._connection.connector.fetch_latency)
+        return list(batch)
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        return self.fetchmany(len(self._rows) - self._position)
+
+    def close(self) -> None:
+        self._rows = ()
+
+
+class FakeConnection:
+    def __init__(self, connector: FakeConnector, ident: int) -> None:
+        self.connector = connector
+        self.ident = ident
+        self.closed = False
+        self.healthy = True
+
+    def cursor(self) -> FakeCursor:
+        if self.closed:
+            raise RuntimeError("connection is closed")
+        return FakeCursor(self)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeConnector:
+    """Connector with configurable latencies that records peak concurrency.
+
+    Implements the :class:`~fia_agent.services.connection_pool.Connector`
+    protocol so pools can be load-tested without a warehouse.
+    """
+
+    def __init__(
+        self,
+        connect_latency: float = 0.0,
+        query_latency: float = 0.0,
+        fetch_latency: float = 0.0,
+        row_count: int = 4,
+        catalog: Sequence[tuple[str, str, str, str | None]] | None = None,
+    ) -> None:
+        self.connect_latency = connect_latency
+        self.query_latency = query_latency
+        self.fetch_latency = fetch_latency
+        self.row_count = row_count
+        # (table, column, type, comment) rows served for information_schema.columns.
+        self.catalog = _CATALOG if catalog is None else list(catalog)
+        self.fail_next = 0
+        self.catalog_version = "2024-01-01T00:00:00"
+        self.connections: list[FakeConnection] = []
+        self.active_queries = 0
+        self.peak_queries = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def connect(self) -> FakeConnection:
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+        connection = FakeConnection(self, next(self._ids))
+        with self._lock:
+            self.connections.append(connection)
+        return connection
+
+    def ping(self, connection: FakeConnection) -> bool:
+        return connection.healthy and not connection.closed
+
+    def close(self, connection: FakeConnection) -> None:
+        connection.close()
+
+    @property
+    def open_connections(self) -> int:
+        return sum(not connection.closed for connection in self.connections)
+
+    def enter_query(self) -> None:
+        with self._lock:
+            self.active_queries += 1
+            self.peak_queries = max(self.peak_queries, self.active_queries)
+
+    def exit_query(self) -> None:
+        with self._lock:
+            self.active_queries -= 1
+
+
+class FakeAthenaAPI:
+    """In-memory stand-in for a boto3 Athena client.
+
+    Each execution moves QUEUED -> RUNNING -> SUCCEEDED (or FAILED) one step per
+    ``get_query_execution`` poll, pages results with ``NextToken`` and honours
+    ``stop_query_execution``. It also implements the pool ``Connector``
+    protocol, handing itself out as the connection.
+    """
+
+    TERMINAL = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+    def __init__(
+        self,
+        row_count: int = 4,
+        queued_polls: int = 1,
+        running_polls: int = 2,
+        fail: bool = False,
+        bytes_per_row: int = 64,
+        page_latency: float = 0.0,
+    ) -> None:
+        self.row_count = row_count
+        self.queued_polls = queued_polls
+        self.running_polls = running_polls
+        self.fail = fail
+        self.bytes_per_row = bytes_per_row
+        self.page_latency = page_latency
+        self.executions: dict[str, dict[str, Any]] = {}
+        self.polls = 0
+        self.pages_served = 0
+        self.stopped: list[str] = []
+        self._lock = threading.Lock()
+
+    def connect(self) -> FakeAthenaAPI:
+        return self
+
+    def ping(self, connection: FakeAthenaAPI) -> bool:
+        return True
+
+    def close(self, connection: FakeAthenaAPI | None = None) -> None:
+        return None
+
+    def start_query_execution(self, QueryString: str, **_: Any) -> dict[str, Any]:  # noqa: N803
+        execution_id = str(uuid.uuid4())
+        lowered = QueryString.lower()
+        if "information_schema.columns" in lowered:
+            columns = (("table_name", "varchar"), ("column_name", "varchar"), ("data_type", "varchar"), ("comment", "varchar"))
+            rows: list[tuple[Any, ...]] = list(_CATALOG)
+        else:
+            columns, rows = _RESULT_COLUMNS, financial_rows(self.row_count)
+        with self._lock:
+            self.executions[execution_id] = {"state": "QUEUED", "polls": 0, "columns": columns, "rows": rows}
+        return {"QueryExecutionId": execution_id}
+
+    def get_query_execution(self, QueryExecutionId: str) -> dict[str, Any]:  # noqa: N803
+        with self._lock:
+            self.polls += 1
+            execution = self.executions[QueryExecutionId]
+            if execution["state"] not in self.TERMINAL:
+                execution["polls"] += 1
+                if execution["polls"] > self.queued_polls + self.running_polls:
+                    execution["state"] = "FAILED" if self.fail else "SUCCEEDED"
+                elif execution["polls"] > self.queued_polls:
+                    execution["state"] = "RUNNING"
+            state = execution["state"]
+            status: dict[str, Any] = {"State": state}
+            if state == "FAILED":
+                status["StateChangeReason"] = "SYNTAX_ERROR: fake failure"
+            statistics = {}
+            if state == "SUCCEEDED":
+                statistics = {
+                    "DataScannedInBytes": len(execution["rows"]) * self.bytes_per_row,
+                    "EngineExecutionTimeInMillis": 10 * execution["polls"],
+                }
+        return {"QueryExecution": {"QueryExecutionId": QueryExecutionId, "Status": status, "Statistics": statistics}}
+
+    def get_query_results(
+        self, QueryExecutionId: str, MaxResults: int = 1000, NextToken: str | None = None  # noqa: N803
+    ) -> dict[str, Any]:
+        execution = self.executions[QueryExecutionId]
+        if execution["state"] != "SUCCEEDED":
+            raise RuntimeError(f"InvalidRequestException: query is {execution['state']}")
+        if self.page_latency:
+            time.sleep(self.page_latency)
+        columns = execution["columns"]
+        offset = int(NextToken or 0)
+        rows = [{"Data": [{"VarCharValue": name} for name, _ in columns]}] if offset == 0 else []
+        chunk = execution["rows"][offset : offset + MaxResults - len(rows)]
+        rows.extend(
+            {"Data": [{} if value is None else {"VarCharValue": str(value)} for value in row]} for row in chunk
+        )
+        offset += len(chunk)
+        with self._lock:
+            self.pages_served += 1
+        page: dict[str, Any] = {
+            "ResultSet": {
+                "Rows": rows,
+                "ResultSetMetadata": {"ColumnInfo": [{"Name": name, "Type": kind} for name, kind in columns]},
+            }
+        }
+        if offset < len(execution["rows"]):
+            page["NextToken"] = str(offset)
+        return page
+
+    def stop_query_execution(self, QueryExecutionId: str) -> dict[str, Any]:  # noqa: N803
+        with self._lock:
+            execution = self.executions[QueryExecutionId]
+            if execution["state"] not in self.TERMINAL:
+                execution["state"] = "CANCELLED"
+            self.stopped.append(QueryExecutionId)
+        return {}
+
+
+class FakeRedis:
+    """In-memory subset of the Redis list and string commands behind ``redis.asyncio``'s pipeline API.
+
+    Values are returned as ``bytes`` like a real client without
+    ``decode_responses``; ``round_trips`` counts executed pipelines.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.lists: dict[str, list[bytes]] = {}
+        self.values: dict[str, bytes] = {}
+        self.expires_at: dict[str, float] = {}
+        self.round_trips = 0
+        self.closed = False
+
+    def pipeline(self, transaction: bool = True) -> FakeRedisPipeline:
+        return FakeRedisPipeline(self)
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+    def _list(self, key: str) -> list[bytes]:
+        deadline = self.expires_at.get(key)
+        if deadline is not None and deadline <= self._clock():
+            self.lists.pop(key, None)
+            self.expires_at.pop(key, None)
+        return self.lists.setdefault(key, [])
+
+    def rpush(self, key: str, value: str) -> int:
+        items = self._list(key)
+        items.append(value.encode("utf-8"))
+        return len(items)
+
+    def lrem(self, key: str, count: int, value: str) -> int:
+        items = self._list(key)
+        encoded = value.encode("utf-8")
+        kept = [item for item in items if item != encoded]
+        removed = len(items) - len(kept)
+        items[:] = kept
+        return removed
+
+    def ltrim(self, key: str, start: int, stop: int) -> bool:
+        items = self._list(key)
+        stop = len(items) if stop == -1 else stop + 1
+        items[:] = items[start:stop] if start >= 0 else items[max(len(items) + start, 0) : stop]
+        return True
+
+    def lrange(self, key: str, start: int, stop: int) -> list[bytes]:
+        items = self._list(key)
+        return list(items[start : None if stop == -1 else stop + 1])
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if key not in self.lists and key not in self.values:
+            return False
+        self.expires_at[key] = self._clock() + seconds
+        return True
+
+    def get(self, key: str) -> bytes | None:
+        deadline = self.expires_at.get(key)
+        if deadline is not None and deadline <= self._clock():
+            self.values.pop(key, None)
+            self.expires_at.pop(key, None)
+        return self.values.get(key)
+
+    def set(self, key: str, value: bytes | str, ex: int | None = None) -> bool:
+        self.values[key] = value.encode("utf-8") if isinstance(value, str) else value
+        if ex is not None:
+            self.expires_at[key] = self._clock() + ex
+        else:
+            self.expires_at.pop(key, None)
+        return True
+
+
+class FakeRedisPipeline:
+    def __init__(self, server: FakeRedis) -> None:
+        self._server = server
+        self._commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    def __getattr__(self, command: str) -> Callable[..., FakeRedisPipeline]:
+        def queue(*args: Any, **kwargs: Any) -> FakeRedisPipeline:
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        self._server.round_trips += 1
+        commands, self._commands = self._commands, []
+        return [getattr(self._server, command)(*args, **kwargs) for command, args, kwargs in commands]
@@ -0,0 +1,67 @@
+"""Streaming latency statistics: exponentially weighted averages and a percentile sketch."""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+
+
+class Ewma:
+    """Exponentially weighted moving average; the first sample initializes it."""
+
+    __slots__ = ("alpha", "value", "count")
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self.value = 0.0
+        self.count = 0
+
+    def update(self, sample: float) -> float:
+        self.value = sample if self.count == 0 else self.alpha * sample + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.value
+
+
+class LatencySketch:
+    """Log-bucketed histogram with bounded relative error.
+
+    Values land in buckets whose bounds grow geometrically, so any quantile is
+    reported within ``relative_accuracy`` of the true value using a few dozen
+    counters. Samples older than roughly two ``window`` spans age out: the
+    sketch keeps the current window and the one before it.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02, window: int = 2048, min_value: float = 0.01) -> None:
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_value = min_value
+        self._window = window
+        self._current: Counter[int] = Counter()
+        self._previous: Counter[int] = Counter()
+        self._current_count = 0
+        self._previous_count = 0
+
+    @property
+    def count(self) -> int:
+        return self._current_count + self._previous_count
+
+    def add(self, value: float) -> None:
+        if self._current_count >= self._window:
+            self._previous, self._previous_count = self._current, self._current_count
+            self._current, self._current_count = Counter(), 0
+        self._current[math.ceil(math.log(max(value, self._min_value)) / self._log_gamma)] += 1
+        self._current_count += 1
+
+    def quantile(self, q: float) -> float | None:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        merged = self._current + self._previous
+        seen = 0
+        for index in sorted(merged):
+            seen += merged[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms.
+                return 2 * self._gamma**index / (self._gamma + 1)
+        return None  # pragma: no cover - rank is always below total
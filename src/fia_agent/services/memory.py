@@ -2,56 +2,526 @@
 
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from dataclasses import dataclass
-from typing import Deque, Dict, Iterable, List
+import logging
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, List, Protocol, Sequence, Tuple
 
+import numpy as np
+import orjson
 
-@dataclass
-class Message:
-    role: str
-    content: str
+from fia_agent.services.router import referenced_tables
+from fia_agent.services.schema_index import tokenize
+from fia_agent.services.sql_validator import SQL_KEYWORDS
 
+if TYPE_CHECKING:
+    from fia_agent.config import Settings
 
-class ShortTermMemory:
-    def __init__(self, max_turns: int = 20) -> None:
-        self._messages: Dict[str, Deque[Message]] = defaultdict(lambda: deque(maxlen=max_turns))
+logger = logging.getLogger(__name__)
 
-    def add(self, session_id: str, role: str, content: str) -> None:
-        self._messages[session_id].append(Message(role=role, content=content))
 
-    def get(self, session_id: str) -> List[str]:
-        return [f"{msg.role}: {msg.content}" for msg in self._messages.get(session_id, [])]
+# Long-term entries are stored as ``question + _SEPARATOR + sql`` (or bare SQL), so
+# backends keep treating them as opaque strings.
+_SEPARATOR = "\x1f"
+_MERSENNE_PRIME = (1 << 31) - 1
 
 
-class LongTermMemory:
-    def __init__(self) -> None:
-        self._success_patterns: Dict[str, Deque[str]] = defaultdict(lambda: deque(maxlen=50))
+def encode_success(sql: str, question: str | None = None) -> str:
+    return f"{question}{_SEPARATOR}{sql}" if question else sql
 
-    def record(self, user_id: str, sql_query: str) -> None:
-        self._success_patterns[user_id].append(sql_query)
 
-    def recall(self, user_id: str) -> Iterable[str]:
-        return list(self._success_patterns.get(user_id, []))
+def decode_success(line: str) -> Tuple[str, str]:
+    """``(question, sql)``; entries recorded without a question have an empty one."""
+
+    question, separator, sql = line.partition(_SEPARATOR)
+    return (question, sql) if separator else ("", line)
+
+
+def render_success(line: str) -> str:
+    question, sql = decode_success(line)
+    return f"-- {question}\n{sql}" if question else sql
+
+
+class RelevanceIndex:
+    """MinHash signatures of past questions and their SQL, for ranking long-term memory.
+
+    Each entry is tokenized and hashed once; signatures are cached by entry
+    text (LRU, ``max_entries``) so both local and remote backends rank
+    incrementally. Relevance is the estimated Jaccard similarity between the
+    entry's tokens and the question's, i.e. the share of equal signature slots.
+    """
+
+    def __init__(self, num_perm: int = 64, max_entries: int = 20_000, seed: int = 7) -> None:
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._max_entries = max_entries
+        self._signatures: OrderedDict[str, np.ndarray | None] = OrderedDict()
+        self.computed = 0
+
+    def _minhash(self, tokens: set[str]) -> np.ndarray | None:
+        if not tokens:
+            return None
+        hashed = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint64)
+        return ((self._a * hashed[np.newaxis, :] + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def signature(self, line: str) -> np.ndarray | None:
+        if line in self._signatures:
+            self._signatures.move_to_end(line)
+            return self._signatures[line]
+        question, sql = decode_success(line)
+        tokens = set(tokenize(question))
+        tokens.update(token for token in tokenize(sql) if token not in SQL_KEYWORDS)
+        signature = self._signatures[line] = self._minhash(tokens)
+        self.computed += 1
+        while len(self._signatures) > self._max_entries:
+            self._signatures.popitem(last=False)
+        return signature
+
+    def rank(self, question: str, lines: Sequence[str], top_k: int, min_score: float = 0.0) -> List[str]:
+        """Up to ``top_k`` of ``lines`` most similar to ``question``, least relevant first.
+
+        Ties (and questions with no usable tokens) favour newer entries.
+        """
+
+        if not lines or top_k <= 0:
+            return []
+        probe = self._minhash(set(tokenize(question)))
+        signatures = [self.signature(line) for line in lines]
+        if probe is None:
+            return list(lines[-top_k:])
+        scores = np.array(
+            [0.0 if signature is None else float(np.mean(signature == probe)) for signature in signatures]
+        )
+        order = np.lexsort((np.arange(len(lines)), scores))[::-1][:top_k]
+        chosen = [int(position) for position in order if scores[position] >= min_score]
+        return [lines[position] for position in reversed(chosen)]
+
+    def stats(self) -> dict[str, int]:
+        return {"indexed": len(self._signatures), "computed": self.computed}
+
+
+class SessionSummary:
+    """Constant-size digest of the turns that scrolled out of a session's raw window.
+
+    Folding a turn is O(1): it bumps the turn count, remembers the last few
+    user questions and the tables the assistant's SQL touched. The rendered
+    line is cached until the next fold.
+    """
+
+    __slots__ = ("turns", "questions", "tables", "_rendered")
+
+    MAX_QUESTIONS = 3
+    MAX_TABLES = 8
+    MAX_QUESTION_CHARS = 160
+
+    def __init__(self, turns: int = 0, questions: Sequence[str] = (), tables: Sequence[str] = ()) -> None:
+        self.turns = turns
+        self.questions: Deque[str] = deque(questions, maxlen=self.MAX_QUESTIONS)
+        self.tables: dict[str, None] = dict.fromkeys(tables)
+        self._rendered: str | None = None
+
+    def fold(self, line: str) -> None:
+        role, _, content = line.partition(": ")
+        self.turns += 1
+        if role == "user":
+            self.questions.append(content[: self.MAX_QUESTION_CHARS])
+        else:
+            for table in sorted(referenced_tables(content)):
+                self.tables.pop(table, None)
+                self.tables[table] = None
+            while len(self.tables) > self.MAX_TABLES:
+                del self.tables[next(iter(self.tables))]
+        self._rendered = None
+
+    def render(self) -> str | None:
+        if not self.turns:
+            return None
+        if self._rendered is None:
+            parts = [f"{self.turns} earlier turn{'s' if self.turns != 1 else ''}"]
+            if self.questions:
+                parts.append("asked: " + "; ".join(self.questions))
+            if self.tables:
+                parts.append("tables: " + ", ".join(self.tables))
+            self._rendered = "summary: " + " | ".join(parts)
+        return self._rendered
+
+    def to_json(self) -> bytes:
+        return orjson.dumps({"turns": self.turns, "questions": list(self.questions), "tables": list(self.tables)})
+
+    @classmethod
+    def from_json(cls, payload: bytes | str | None) -> SessionSummary:
+        if not payload:
+            return cls()
+        data = orjson.loads(payload)
+        return cls(data.get("turns", 0), data.get("questions", ()), data.get("tables", ()))
+
+
+class MemoryBackend(Protocol):
+    """Storage for session turns and per-user successful SQL.
+
+    ``recall`` returns both lists for a request in one call so remote backends
+    can serve it with a single round trip.
+    """
+
+    async def append_turn(self, session_id: str, line: str) -> None: ...
+
+    async def append_success(self, user_id: str, sql: str) -> None: ...
+
+    async def recall(self, session_id: str | None, user_id: str) -> Tuple[List[str], List[str]]: ...
+
+    async def close(self) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class _Entries:
+    """Bounded deque of pre-rendered lines with a running size, for byte accounting."""
+
+    __slots__ = ("items", "size", "touched")
+
+    def __init__(self, maxlen: int) -> None:
+        self.items: Deque[str] = deque(maxlen=maxlen)
+        self.size = 0
+        self.touched = 0.0
+
+    def push(self, line: str, unique: bool = False) -> int:
+        """Append ``line`` and return the change in size."""
+
+        before = self.size
+        if unique and line in self.items:
+            self.items.remove(line)
+            self.size -= len(line)
+        if len(self.items) == self.items.maxlen:
+            self.size -= len(self.items[0])
+        self.items.append(line)
+        self.size += len(line)
+        return self.size - before
+
+
+class _Session(_Entries):
+    """Last ``maxlen`` raw turns plus a rolling summary of everything older."""
+
+    __slots__ = ("summary", "view")
+
+    def __init__(self, maxlen: int) -> None:
+        super().__init__(maxlen)
+        self.summary = SessionSummary()
+        self.view: List[str] | None = None
+
+    def push(self, line: str, unique: bool = False) -> int:
+        scrolled = self.items[0] if len(self.items) == self.items.maxlen else None
+        delta = super().push(line, unique)
+        if scrolled is not None:
+            before = len(self.summary.render() or "")
+            self.summary.fold(scrolled)
+            grown = len(self.summary.render() or "") - before
+            self.size += grown
+            delta += grown
+        self.view = None
+        return delta
+
+    def recall(self) -> List[str]:
+        # Rebuilt only after an append; unchanged sessions hand back the same list.
+        if self.view is None:
+            summary = self.summary.render()
+            self.view = [summary, *self.items] if summary else list(self.items)
+        return self.view
+
+
+class InProcessMemoryBackend:
+    """Per-process memory with LRU + idle-TTL eviction and a global size cap.
+
+    Sessions and users each live in an ``OrderedDict`` kept in last-access
+    order, so expiry and LRU eviction only ever look at the front. Turns are
+    stored as the rendered ``"role: content"`` line (one string per turn) and a
+    user's repeated SQL is kept once, at its most recent position. Sizes are
+    counted in characters as an approximation of bytes.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        max_patterns: int = 50,
+        max_sessions: int = 10_000,
+        max_users: int = 10_000,
+        session_ttl: float = 3600.0,
+        user_ttl: float = 30 * 86400.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # A zero-length deque would drop every append; keep at least the latest entry.
+        self._max_turns = max(max_turns, 1)
+        self._max_patterns = max(max_patterns, 1)
+        self._max_sessions = max_sessions
+        self._max_users = max_users
+        self._session_ttl = session_ttl
+        self._user_ttl = user_ttl
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._users: OrderedDict[str, _Entries] = OrderedDict()
+        self._bytes = 0
+        self.expired = 0
+        self.evicted = 0
+
+    async def append_turn(self, session_id: str, line: str) -> None:
+        self._append(self._sessions, session_id, line, self._max_turns, unique=False, factory=_Session)
+
+    async def append_success(self, user_id: str, sql: str) -> None:
+        self._append(self._users, user_id, sql, self._max_patterns, unique=True, factory=_Entries)
+
+    async def recall(self, session_id: str | None, user_id: str) -> Tuple[List[str], List[str]]:
+        now = self._clock()
+        short = self._read(self._sessions, session_id, self._session_ttl, now) if session_id else []
+        return short, self._read(self._users, user_id, self._user_ttl, now)
+
+    async def close(self) -> None:
+        self._sessions.clear()
+        self._users.clear()
+        self._bytes = 0
+
+    def _append(
+        self,
+        table: OrderedDict[str, Any],
+        key: str,
+        line: str,
+        maxlen: int,
+        unique: bool,
+        factory: Callable[[int], _Entries],
+    ) -> None:
+        now = self._clock()
+        entries = table.get(key)
+        if entries is None:
+            entries = table[key] = factory(maxlen)
+        else:
+            table.move_to_end(key)
+        entries.touched = now
+        self._bytes += entries.push(line, unique)
+        self._evict(now)
+
+    def _read(self, table: OrderedDict[str, Any], key: str, ttl: float, now: float) -> List[str]:
+        entries = table.get(key)
+        if entries is None:
+            return []
+        if now - entries.touched > ttl:
+            self._drop(table, key)
+            self.expired += 1
+            return []
+        entries.touched = now
+        table.move_to_end(key)
+        return entries.recall() if isinstance(entries, _Session) else list(entries.items)
+
+    def _evict(self, now: float) -> None:
+        for table, ttl, limit in (
+            (self._sessions, self._session_ttl, self._max_sessions),
+            (self._users, self._user_ttl, self._max_users),
+        ):
+            while table and now - next(iter(table.values())).touched > ttl:
+                self._drop(table, next(iter(table)))
+                self.expired += 1
+            while len(table) > limit:
+                self._drop(table, next(iter(table)))
+                self.evicted += 1
+        # Over the global cap: shed the least recently used sessions first; they are cheapest to lose.
+        while self._bytes > self._max_bytes and (self._sessions or self._users):
+            table = self._sessions if self._sessions else self._users
+            self._drop(table, next(iter(table)))
+            self.evicted += 1
+
+    def _drop(self, table: OrderedDict[str, Any], key: str) -> None:
+        self._bytes -= table.pop(key).size
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "users": len(self._users),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class RedisMemoryBackend:
+    """Memory shared across workers through a Redis-protocol server.
+
+    Each session and user is a capped list with a TTL refreshed on write;
+    a session's rolling :class:`SessionSummary` lives in a companion key.
+    :meth:`recall` is a single pipeline, so a request costs one round trip to
+    read its context. Appending a turn that pushes an older one out of the
+    window takes a second round trip to store the re-folded summary; with two
+    workers writing one session at once the last summary write wins. A global memory cap is the
+    server's job (``maxmemory`` with a ``volatile-lru`` policy).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        prefix: str = "fia:memory",
+        max_turns: int = 6,
+        max_patterns: int = 50,
+        session_ttl: float = 3600.0,
+        user_ttl: float = 30 * 86400.0,
+    ) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._max_turns = max(max_turns, 1)
+        self._max_patterns = max(max_patterns, 1)
+        self._session_ttl = max(int(session_ttl), 1)
+        self._user_ttl = max(int(user_ttl), 1)
+        self.round_trips = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> RedisMemoryBackend:
+        import redis.asyncio as redis  # imported lazily; only needed when this backend is configured
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    async def append_turn(self, session_id: str, line: str) -> None:
+        key = f"{self._prefix}:session:{session_id}"
+        summary_key = f"{key}:summary"
+        pipe = self._client.pipeline(transaction=False)
+        pipe.rpush(key, line)
+        pipe.lrange(key, 0, -(self._max_turns + 1))
+        pipe.ltrim(key, -self._max_turns, -1)
+        pipe.expire(key, self._session_ttl)
+        pipe.get(summary_key)
+        pipe.expire(summary_key, self._session_ttl)
+        results = await self._execute(pipe)
+        if not results or not results[1]:
+            return
+        summary = SessionSummary.from_json(results[4])
+        for scrolled in results[1]:
+            summary.fold(_decode(scrolled))
+        pipe = self._client.pipeline(transaction=False)
+        pipe.set(summary_key, summary.to_json(), ex=self._session_ttl)
+        await self._execute(pipe)
+
+    async def append_success(self, user_id: str, sql: str) -> None:
+        key = f"{self._prefix}:user:{user_id}"
+        pipe = self._client.pipeline(transaction=False)
+        pipe.lrem(key, 0, sql)
+        pipe.rpush(key, sql)
+        pipe.ltrim(key, -self._max_patterns, -1)
+        pipe.expire(key, self._user_ttl)
+        await self._execute(pipe)
+
+    async def recall(self, session_id: str | None, user_id: str) -> Tuple[List[str], List[str]]:
+        pipe = self._client.pipeline(transaction=False)
+        if session_id:
+            pipe.get(f"{self._prefix}:session:{session_id}:summary")
+            pipe.lrange(f"{self._prefix}:session:{session_id}", 0, -1)
+        pipe.lrange(f"{self._prefix}:user:{user_id}", 0, -1)
+        results = await self._execute(pipe)
+        if results is None:
+            return [], []
+        long = [_decode(item) for item in results[-1]]
+        if not session_id:
+            return [], long
+        summary = SessionSummary.from_json(results[0]).render()
+        short = [_decode(item) for item in results[1]]
+        return ([summary, *short] if summary else short), long
+
+    async def _execute(self, pipe: Any) -> list[Any] | None:
+        self.round_trips += 1
+        try:
+            return await pipe.execute()
+        except Exception:
+            # Memory only enriches prompts; an unreachable server must not fail the query.
+            self.errors += 1
+            logger.warning("Memory backend request failed", exc_info=True)
+            return None
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "redis", "round_trips": self.round_trips, "errors": self.errors}
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def memory_from_settings(settings: Settings) -> MemoryManager:
+    return MemoryManager(
+        memory_backend_from_settings(settings),
+        recall_top_k=settings.memory_recall_top_k,
+        recall_min_score=settings.memory_recall_min_score,
+    )
+
+
+def memory_backend_from_settings(settings: Settings) -> MemoryBackend:
+    if settings.memory_backend == "redis":
+        return RedisMemoryBackend.from_url(
+            settings.redis_url,
+            max_turns=settings.memory_max_turns,
+            max_patterns=settings.memory_max_patterns,
+            session_ttl=settings.memory_session_ttl_seconds,
+            user_ttl=settings.memory_user_ttl_seconds,
+        )
+    return InProcessMemoryBackend(
+        max_turns=settings.memory_max_turns,
+        max_patterns=settings.memory_max_patterns,
+        max_sessions=settings.memory_max_sessions,
+        max_users=settings.memory_max_users,
+        session_ttl=settings.memory_session_ttl_seconds,
+        user_ttl=settings.memory_user_ttl_seconds,
+        max_bytes=settings.memory_max_bytes,
+    )
 
 
 class MemoryManager:
-    def __init__(self) -> None:
-        self.short_term = ShortTermMemory()
-        self.long_term = LongTermMemory()
+    def __init__(
+        self,
+        backend: MemoryBackend | None = None,
+        recall_top_k: int = 5,
+        recall_min_score: float = 0.05,
+        index: RelevanceIndex | None = None,
+    ) -> None:
+        self.backend: MemoryBackend = backend or InProcessMemoryBackend()
+        self._recall_top_k = recall_top_k
+        self._recall_min_score = recall_min_score
+        self._index = index or RelevanceIndex()
 
-    def capture_turn(self, session_id: str, role: str, message: str) -> None:
+    async def capture_turn(self, session_id: str, role: str, message: str) -> None:
         if not session_id:
             return
-        self.short_term.add(session_id, role, message)
+        await self.backend.append_turn(session_id, f"{role}: {message}")
 
-    def recall_short_term(self, session_id: str) -> List[str]:
+    async def recall(
+        self, session_id: str | None, user_id: str, question: str | None = None
+    ) -> Tuple[List[str], List[str]]:
+        """Short-term (session) and long-term (user) context in one backend call.
+
+        With a ``question``, long-term memory is cut to the ``recall_top_k``
+        most relevant past entries, ordered least to most relevant.
+        """
+
+        short, lines = await self.backend.recall(session_id or None, user_id)
+        if question is not None:
+            lines = self._index.rank(question, lines, self._recall_top_k, self._recall_min_score)
+        return short, [render_success(line) for line in lines]
+
+    async def recall_short_term(self, session_id: str) -> List[str]:
         if not session_id:
             return []
-        return self.short_term.get(session_id)
+        short, _ = await self.backend.recall(session_id, "")
+        return short
+
+    async def record_success(self, user_id: str, sql: str, question: str | None = None) -> None:
+        await self.backend.append_success(user_id, encode_success(sql, question))
+
+    async def recall_long_term(self, user_id: str, question: str | None = None) -> List[str]:
+        _, long = await self.recall(None, user_id, question)
+        return long
 
-    def record_success(self, user_id: str, sql: str) -> None:
-        self.long_term.record(user_id, sql)
+    async def close(self) -> None:
+        await self.backend.close()
 
-    def recall_long_term(self, user_id: str) -> Iterable[str]:
-        return self.long_term.recall(user_id)
+    def stats(self) -> dict[str, Any]:
+        return {**self.backend.stats(), **self._index.stats()}
@@ -0,0 +1,164 @@
+"""Per-stage latency sketches and Prometheus text exposition for ``/metrics``."""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Any, Callable, Mapping, Sequence
+
+from fia_agent.services.latency import LatencySketch
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class _Series:
+    __slots__ = ("sketch", "count", "total_ms", "over_target")
+
+    def __init__(self, sketch: LatencySketch) -> None:
+        self.sketch = sketch
+        self.count = 0
+        self.total_ms = 0.0
+        self.over_target = 0
+
+
+class Span:
+    """Times one stage; ``source`` may be updated inside the block once the warehouse is known."""
+
+    __slots__ = ("_metrics", "stage", "source", "role", "_start")
+
+    def __init__(self, metrics: StageMetrics, stage: str, source: str, role: str) -> None:
+        self._metrics = metrics
+        self.stage = stage
+        self.source = source
+        self.role = role
+        self._start = 0.0
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        # Failed stages are timed too; a slow timeout is exactly what the percentiles should show.
+        self._metrics.observe(self.stage, (time.perf_counter() - self._start) * 1000, self.source, self.role)
+
+
+class StageMetrics:
+    """Streaming latency percentiles per (stage, source, role) plus gauges pulled from ``stats()`` callables.
+
+    Each series is a :class:`LatencySketch`, so recording a sample is a couple
+    of float operations and a counter increment, and memory stays bounded by
+    the number of label combinations rather than by traffic. Quantiles cover
+    the sketch's sliding window; ``_count``/``_sum`` are cumulative, as
+    Prometheus summaries expect. Samples above ``latency_target_ms`` are
+    counted per series so the end-to-end target can be alerted on directly.
+    """
+
+    def __init__(
+        self,
+        latency_target_ms: float = 5000.0,
+        quantiles: Sequence[float] = (0.5, 0.9, 0.95, 0.99),
+        relative_accuracy: float = 0.02,
+        window: int = 2048,
+    ) -> None:
+        self._target_ms = latency_target_ms
+        self._quantiles = tuple(quantiles)
+        self._accuracy = relative_accuracy
+        self._window = window
+        self._series: dict[tuple[str, str, str], _Series] = {}
+        self._collectors: list[tuple[str, Callable[[], Mapping[str, Any]], str | None]] = []
+
+    def span(self, stage: str, source: str = "none", role: str = "none") -> Span:
+        return Span(self, stage, source, role)
+
+    def observe(self, stage: str, duration_ms: float, source: str = "none", role: str = "none") -> None:
+        key = (stage, source, role)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(LatencySketch(self._accuracy, self._window))
+        series.sketch.add(duration_ms)
+        series.count += 1
+        series.total_ms += duration_ms
+        if duration_ms > self._target_ms:
+            series.over_target += 1
+
+    def register(self, component: str, collector: Callable[[], Mapping[str, Any]], label: str | None = None) -> None:
+        """Export the numeric fields of ``collector()`` as ``fia_<component>_<field>`` gauges.
+
+        With ``label`` the collector is keyed by that label first (e.g. per-source
+        pool stats); otherwise nested mappings become a ``key`` label.
+        """
+
+        self._collectors.append((component, collector, label))
+
+    def quantile(self, stage: str, q: float, source: str = "none", role: str = "none") -> float | None:
+        series = self._series.get((stage, source, role))
+        return series.sketch.quantile(q) if series is not None else None
+
+    def render(self) -> str:
+        lines = [
+            "# HELP fia_stage_duration_ms Wall time per pipeline stage in milliseconds.",
+            "# TYPE fia_stage_duration_ms summary",
+        ]
+        over_target: list[str] = []
+        for (stage, source, role), series in sorted(self._series.items()):
+            labels = {"stage": stage, "source": source, "role": role}
+            for q in self._quantiles:
+                value = series.sketch.quantile(q)
+                if value is not None:
+                    lines.append(_sample("fia_stage_duration_ms", {**labels, "quantile": str(q)}, value))
+            lines.append(_sample("fia_stage_duration_ms_sum", labels, series.total_ms))
+            lines.append(_sample("fia_stage_duration_ms_count", labels, series.count))
+            over_target.append(_sample("fia_stage_over_target_total", labels, series.over_target))
+        lines += [
+            "# HELP fia_stage_over_target_total Stage samples slower than the latency target.",
+            "# TYPE fia_stage_over_target_total counter",
+            *over_target,
+            "# TYPE fia_latency_target_ms gauge",
+            _sample("fia_latency_target_ms", {}, self._target_ms),
+        ]
+        for component, collector, label in self._collectors:
+            lines += _gauges(component, collector(), label)
+        return "\n".join(lines) + "\n"
+
+
+def _gauges(component: str, values: Mapping[str, Any], label: str | None) -> list[str]:
+    samples: dict[str, list[str]] = {}
+
+    def add(field: str, labels: dict[str, str], value: Any) -> None:
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            name = _INVALID_NAME.sub("_", f"fia_{component}_{field}")
+            samples.setdefault(name, []).append(_sample(name, labels, value))
+
+    for key, value in values.items():
+        if label is not None and isinstance(value, Mapping):
+            for field, inner in value.items():
+                add(field, {label: str(key)}, inner)
+        elif isinstance(value, Mapping):
+            for inner_key, inner in value.items():
+                add(key, {"key": str(inner_key)}, inner)
+        else:
+            add(key, {}, value)
+    lines: list[str] = []
+    for name, rows in samples.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines += rows
+    return lines
+
+
+def _sample(name: str, labels: Mapping[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {_number(value)}"
+    rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {_number(value)}"
+
+
+def _number(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(round(float(value), 3))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
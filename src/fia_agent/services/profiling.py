@@ -0,0 +1,229 @@
+"""Opt-in sampling profiler for live requests, kept as collapsed stacks in memory."""
+
+from __future__ import annotations
+
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any, Awaitable, Callable, Deque, MutableMapping
+
+PROFILE_HEADER = b"x-debug-profile"
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+@dataclass
+class Profile:
+    """One captured request: sample counts per collapsed stack (``root;...;leaf``)."""
+
+    id: int
+    path: str
+    trigger: str
+    started_at: datetime
+    interval_ms: float
+    duration_ms: float = 0.0
+    status_code: int | None = None
+    stacks: Counter[str] = field(default_factory=Counter, repr=False)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, readable by flamegraph.pl and speedscope."""
+
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 5) -> dict[str, Any]:
+        leaves: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "id": self.id,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "status_code": self.status_code,
+            "samples": self.samples,
+            "interval_ms": self.interval_ms,
+            "top_frames": [{"frame": frame, "samples": count} for frame, count in leaves.most_common(top)],
+        }
+
+
+class _Sampler(threading.Thread):
+    """Snapshots one thread's Python stack every ``interval`` seconds until stopped."""
+
+    def __init__(self, target: int, interval: float, name: str, labels: dict[CodeType, str]) -> None:
+        super().__init__(name=name, daemon=True)
+        self._target = target
+        self._interval = interval
+        self._labels = labels
+        self._stopped = threading.Event()
+        self._stacks: Counter[str] = Counter()
+
+    def run(self) -> None:
+        stacks = self._stacks
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                stacks[self._collapse(frame)] += 1
+
+    def stop(self) -> Counter[str]:
+        """Signal the thread to exit and return the samples taken so far.
+
+        Does not join: this runs on the event loop, and the thread may be mid
+        snapshot. It exits within one interval; anything it records after this
+        call stays in its private counter. Copying a dict is a single C call,
+        so the copy is consistent even if the thread writes concurrently.
+        """
+
+        self._stopped.set()
+        return Counter(self._stacks)
+
+    def _collapse(self, frame: FrameType | None) -> str:
+        names: list[str] = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            names.append(label)
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+
+class RequestProfiler:
+    """Decide which requests to profile and keep the last ``max_captures`` results.
+
+    A request is profiled when it carries ``X-Debug-Profile`` or wins the
+    ``sample_rate`` draw. The sampler watches the event-loop thread, so a
+    capture shows everything the loop ran while the request was in flight:
+    the conductor, LangGraph's scheduling, and response serialization after
+    the handler returns. Work pushed to worker threads (warehouse drivers,
+    SQLite) shows up as the awaiting frame. At most ``max_concurrent``
+    captures run at once; further candidates are skipped, not queued.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        interval_ms: float = 5.0,
+        max_captures: int = 20,
+        max_concurrent: int = 1,
+    ) -> None:
+        self._sample_rate = sample_rate
+        self._interval_ms = interval_ms
+        self._captures: Deque[Profile] = deque(maxlen=max_captures)
+        self._max_concurrent = max_concurrent
+        self._active = 0
+        self._ids = itertools.count(1)
+        self._labels: dict[CodeType, str] = {}
+        self.skipped = 0
+
+    def should_profile(self, forced: bool) -> str | None:
+        """The trigger (``"header"`` or ``"sampled"``) if this request should be profiled, else ``None``."""
+
+        if forced:
+            trigger = "header"
+        elif self._sample_rate > 0 and random.random() < self._sample_rate:
+            trigger = "sampled"
+        else:
+            return None
+        if self._active >= self._max_concurrent:
+            self.skipped += 1
+            return None
+        return trigger
+
+    def begin(self, path: str, trigger: str) -> tuple[Profile, _Sampler]:
+        self._active += 1
+        profile = Profile(
+            id=next(self._ids),
+            path=path,
+            trigger=trigger,
+            started_at=datetime.now(timezone.utc),
+            interval_ms=self._interval_ms,
+        )
+        sampler = _Sampler(threading.get_ident(), self._interval_ms / 1000, f"profile-{profile.id}", self._labels)
+        sampler.start()
+        return profile, sampler
+
+    def end(self, profile: Profile, sampler: _Sampler, started: float) -> None:
+        profile.stacks = sampler.stop()
+        profile.duration_ms = (time.perf_counter() - started) * 1000
+        self._active -= 1
+        self._captures.appendleft(profile)
+
+    def captures(self) -> list[Profile]:
+        return list(self._captures)
+
+    def get(self, profile_id: int) -> Profile | None:
+        return next((profile for profile in self._captures if profile.id == profile_id), None)
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "sample_rate": self._sample_rate,
+            "interval_ms": self._interval_ms,
+            "active": self._active,
+            "captures": len(self._captures),
+            "skipped": self.skipped,
+        }
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests under ``path_prefix`` until the body is fully sent.
+
+    Profiled responses carry ``X-Profile-Id`` so the caller can fetch the
+    capture from ``/debug/profiles/{id}``. Requests that are not selected pay
+    one header scan and, with a non-zero sample rate, one random draw.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler, path_prefix: str = "/query") -> None:
+        self.app = app
+        self._profiler = profiler
+        self._prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self._prefix):
+            await self.app(scope, receive, send)
+            return
+        forced = any(name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope["headers"])
+        trigger = self._profiler.should_profile(forced)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        profile, sampler = self._profiler.begin(scope["path"], trigger)
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if not finished:
+                finished = True
+                self._profiler.end(profile, sampler, started)
+
+        async def send_profiled(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-profile-id", str(profile.id).encode())]
+            await send(message)
+            # Streaming responses keep working after the endpoint returns; stop on the last chunk.
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            finish()
@@ -0,0 +1,206 @@
+"""Schema pruning and token-budgeted prompt assembly for SQL generation."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Sequence
+
+from fia_agent.models import TableDefinition
+from fia_agent.services.latency import Ewma
+from fia_agent.services.schema_discovery import schema_fingerprint
+from fia_agent.services.schema_index import SchemaIndex, tokenize
+
+# Rough BPE ratio for English and SQL identifiers; close enough for budgeting
+# without pulling a model-specific tokenizer into the request path.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class PromptContext:
+    """What the translator sees for one request: pruned tables, their rendering, and trimmed history.
+
+    ``index`` is the full snapshot's index, shared by every request against it;
+    the translator ranks with it instead of re-indexing the pruned ``tables``.
+    """
+
+    tables: list[TableDefinition]
+    schema_text: str
+    history: list[str]
+    schema_tokens: int
+    history_tokens: int
+    question_tokens: int
+    dropped_tables: int = 0
+    dropped_history: int = 0
+    index: SchemaIndex | None = field(default=None, repr=False)
+
+    @property
+    def tokens(self) -> int:
+        return self.schema_tokens + self.history_tokens + self.question_tokens
+
+
+@dataclass
+class _RenderedTable:
+    header: str
+    header_tokens: int
+    columns: list[str]
+    column_tokens: list[int]
+    column_terms: list[frozenset[str]] = field(repr=False)
+
+
+class _RenderedSchema:
+    """Per-snapshot index and pre-rendered column lines; built once per fingerprint."""
+
+    def __init__(self, schema: list[TableDefinition]) -> None:
+        self.index = SchemaIndex(schema)
+        self.by_name: dict[str, tuple[TableDefinition, _RenderedTable]] = {}
+        for table in schema:
+            header = f"TABLE {table.name}" + (f" -- {table.description}" if table.description else "")
+            columns = [
+                f"  {column.name} {column.type}" + (f" -- {column.description}" if column.description else "")
+                for column in table.columns
+            ]
+            rendered = _RenderedTable(
+                header=header,
+                header_tokens=estimate_tokens(header),
+                columns=columns,
+                column_tokens=[estimate_tokens(line) for line in columns],
+                column_terms=[frozenset(tokenize(column.name)) for column in table.columns],
+            )
+            self.by_name.setdefault(table.name, (table, rendered))
+
+
+class PromptBuilder:
+    """Select the tables and columns relevant to a question and fit them, plus history, into a token budget.
+
+    Tables come from :class:`SchemaIndex` ranking (top ``max_tables``); within a
+    table, columns named in the question are kept first, then the rest in schema
+    order up to ``max_columns``. History gets at most ``history_share`` of the
+    budget: session turns newest first, then recalled memory newest first. The
+    schema gets whatever the question and history leave, and the best-ranked
+    table is always included, trimmed to its matching columns if needed.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        max_tables: int = 5,
+        max_columns: int = 24,
+        history_share: float = 0.25,
+        max_snapshots: int = 4,
+    ) -> None:
+        self._budget = token_budget
+        self._max_tables = max_tables
+        self._max_columns = max_columns
+        self._history_share = history_share
+        self._max_snapshots = max_snapshots
+        self._rendered: OrderedDict[str, _RenderedSchema] = OrderedDict()
+        self.builds = 0
+        self.render_misses = 0
+        self.over_budget = 0
+        self.max_tokens = 0
+        self._avg_tokens = Ewma(alpha=0.1)
+
+    def build(
+        self,
+        question: str,
+        schema: list[TableDefinition],
+        session: Sequence[str] = (),
+        recalled: Sequence[str] = (),
+        fingerprint: str | None = None,
+    ) -> PromptContext:
+        rendered = self._rendered_for(schema, fingerprint)
+        question_tokens = estimate_tokens(question)
+        history, history_tokens, dropped_history = self._fit_history(session, recalled)
+        remaining = self._budget - question_tokens - history_tokens
+
+        terms = frozenset(tokenize(question))
+        ranked = [name for name, _ in rendered.index.rank(question, limit=self._max_tables)]
+        if not ranked and schema:
+            ranked = [schema[0].name]
+        tables: list[TableDefinition] = []
+        fragments: list[str] = []
+        schema_tokens = 0
+        for name in ranked:
+            table, table_render = rendered.by_name[name]
+            positions = self._column_order(table_render, terms)
+            cost = table_render.header_tokens + sum(table_render.column_tokens[i] for i in positions)
+            if cost > remaining and tables:
+                break
+            if cost > remaining:
+                # Always ship the best table; fall back to the columns the question names.
+                positions = [i for i in positions if table_render.column_terms[i] & terms] or positions[:1]
+                cost = table_render.header_tokens + sum(table_render.column_tokens[i] for i in positions)
+            tables.append(table.model_copy(update={"columns": [table.columns[i] for i in positions]}))
+            fragments.append("\n".join([table_render.header, *(table_render.columns[i] for i in positions)]))
+            schema_tokens += cost
+            remaining -= cost
+
+        context = PromptContext(
+            tables=tables,
+            schema_text="\n\n".join(fragments),
+            history=history,
+            schema_tokens=schema_tokens,
+            history_tokens=history_tokens,
+            question_tokens=question_tokens,
+            dropped_tables=len(ranked) - len(tables),
+            dropped_history=dropped_history,
+            index=rendered.index,
+        )
+        self._observe(context)
+        return context
+
+    def _rendered_for(self, schema: list[TableDefinition], fingerprint: str | None) -> _RenderedSchema:
+        key = fingerprint or schema_fingerprint(schema)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            self.render_misses += 1
+            rendered = self._rendered[key] = _RenderedSchema(schema)
+            while len(self._rendered) > self._max_snapshots:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(key)
+        return rendered
+
+    def _column_order(self, table: _RenderedTable, terms: frozenset[str]) -> list[int]:
+        matched = [i for i, column_terms in enumerate(table.column_terms) if column_terms & terms]
+        rest = [i for i, column_terms in enumerate(table.column_terms) if not column_terms & terms]
+        # Keep schema order in the prompt; relevance only decides what survives the cut.
+        return sorted((matched + rest)[: self._max_columns])
+
+    def _fit_history(self, session: Sequence[str], recalled: Sequence[str]) -> tuple[list[str], int, int]:
+        cap = int(self._budget * self._history_share)
+        used = 0
+        kept: list[list[str]] = [[], []]
+        for bucket, items in enumerate((session, recalled)):
+            for item in reversed(items):
+                cost = estimate_tokens(item)
+                if used + cost > cap:
+                    break
+                kept[bucket].append(item)
+                used += cost
+        history = [*reversed(kept[0]), *reversed(kept[1])]
+        return history, used, len(session) + len(recalled) - len(history)
+
+    def _observe(self, context: PromptContext) -> None:
+        self.builds += 1
+        tokens = context.tokens
+        if tokens > self._budget:
+            self.over_budget += 1
+        self.max_tokens = max(self.max_tokens, tokens)
+        self._avg_tokens.update(float(tokens))
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "token_budget": self._budget,
+            "builds": self.builds,
+            "avg_tokens": round(self._avg_tokens.value, 1),
+            "max_tokens": self.max_tokens,
+            "over_budget": self.over_budget,
+            "cached_snapshots": len(self._rendered),
+            "render_misses": self.render_misses,
+        }
@@ -2,41 +2,267 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import random
 import time
-from typing import Literal
+from typing import Any, AsyncIterator, Literal, Mapping
 
-from tenacity import AsyncRetrying, stop_after_attempt, wait_fixed
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 
+from fia_agent.columnar import ColumnarRows
 from fia_agent.models import QueryExecutionResult
-from fia_agent.services.athena_client import AthenaClient
+from fia_agent.services.athena_client import AthenaClient, AthenaTimeoutError
+from fia_agent.services.circuit_breaker import CircuitBreaker, is_transient
+from fia_agent.services.result_cache import QueryResultCache
+from fia_agent.services.router import SourceRouter
+from fia_agent.services.scheduler import AdmissionScheduler, Priority
 from fia_agent.services.snowflake_client import SnowflakeClient
 
 
 class QueryExecutor:
-    def __init__(self, snowflake: SnowflakeClient | None, athena: AthenaClient | None) -> None:
+    def __init__(
+        self,
+        snowflake: SnowflakeClient | None,
+        athena: AthenaClient | None,
+        cache: QueryResultCache | None = None,
+        scheduler: AdmissionScheduler | None = None,
+        router: SourceRouter | None = None,
+        breakers: Mapping[str, CircuitBreaker] | None = None,
+        max_attempts: int = 3,
+    ) -> None:
         self._snowflake = snowflake
         self._athena = athena
+        self._cache = cache
+        self._scheduler = scheduler
+        self._router = router
+        self._breakers = dict(breakers) if breakers is not None else {}
+        for source in ("snowflake", "athena"):
+            self._breakers.setdefault(source, CircuitBreaker(source))
+        self._max_attempts = max_attempts
 
-    async def execute(self, sql: str, preferred: Literal["snowflake", "athena", "auto"], role: str) -> QueryExecutionResult:
+    async def execute(
+        self,
+        sql: str,
+        preferred: Literal["snowflake", "athena", "auto"],
+        role: str,
+        user_id: str | None = None,
+        priority: Priority = "interactive",
+    ) -> QueryExecutionResult:
         start = time.perf_counter()
-        for attempt in AsyncRetrying(wait=wait_fixed(0.2), stop=stop_after_attempt(2)):
+        load = functools.partial(self._execute_admitted, sql, preferred, role, user_id or role, priority)
+        if self._cache is None:
+            result = await load()
+        else:
+            # Admission happens inside the loader: cache hits and coalesced callers never take a slot.
+            result = await self._cache.get_or_load(self._cache.make_key(sql, preferred, role), load)
+        result.latency_ms = int((time.perf_counter() - start) * 1000)
+        return result
+
+    async def _execute_admitted(
+        self,
+        sql: str,
+        preferred: Literal["snowflake", "athena", "auto"],
+        role: str,
+        user_id: str,
+        priority: Priority,
+    ) -> QueryExecutionResult:
+        if self._scheduler is None:
+            return await self._execute_with_retry(sql, preferred)
+        async with self._scheduler.slot(user_id, role, priority):
+            return await self._execute_with_retry(sql, preferred)
+
+    async def _execute_with_retry(
+        self, sql: str, preferred: Literal["snowflake", "athena", "auto"]
+    ) -> QueryExecutionResult:
+        retrying = AsyncRetrying(
+            retry=retry_if_exception(_retryable),
+            wait=wait_random_exponential(multiplier=0.1, max=2.0),
+            stop=stop_after_attempt(self._max_attempts),
+            reraise=True,
+        )
+        async for attempt in retrying:
             with attempt:
-                result = await self._execute_once(sql, preferred)
-                result.latency_ms = int((time.perf_counter() - start) * 1000)
-                return result
+                return await self._execute_once(sql, preferred)
         return QueryExecutionResult(rows=[], row_count=0, latency_ms=0)
 
+    async def stream(
+        self,
+        sql: str,
+        preferred: Literal["snowflake", "athena", "auto"],
+        batch_size: int = 500,
+        stats: dict[str, Any] | None = None,
+        role: str = "",
+        user_id: str | None = None,
+        priority: Priority = "interactive",
+    ) -> AsyncIterator[ColumnarRows]:
+        """Yield row batches as the source produces them; bypasses the result cache.
+
+        Sources that report execution statistics (e.g. bytes scanned) write them into
+        ``stats``. With a scheduler the execution slot is held until the stream ends.
+        """
+
+        if self._scheduler is None:
+            async for batch in self._stream_source(sql, preferred, batch_size, stats):
+                yield batch
+            return
+        async with self._scheduler.slot(user_id or role, role, priority):
+            async for batch in self._stream_source(sql, preferred, batch_size, stats):
+                yield batch
+
+    async def _stream_source(
+        self,
+        sql: str,
+        preferred: Literal["snowflake", "athena", "auto"],
+        batch_size: int,
+        stats: dict[str, Any] | None,
+    ) -> AsyncIterator[ColumnarRows]:
+        sources = self._sources_for(preferred, sql)
+        if not sources:
+            yield self._mock(sql).rows
+            return
+        source = self._healthy(sources)[0]
+        breaker = self._breakers[source]
+        breaker.acquire()
+        try:
+            async for batch in self._clients()[source].stream(sql, batch_size, stats=stats):
+                yield batch
+        except Exception as exc:
+            self._record_failure(source, exc)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+
+    def source_for(
+        self, preferred: Literal["snowflake", "athena", "auto"], sql: str | None = None
+    ) -> Literal["snowflake", "athena", "mock"]:
+        sources = self._sources_for(preferred, sql)
+        return sources[0] if sources else "mock"
+
+    def _clients(self) -> dict[Literal["snowflake", "athena"], SnowflakeClient | AthenaClient]:
+        clients: dict[Literal["snowflake", "athena"], SnowflakeClient | AthenaClient] = {}
+        if self._snowflake and self._snowflake.enabled:
+            clients["snowflake"] = self._snowflake
+        if self._athena and self._athena.enabled:
+            clients["athena"] = self._athena
+        return clients
+
+    def _sources_for(
+        self, preferred: Literal["snowflake", "athena", "auto"], sql: str | None = None
+    ) -> list[Literal["snowflake", "athena"]]:
+        """Configured sources to try, best first; ``auto`` is ranked by the router when there is one."""
+
+        available = list(self._clients())
+        if preferred != "auto":
+            return [preferred] if preferred in available else []
+        if self._router is None or sql is None:
+            return available
+        return self._router.rank(sql, available)
+
+    def breaker_states(self) -> dict[str, dict[str, str | int | float]]:
+        return {source: self._breakers[source].snapshot() for source in self._clients()}
+
+    def _healthy(self, sources: list[Literal["snowflake", "athena"]]) -> list[Literal["snowflake", "athena"]]:
+        """``sources`` whose breakers admit calls; fails fast when none do."""
+
+        healthy = [source for source in sources if self._breakers[source].available]
+        if not healthy:
+            self._breakers[sources[0]].acquire()  # raises CircuitOpenError
+        return healthy
+
     async def _execute_once(self, sql: str, preferred: Literal["snowflake", "athena", "auto"]) -> QueryExecutionResult:
-        if preferred in ("snowflake", "auto") and self._snowflake and self._snowflake.enabled:
-            return await self._snowflake.execute(sql)
-        if preferred in ("athena", "auto") and self._athena and self._athena.enabled:
-            return await self._athena.execute(sql)
-        return self._mock(sql)
+        sources = self._sources_for(preferred, sql)
+        if not sources:
+            return self._mock(sql)
+        primary, *fallbacks = self._healthy(sources)
+        delay_ms = self._router.hedge_delay_ms(primary) if self._router and fallbacks else None
+        if delay_ms is not None:
+            return await self._execute_hedged(sql, primary, fallbacks[0], delay_ms / 1000)
+        try:
+            return await self._execute_on(primary, sql)
+        except Exception as exc:
+            if not fallbacks or not is_transient(exc):
+                raise
+            # Fail over immediately instead of waiting out a retry against the same source.
+            return await self._execute_on(fallbacks[0], sql)
+
+    async def _execute_on(self, source: Literal["snowflake", "athena"], sql: str) -> QueryExecutionResult:
+        breaker = self._breakers[source]
+        breaker.acquire()
+        start = time.perf_counter()
+        try:
+            result = await self._clients()[source].execute(sql)
+        except Exception as exc:
+            self._record_failure(source, exc, (time.perf_counter() - start) * 1000)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        if self._router is not None:
+            self._router.observe(source, (time.perf_counter() - start) * 1000, ok=True)
+        return result
+
+    def _record_failure(self, source: str, exc: Exception, elapsed_ms: float | None = None) -> None:
+        if not is_transient(exc):
+            # The source answered; the query itself was at fault.
+            self._breakers[source].record_success()
+            return
+        self._breakers[source].record_failure()
+        if self._router is not None and elapsed_ms is not None:
+            self._router.observe(source, elapsed_ms, ok=False)
+
+    async def _execute_hedged(
+        self,
+        sql: str,
+        primary: Literal["snowflake", "athena"],
+        secondary: Literal["snowflake", "athena"],
+        delay: float,
+    ) -> QueryExecutionResult:
+        """Run on ``primary``; past ``delay`` also run on ``secondary`` and keep the first success."""
+
+        assert self._router is not None
+        tasks = [asyncio.create_task(self._execute_on(primary, sql))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                failure = tasks[0].exception()
+                if failure is None or not is_transient(failure):
+                    return tasks[0].result()
+                # The primary failed before the hedge delay; fail over now, as the unhedged path does.
+                return await self._execute_on(secondary, sql)
+            tasks.append(asyncio.create_task(self._execute_on(secondary, sql)))
+            pending: set[asyncio.Task[QueryExecutionResult]] = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._router.record_hedge(secondary, won=task is tasks[1])
+                        return task.result()
+                    error = error or task.exception()
+            self._router.record_hedge(secondary, won=False)
+            assert error is not None
+            raise error
+        finally:
+            # The loser is cancelled without waiting; clients stop their own server-side work.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
 
     def _mock(self, sql: str) -> QueryExecutionResult:
-        rows = [
-            {"fiscal_quarter": "2024-Q1", "revenue_usd": 1250 + random.randint(-50, 50), "segment": "Cloud"},
-            {"fiscal_quarter": "2024-Q1", "revenue_usd": 890 + random.randint(-40, 40), "segment": "Payments"},
-        ]
+        rows = ColumnarRows.from_columns(
+            {
+                "fiscal_quarter": ["2024-Q1", "2024-Q1"],
+                "revenue_usd": [1250 + random.randint(-50, 50), 890 + random.randint(-40, 40)],
+                "segment": ["Cloud", "Payments"],
+            }
+        )
         return QueryExecutionResult(rows=rows, row_count=len(rows), latency_ms=random.randint(80, 120), source="mock")
+
+
+def _retryable(exc: BaseException) -> bool:
+    # A query that already used its whole deadline would only time out again.
+    return is_transient(exc) and not isinstance(exc, AthenaTimeoutError)
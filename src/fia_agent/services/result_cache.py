@@ -0,0 +1,122 @@
+"""RBAC-aware cache for warehouse query results."""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Tuple
+
+from fia_agent.models import QueryExecutionResult
+from fia_agent.services.singleflight import SingleFlight
+
+CacheKey = Tuple[str, str, str]
+
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and case outside string literals so equivalent SQL shares a key."""
+
+    parts = _STRING_LITERAL.split(sql.strip().rstrip(";").strip())
+    normalized = [
+        part if index % 2 else _WHITESPACE.sub(" ", part).lower()
+        for index, part in enumerate(parts)
+    ]
+    return "".join(normalized).strip()
+
+
+@dataclass
+class _Entry:
+    result: QueryExecutionResult
+    expires_at: float
+
+
+class QueryResultCache:
+    """TTL + LRU cache of execution results with single-flight loading.
+
+    Keys include the redaction profile (the caller's role) so results are never
+    shared across roles with different visibility.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._flights: SingleFlight[tuple[CacheKey, int], QueryExecutionResult] = SingleFlight()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(sql: str, source: str, profile: str) -> CacheKey:
+        return normalize_sql(sql), source, profile.lower()
+
+    async def get_or_load(
+        self,
+        key: CacheKey,
+        loader: Callable[[], Awaitable[QueryExecutionResult]],
+    ) -> QueryExecutionResult:
+        """Return a cached copy of the result for ``key``, loading it at most once."""
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.result.model_copy(update={"cache_hit": True})
+            del self._entries[key]
+            self.expirations += 1
+
+        self.misses += 1
+        generation = self._generation
+        result, shared = await self._flights.do((key, generation), lambda: self._load(key, generation, loader))
+        return result.model_copy(update={"cache_hit": shared})
+
+    async def _load(
+        self,
+        key: CacheKey,
+        generation: int,
+        loader: Callable[[], Awaitable[QueryExecutionResult]],
+    ) -> QueryExecutionResult:
+        result = await loader()
+        # Results that raced with an invalidation belong to the old schema.
+        if self._ttl > 0 and self._max_entries > 0 and generation == self._generation:
+            self._entries[key] = _Entry(result=result, expires_at=self._clock() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict[str, float | int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._flights.shared,
+            "in_flight": self._flights.in_flight,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,120 @@
+"""Latency-aware choice between warehouses for ``preferred_source="auto"``."""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal, Sequence
+
+from fia_agent.services.latency import Ewma, LatencySketch
+
+if TYPE_CHECKING:
+    from fia_agent.services.schema_discovery import SchemaDiscoveryService
+
+Warehouse = Literal["snowflake", "athena"]
+
+_TABLE_REFERENCE = re.compile(r'\b(?:from|join)\s+((?:"[^"]+"|[\w$]+)(?:\s*\.\s*(?:"[^"]+"|[\w$]+))*)', re.IGNORECASE)
+
+
+def referenced_tables(sql: str) -> set[str]:
+    """Lower-cased, unqualified names following FROM/JOIN; subqueries and CTE names included."""
+
+    tables = set()
+    for reference in _TABLE_REFERENCE.findall(sql):
+        tables.add(reference.split(".")[-1].strip().strip('"').lower())
+    return tables
+
+
+@dataclass
+class SourceHealth:
+    latency: Ewma = field(default_factory=Ewma)
+    errors: Ewma = field(default_factory=Ewma)
+    sketch: LatencySketch = field(default_factory=LatencySketch)
+    hedged: int = 0
+    hedge_wins: int = 0
+
+
+class SourceRouter:
+    """Ranks warehouses by expected latency among those that hold the query's tables.
+
+    Each source keeps a latency EWMA, an error-rate EWMA and a percentile
+    sketch fed by every completed execution. Sources without samples rank
+    first so each one is measured before the estimates are trusted. The hedge
+    delay for a source is its p95 once ``min_samples`` executions have been seen.
+    """
+
+    def __init__(
+        self,
+        schema_service: SchemaDiscoveryService | None = None,
+        hedging: bool = True,
+        min_samples: int = 20,
+        error_penalty: float = 4.0,
+    ) -> None:
+        self._schema_service = schema_service
+        self._hedging = hedging
+        self._min_samples = min_samples
+        self._error_penalty = error_penalty
+        self._health: dict[str, SourceHealth] = {}
+
+    def rank(self, sql: str, available: Sequence[Warehouse]) -> list[Warehouse]:
+        """``available`` sources able to answer ``sql``, fastest expected first."""
+
+        eligible = self._eligible(sql, available)
+        return sorted(eligible, key=lambda source: (self.expected_ms(source), available.index(source)))
+
+    def expected_ms(self, source: str) -> float:
+        health = self._health.get(source)
+        if health is None or health.latency.count == 0:
+            # Unmeasured sources go first; ones that have only ever failed go last.
+            return math.inf if health is not None and health.errors.value > 0 else 0.0
+        return health.latency.value * (1 + self._error_penalty * health.errors.value)
+
+    def hedge_delay_ms(self, source: str) -> float | None:
+        if not self._hedging:
+            return None
+        health = self._health.get(source)
+        if health is None or health.sketch.count < self._min_samples:
+            return None
+        return health.sketch.quantile(0.95)
+
+    def observe(self, source: str, latency_ms: float, ok: bool) -> None:
+        health = self._health.setdefault(source, SourceHealth())
+        health.errors.update(0.0 if ok else 1.0)
+        if ok:
+            health.latency.update(latency_ms)
+            health.sketch.add(latency_ms)
+
+    def record_hedge(self, source: str, won: bool) -> None:
+        health = self._health.setdefault(source, SourceHealth())
+        health.hedged += 1
+        health.hedge_wins += int(won)
+
+    def stats(self) -> dict[str, dict[str, float | int | None]]:
+        return {
+            source: {
+                "samples": health.sketch.count,
+                "latency_ms_ewma": round(health.latency.value, 3),
+                "error_rate_ewma": round(health.errors.value, 4),
+                "p50_ms": _rounded(health.sketch.quantile(0.5)),
+                "p95_ms": _rounded(health.sketch.quantile(0.95)),
+                "hedged": health.hedged,
+                "hedge_wins": health.hedge_wins,
+            }
+            for source, health in self._health.items()
+        }
+
+    def _eligible(self, sql: str, available: Sequence[Warehouse]) -> list[Warehouse]:
+        if self._schema_service is None or len(available) < 2:
+            return list(available)
+        eligible = set(available)
+        for table in referenced_tables(sql):
+            owners = self._schema_service.sources_for(table)
+            # Unknown names (CTEs, subquery aliases, uncatalogued tables) do not constrain routing.
+            if owners:
+                eligible &= owners
+        return [source for source in available if source in eligible] or list(available)
+
+
+def _rounded(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
@@ -0,0 +1,196 @@
+"""Admission control and priority scheduling for warehouse executions."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Deque, Literal, Mapping
+
+from fastapi import HTTPException, status
+
+Priority = Literal["interactive", "batch", "mcp"]
+PRIORITIES: tuple[Priority, ...] = ("interactive", "batch", "mcp")
+
+
+@dataclass
+class _Waiter:
+    user: str
+    role: str
+    priority: Priority
+    future: asyncio.Future[None]
+    enqueued_at: float = field(default=0.0)
+
+
+class AdmissionScheduler:
+    """Caps concurrent executions globally, per role and per user.
+
+    Requests that cannot start immediately wait in one FIFO queue per priority;
+    when a slot frees up the highest-priority waiter whose user and role are
+    under their limits is admitted, so a busy user never blocks others behind
+    them. A request is rejected with 429 straight away when the queue is full
+    or its projected wait (queue position times the observed service time)
+    exceeds ``queue_timeout``, and after ``queue_timeout`` if it is still
+    waiting.
+    """
+
+    def __init__(
+        self,
+        global_limit: int = 16,
+        per_user_limit: int = 2,
+        role_limits: Mapping[str, int] | None = None,
+        queue_timeout: float = 5.0,
+        max_queue_depth: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._global_limit = global_limit
+        self._per_user_limit = per_user_limit
+        self._role_limits = {role.lower(): limit for role, limit in (role_limits or {}).items()}
+        self._queue_timeout = queue_timeout
+        self._max_queue_depth = max_queue_depth
+        self._clock = clock
+        self._queues: dict[Priority, Deque[_Waiter]] = {priority: deque() for priority in PRIORITIES}
+        self._running = 0
+        self._by_user: Counter[str] = Counter()
+        self._by_role: Counter[str] = Counter()
+        # Used for load shedding before the first execution has been observed.
+        self._service_ewma = 1.0
+        self._observed = False
+        self._recent_waits: Deque[float] = deque(maxlen=1024)
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_ms_max = 0.0
+
+    @asynccontextmanager
+    async def slot(self, user: str, role: str, priority: Priority = "interactive") -> AsyncIterator[None]:
+        """Hold one execution slot for the duration of the block."""
+
+        role = role.lower()
+        await self._admit(user, role, priority)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self._observe(self._clock() - started)
+            self._release(user, role)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> dict[str, float | int | dict[str, int]]:
+        waits = sorted(self._recent_waits)
+        return {
+            "running": self._running,
+            "queued": self.queue_depth,
+            "queued_by_priority": {priority: len(queue) for priority, queue in self._queues.items()},
+            "global_limit": self._global_limit,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_p50": round(waits[len(waits) // 2], 3) if waits else 0.0,
+            "wait_ms_p95": round(waits[min(int(len(waits) * 0.95), len(waits) - 1)], 3) if waits else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+            "service_ms_ewma": round(self._service_ewma * 1000, 3),
+        }
+
+    async def _admit(self, user: str, role: str, priority: Priority) -> None:
+        if self._can_start(user, role) and not self._queued_ahead(priority):
+            self._start(user, role)
+            self._record_wait(0.0)
+            return
+        ahead = self._queued_ahead(priority) + 1
+        projected = ahead / self._global_limit * self._service_ewma
+        if self.queue_depth >= self._max_queue_depth or projected > self._queue_timeout:
+            self.rejected += 1
+            raise _too_many_requests(projected, "Execution queue is full")
+        waiter = _Waiter(user, role, priority, asyncio.get_running_loop().create_future(), self._clock())
+        self._queues[priority].append(waiter)
+        # Waiters ahead may be blocked only by their own user or role limit.
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self._queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.timed_out += 1
+            self.rejected += 1
+            raise _too_many_requests(self._service_ewma, "Timed out waiting for an execution slot") from None
+        except BaseException:
+            self._discard(waiter)
+            raise
+        self._record_wait(self._clock() - waiter.enqueued_at)
+
+    def _discard(self, waiter: _Waiter) -> None:
+        if waiter.future.done() and not waiter.future.cancelled():
+            # Admitted in the same tick the caller gave up; hand the slot back.
+            self._release(waiter.user, waiter.role)
+            return
+        waiter.future.cancel()
+        try:
+            self._queues[waiter.priority].remove(waiter)
+        except ValueError:
+            pass
+
+    def _queued_ahead(self, priority: Priority) -> int:
+        total = 0
+        for level in PRIORITIES:
+            total += len(self._queues[level])
+            if level == priority:
+                break
+        return total
+
+    def _can_start(self, user: str, role: str) -> bool:
+        return (
+            self._running < self._global_limit
+            and self._by_user[user] < self._per_user_limit
+            and self._by_role[role] < self._role_limits.get(role, self._global_limit)
+        )
+
+    def _start(self, user: str, role: str) -> None:
+        self._running += 1
+        self._by_user[user] += 1
+        self._by_role[role] += 1
+        self.admitted += 1
+
+    def _release(self, user: str, role: str) -> None:
+        self._running -= 1
+        self._by_user[user] -= 1
+        if self._by_user[user] <= 0:
+            del self._by_user[user]
+        self._by_role[role] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            for waiter in list(queue):
+                if self._running >= self._global_limit:
+                    return
+                if waiter.future.done():
+                    queue.remove(waiter)
+                    continue
+                if self._can_start(waiter.user, waiter.role):
+                    queue.remove(waiter)
+                    self._start(waiter.user, waiter.role)
+                    waiter.future.set_result(None)
+
+    def _observe(self, seconds: float) -> None:
+        self._service_ewma = 0.8 * self._service_ewma + 0.2 * seconds if self._observed else seconds
+        self._observed = True
+
+    def _record_wait(self, seconds: float) -> None:
+        waited_ms = seconds * 1000
+        self._recent_waits.append(waited_ms)
+        self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+
+
+def _too_many_requests(retry_after: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
@@ -3,55 +3,274 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import TYPE_CHECKING, Callable, Literal
 
+import orjson
 import yaml
 
 from fia_agent.models import ColumnDefinition, TableDefinition
 
+if TYPE_CHECKING:
+    from fia_agent.services.athena_client import AthenaClient
+    from fia_agent.services.snowflake_client import SnowflakeClient
+
+logger = logging.getLogger(__name__)
+
+
+Source = Literal["snowflake", "athena", "auto"]
+WAREHOUSES: tuple[str, ...] = ("snowflake", "athena")
+
+
+@dataclass(frozen=True)
+class SchemaSnapshot:
+    """Immutable view of the catalog; replaced wholesale, never mutated.
+
+    ``tables`` keeps its identity for as long as the fingerprint is unchanged,
+    so consumers may key derived structures on it.
+    """
+
+    version: int
+    fingerprint: str
+    tables: list[TableDefinition]
+    source: str
+
+
+def schema_fingerprint(tables: list[TableDefinition]) -> str:
+    payload = orjson.dumps([table.model_dump() for table in tables], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()[:16]
+
 
 class SchemaDiscoveryService:
-    """Discovers table metadata from Snowflake, Athena, or fallback files."""
+    """Discovers table metadata from Snowflake, Athena, or fallback files.
+
+    Both warehouses are described concurrently into a source-tagged catalog
+    from which one snapshot per ``preferred_source`` is derived; the YAML file
+    backs any view whose warehouse returned nothing. A warehouse whose describe
+    fails keeps its last catalog until a later refresh succeeds; the file only
+    stands in when there is nothing to keep. Reads never take a lock:
+    they return the current snapshot and, once it is older than
+    ``ttl_seconds``, schedule a refresh in the background.
+    """
 
     def __init__(
         self,
         sample_schema_path: Path,
-        snowflake_client: "SnowflakeClient | None" = None,
-        athena_client: "AthenaClient | None" = None,
+        snowflake_client: SnowflakeClient | None = None,
+        athena_client: AthenaClient | None = None,
+        ttl_seconds: float = 300.0,
+        discovery_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
     ) -> None:
         self._sample_schema_path = sample_schema_path
-        self._snowflake = snowflake_client
-        self._athena = athena_client
-        self._cache: list[TableDefinition] = []
-        self._lock = asyncio.Lock()
-
-    async def get_schema(self, preferred: Literal["snowflake", "athena", "auto"] = "auto") -> list[TableDefinition]:
-        async with self._lock:
-            if self._cache:
-                return self._cache
-            if preferred in ("snowflake", "auto") and self._snowflake:
-                schema = await self._snowflake.describe()
-                if schema:
-                    self._cache = schema
-                    return schema
-            if preferred in ("athena", "auto") and self._athena:
-                schema = await self._athena.describe()
-                if schema:
-                    self._cache = schema
-                    return schema
-            self._cache = self._load_from_file()
-            return self._cache
+        self._clients: dict[str, SnowflakeClient | AthenaClient] = {
+            name: client
+            for name, client in (("snowflake", snowflake_client), ("athena", athena_client))
+            if client is not None
+        }
+        self._ttl = ttl_seconds
+        self._discovery_timeout = discovery_timeout
+        self._clock = clock
+        self._views: dict[str, SchemaSnapshot] = {}
+        self._table_sources: dict[str, frozenset[str]] = {}
+        self._catalog: dict[str, list[TableDefinition]] = {}
+        self._markers: dict[str, str | None] = {}
+        self._file_tables: tuple[str, list[TableDefinition]] | None = None
+        self._loaded_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._background: asyncio.Task[None] | None = None
+        self._refresh_listeners: list[Callable[[], object]] = []
+
+    def add_refresh_listener(self, listener: Callable[[], object]) -> None:
+        """Register a callback fired after every schema refresh (e.g. cache invalidation); its result is ignored."""
+
+        self._refresh_listeners.append(listener)
+
+    @property
+    def snapshot(self) -> SchemaSnapshot | None:
+        return self._views.get("auto")
+
+    def fingerprints(self) -> frozenset[str]:
+        """Fingerprints of every live view (per-warehouse and merged)."""
+
+        return frozenset(view.fingerprint for view in self._views.values())
+
+    @property
+    def loaded_at(self) -> float:
+        return self._loaded_at
+
+    def sources_for(self, table_name: str) -> frozenset[str]:
+        """Warehouses whose catalog contains ``table_name`` (empty when unknown)."""
+
+        return self._table_sources.get(table_name.lower(), frozenset())
+
+    async def get_snapshot(self, preferred: Source = "auto") -> SchemaSnapshot:
+        views = self._views
+        if not views:
+            views = await self._reload()
+        elif self._is_stale() and self._background is None and self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh_in_background())
+        return views.get(preferred) or views["auto"]
+
+    async def get_schema(self, preferred: Source = "auto") -> list[TableDefinition]:
+        return (await self.get_snapshot(preferred)).tables
+
+    async def refresh(self) -> list[TableDefinition]:
+        views = await self._reload(force=True)
+        self._notify()
+        return views["auto"].tables
+
+    async def start(self) -> None:
+        """Start the TTL-driven background refresher."""
+
+        if self._ttl > 0 and self._background is None:
+            self._background = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._background, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        self._background = None
+        self._refresh_task = None
+
+    def _is_stale(self) -> bool:
+        return self._ttl > 0 and self._clock() - self._loaded_at >= self._ttl
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._ttl)
+            try:
+                await self._reload()
+            except Exception:  # pragma: no cover - keep serving the last snapshot
+                logger.exception("Background schema refresh failed")
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self._reload()
+        except Exception:  # pragma: no cover - keep serving the last snapshot
+            logger.exception("Schema refresh failed")
+        finally:
+            self._refresh_task = None
+
+    async def _reload(self, force: bool = False) -> dict[str, SchemaSnapshot]:
+        async with self._refresh_lock:
+            current = self._views
+            if current and not force:
+                if not self._is_stale():
+                    return current
+                markers = await self._current_markers()
+                if None not in markers.values() and markers == self._markers:
+                    self._loaded_at = self._clock()
+                    return current
+
+            catalog, markers = await self._discover()
+            views = self._build_views(catalog, current)
+            self._table_sources = self._index_sources(catalog)
+            self._catalog = catalog
+            self._markers = markers
+            self._loaded_at = self._clock()
+            changed = any(current.get(name) is not view for name, view in views.items())
+            self._views = views
+        if current and changed and not force:
+            self._notify()
+        return views
+
+    def _notify(self) -> None:
+        for listener in self._refresh_listeners:
+            listener()
+
+    async def _discover(self) -> tuple[dict[str, list[TableDefinition]], dict[str, str | None]]:
+        names = list(self._clients)
+        results = await asyncio.gather(*(self._describe(name) for name in names))
+        catalog: dict[str, list[TableDefinition]] = {}
+        markers: dict[str, str | None] = {}
+        for name, result in zip(names, results, strict=True):
+            if result is None:
+                # Keep what this warehouse last described; no marker forces a re-describe next time.
+                catalog[name], markers[name] = self._catalog.get(name, []), None
+            else:
+                catalog[name], markers[name] = result
+        markers["file"] = self._file_marker()
+        return catalog, markers
+
+    async def _describe(self, name: str) -> tuple[list[TableDefinition], str | None] | None:
+        """Tables and change marker for ``name``, or ``None`` when discovery failed or timed out."""
+
+        client = self._clients[name]
+        try:
+            marker, tables = await asyncio.wait_for(
+                asyncio.gather(client.schema_marker(), client.describe()),
+                timeout=self._discovery_timeout,
+            )
+        except Exception:
+            logger.warning("Schema discovery failed for %s", name, exc_info=True)
+            return None
+        return [table if table.source else table.model_copy(update={"source": name}) for table in tables], marker
+
+    def _build_views(
+        self, catalog: dict[str, list[TableDefinition]], current: dict[str, SchemaSnapshot]
+    ) -> dict[str, SchemaSnapshot]:
+        merged: list[TableDefinition] = []
+        seen: set[str] = set()
+        for name in WAREHOUSES:
+            for table in catalog.get(name, []):
+                if table.name.lower() not in seen:
+                    seen.add(table.name.lower())
+                    merged.append(table)
+        candidates = {name: (catalog.get(name, []), name) for name in WAREHOUSES}
+        candidates["auto"] = (merged, "merged")
+
+        views: dict[str, SchemaSnapshot] = {}
+        for view, (tables, source) in candidates.items():
+            if not tables:
+                tables, source = self._load_from_file(), "file"
+            fingerprint = schema_fingerprint(tables)
+            previous = current.get(view)
+            if previous is not None and previous.fingerprint == fingerprint:
+                views[view] = previous
+                continue
+            views[view] = SchemaSnapshot(
+                version=previous.version + 1 if previous else 1,
+                fingerprint=fingerprint,
+                tables=tables,
+                source=source,
+            )
+        return views
+
+    @staticmethod
+    def _index_sources(catalog: dict[str, list[TableDefinition]]) -> dict[str, frozenset[str]]:
+        sources: dict[str, set[str]] = {}
+        for name, tables in catalog.items():
+            for table in tables:
+                sources.setdefault(table.name.lower(), set()).add(name)
+        return {table: frozenset(names) for table, names in sources.items()}
+
+    async def _current_markers(self) -> dict[str, str | None]:
+        names = list(self._clients)
+        markers = await asyncio.gather(
+            *(self._clients[name].schema_marker() for name in names), return_exceptions=True
+        )
+        current = {name: None if isinstance(marker, BaseException) else marker for name, marker in zip(names, markers, strict=True)}
+        current["file"] = self._file_marker()
+        return current
+
+    def _file_marker(self) -> str:
+        stat = self._sample_schema_path.stat()
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
 
     def _load_from_file(self) -> list[TableDefinition]:
+        marker = self._file_marker()
+        if self._file_tables is not None and self._file_tables[0] == marker:
+            return self._file_tables[1]
         data = yaml.safe_load(self._sample_schema_path.read_text(encoding="utf-8"))
         tables: list[TableDefinition] = []
         for table in data.get("tables", []):
             columns = [ColumnDefinition(**column) for column in table.get("columns", [])]
             tables.append(TableDefinition(name=table["name"], description=table.get("description"), columns=columns))
+        self._file_tables = (marker, tables)
         return tables
-
-    async def refresh(self) -> list[TableDefinition]:
-        async with self._lock:
-            self._cache = []
-        return await self.get_schema()
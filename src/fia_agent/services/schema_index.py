@@ -0,0 +1,112 @@
+"""Inverted token index over table metadata for fast table selection."""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from fia_agent.models import TableDefinition
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    {
+        "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "give", "how", "in",
+        "is", "it", "list", "me", "of", "on", "or", "per", "show", "the", "to", "what",
+        "which", "with",
+    }
+)
+
+NAME_WEIGHT = 3.0
+COLUMN_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+EXACT_NAME_BONUS = 10.0
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Lowercase word tokens with stopwords removed and naive plural folding."""
+
+    if not text:
+        return []
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class SchemaIndex:
+    """Maps name, column, and description tokens to the tables that contain them.
+
+    Built once per schema snapshot; ranking a question only touches the posting
+    lists of the question's own tokens, independent of the catalog size.
+    """
+
+    def __init__(self, schema: Sequence[TableDefinition]) -> None:
+        self._names: List[str] = [table.name for table in schema]
+        self._exact: Dict[str, int] = {}
+        raw: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for position, table in enumerate(schema):
+            self._exact.setdefault(table.name.lower(), position)
+            self._post(raw, position, tokenize(table.name), NAME_WEIGHT)
+            for column in table.columns:
+                self._post(raw, position, tokenize(column.name), COLUMN_WEIGHT)
+            self._post(raw, position, tokenize(table.description), DESCRIPTION_WEIGHT)
+        total = max(len(self._names), 1)
+        # Scale by inverse document frequency so tokens shared by most tables
+        # (e.g. "id", "updated") barely move the ranking.
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for token, tables in raw.items():
+            idf = math.log(1 + total / len(tables))
+            self._postings[token] = (
+                np.fromiter(tables.keys(), dtype=np.int32, count=len(tables)),
+                np.fromiter(tables.values(), dtype=np.float64, count=len(tables)) * idf,
+            )
+
+    @staticmethod
+    def _post(raw: Dict[str, Dict[int, float]], position: int, tokens: Iterable[str], weight: float) -> None:
+        for token in tokens:
+            tables = raw[token]
+            if tables.get(position, 0.0) < weight:
+                tables[position] = weight
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def rank(self, question: str, limit: int = 5) -> list[tuple[str, float]]:
+        """Return up to ``limit`` ``(table, score)`` pairs, best first, ties in schema order."""
+
+        lowered = question.lower()
+        positions: list[np.ndarray] = []
+        weights: list[np.ndarray] = []
+        exact = [self._exact[word] for word in set(re.findall(r"[a-z0-9_]+", lowered)) if word in self._exact]
+        if exact:
+            positions.append(np.asarray(exact, dtype=np.int32))
+            weights.append(np.full(len(exact), EXACT_NAME_BONUS))
+        for token in set(tokenize(lowered)):
+            posting = self._postings.get(token)
+            if posting is not None:
+                positions.append(posting[0])
+                weights.append(posting[1])
+        if not positions or limit <= 0:
+            return []
+        scores = np.bincount(np.concatenate(positions), weights=np.concatenate(weights), minlength=len(self._names))
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            cutoff = np.partition(scores[candidates], len(candidates) - limit)[len(candidates) - limit]
+            candidates = candidates[scores[candidates] >= cutoff]
+        # Stable sort keeps schema order among equal scores.
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")][:limit]
+        return [(self._names[position], float(scores[position])) for position in ranked]
+
+    def best(self, question: str) -> str | None:
+        ranked = self.rank(question, limit=1)
+        return ranked[0][0] if ranked else None
@@ -4,16 +4,126 @@ from __future__ import annotations
 
 import hashlib
 import hmac
-from typing import Iterable
+import re
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Literal, Mapping
 
+import yaml
 from fastapi import HTTPException, status
 
+from fia_agent.columnar import Column, ColumnarRows
 from fia_agent.config import Settings
 
+RedactionAction = Literal["mask", "hash", "truncate", "drop"]
+DEFAULT_POLICY = "default"
+MASK = "***"
+
+
+@dataclass(frozen=True)
+class RedactionRule:
+    """Applies ``action`` to columns listed by name or matching ``pattern`` (case-insensitive)."""
+
+    action: RedactionAction
+    columns: frozenset[str] = frozenset()
+    pattern: str | None = None
+    keep: int = 4
+
+    def matches(self, column: str) -> bool:
+        lowered = column.lower()
+        if lowered in self.columns:
+            return True
+        return self.pattern is not None and re.fullmatch(self.pattern, lowered, re.IGNORECASE) is not None
+
+
+@dataclass(frozen=True)
+class RedactionPolicy:
+    """Ordered rules for one role; the first matching rule wins for a column."""
+
+    name: str
+    rules: tuple[RedactionRule, ...] = ()
+
+    @classmethod
+    def from_config(cls, name: str, rules: Iterable[Mapping[str, Any]]) -> RedactionPolicy:
+        return cls(
+            name=name,
+            rules=tuple(
+                RedactionRule(
+                    action=rule["action"],
+                    columns=frozenset(column.lower() for column in rule.get("columns", [])),
+                    pattern=rule.get("pattern"),
+                    keep=int(rule.get("keep", 4)),
+                )
+                for rule in rules
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class CompiledRedaction:
+    """A policy resolved against one result's column set.
+
+    Only restricted columns appear here, so applying it costs one pass per
+    restricted column and nothing for the rest.
+    """
+
+    policy: str
+    columns: tuple[str, ...]
+    transforms: tuple[tuple[str, RedactionRule], ...] = ()
+    drops: tuple[str, ...] = ()
+    _hasher: Callable[[str], str] | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.transforms and not self.drops
+
+    def apply(self, rows: ColumnarRows) -> ColumnarRows:
+        redacted = rows
+        for name, rule in self.transforms:
+            values, kind = self._transform(rule, rows.column(name), len(rows))
+            redacted = redacted.with_column(name, values, kind)
+        if self.drops:
+            redacted = redacted.without(self.drops)
+        return redacted
+
+    def _transform(self, rule: RedactionRule, column: Column, length: int) -> tuple[list[Any], str]:
+        if rule.action == "mask":
+            return [MASK] * length, "string"
+        if rule.action == "truncate":
+            return [None if value is None else str(value)[: rule.keep] for value in column], "string"
+        hasher = self._hasher
+        assert hasher is not None
+        digests: dict[Any, str] = {}
+        hashed: list[Any] = []
+        for value in column:
+            if value is None:
+                hashed.append(None)
+                continue
+            digest = digests.get(value)
+            if digest is None:
+                digest = digests[value] = hasher(str(value))
+            hashed.append(digest)
+        return hashed, "string"
+
 
 class RBACService:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        policies: Mapping[str, RedactionPolicy] | None = None,
+        max_compiled: int = 512,
+    ) -> None:
         self._allowed_roles = {role.lower() for role in settings.allowed_roles}
+        if policies is None:
+            policies = load_policies(settings.redaction_policy_path) if settings.redaction_policy_path else {}
+        self._policies = {name.lower(): policy for name, policy in policies.items()}
+        self._policies.setdefault(DEFAULT_POLICY, RedactionPolicy.from_config(DEFAULT_POLICY, DEFAULT_RULES))
+        # Without a configured secret hashes are stable only for the life of the process.
+        self._hash_secret = settings.redaction_hash_secret or secrets.token_hex(32)
+        self._compiled: OrderedDict[tuple[str, tuple[str, ...]], CompiledRedaction] = OrderedDict()
+        self._max_compiled = max_compiled
 
     def assert_role(self, role: str) -> None:
         if role.lower() not in self._allowed_roles:
@@ -22,8 +132,66 @@ class RBACService:
     def sign_payload(self, payload: str, secret: str) -> str:
         return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
 
-    def redact_columns(self, rows: Iterable[dict[str, object]], restricted_columns: set[str]) -> list[dict[str, object]]:
-        sanitized: list[dict[str, object]] = []
-        for row in rows:
-            sanitized.append({key: ("***" if key in restricted_columns else value) for key, value in row.items()})
+    def policy_for(self, role: str) -> RedactionPolicy:
+        return self._policies.get(role.lower()) or self._policies[DEFAULT_POLICY]
+
+    def compile_policy(self, role: str, columns: tuple[str, ...]) -> CompiledRedaction:
+        """Resolve the role's policy against ``columns``; cached per (policy, column set)."""
+
+        policy = self.policy_for(role)
+        key = (policy.name, columns)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            return compiled
+        transforms: list[tuple[str, RedactionRule]] = []
+        drops: list[str] = []
+        for column in columns:
+            rule = next((rule for rule in policy.rules if rule.matches(column)), None)
+            if rule is None:
+                continue
+            if rule.action == "drop":
+                drops.append(column)
+            else:
+                transforms.append((column, rule))
+        compiled = CompiledRedaction(
+            policy=policy.name,
+            columns=columns,
+            transforms=tuple(transforms),
+            drops=tuple(drops),
+            _hasher=lambda payload: self.sign_payload(payload, self._hash_secret),
+        )
+        self._compiled[key] = compiled
+        if len(self._compiled) > self._max_compiled:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def redact(self, rows: ColumnarRows, role: str) -> ColumnarRows:
+        compiled = self.compile_policy(role, rows.columns)
+        return rows if compiled.is_noop else compiled.apply(rows)
+
+    def redact_columns(
+        self, rows: ColumnarRows | Iterable[Mapping[str, object]], restricted_columns: Iterable[str]
+    ) -> ColumnarRows:
+        """Mask restricted columns; untouched columns are shared, not copied."""
+
+        if not isinstance(rows, ColumnarRows):
+            rows = ColumnarRows.from_rows(rows)
+        sanitized = rows
+        for name in restricted_columns:
+            if name in rows:
+                sanitized = sanitized.with_column(name, [MASK] * len(rows), "string")
         return sanitized
+
+
+DEFAULT_RULES: list[dict[str, Any]] = [{"action": "mask", "columns": ["salary", "ssn"]}]
+
+
+def load_policies(path: Path) -> dict[str, RedactionPolicy]:
+    """Read ``{policies: {role: [rule, ...]}}`` from YAML; the ``default`` key covers other roles."""
+
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    return {
+        name.lower(): RedactionPolicy.from_config(name.lower(), rules or [])
+        for name, rules in (data.get("policies") or {}).items()
+    }
@@ -0,0 +1,46 @@
+"""Collapse concurrent identical work into a single shared execution."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[K, T]):
+    """Runs at most one ``factory`` per key at a time and shares its outcome.
+
+    The shared work runs in its own task so a cancelled caller (for example a
+    disconnected HTTP client) does not abort the execution other callers are
+    waiting on.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[K, asyncio.Future[T]] = {}
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: K, factory: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return ``(result, shared)`` where ``shared`` marks a joined execution."""
+
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: K, task: asyncio.Future[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even when every waiter went away.
+            task.exception()
@@ -2,32 +2,148 @@
 
 from __future__ import annotations
 
-import asyncio
+from typing import Any, AsyncIterator, Sequence
+
+from fia_agent.columnar import ColumnarRows
 from fia_agent.config import Settings
-from fia_agent.models import QueryExecutionResult, TableDefinition
+from fia_agent.models import ColumnDefinition, QueryExecutionResult, TableDefinition
+from fia_agent.services.connection_pool import AsyncConnectionPool, Connector, pool_from_settings
 
+DESCRIBE_SQL = (
+    "SELECT table_name, column_name, data_type, comment FROM information_schema.columns "
+    "WHERE table_schema = CURRENT_SCHEMA() ORDER BY table_name, ordinal_position"
+)
+MARKER_SQL = (
+    "SELECT MAX(last_altered) FROM information_schema.tables WHERE table_schema = CURRENT_SCHEMA()"
+)
+
+
+class SnowflakeConnector:
+    """Opens authenticated ``snowflake.connector`` sessions from settings."""
 
-class SnowflakeClient:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
 
+    def connect(self) -> Any:
+        import snowflake.connector
+
+        return snowflake.connector.connect(
+            account=self._settings.snowflake_account,
+            user=self._settings.snowflake_user,
+            password=self._settings.snowflake_password,
+            warehouse=self._settings.snowflake_warehouse,
+            database=self._settings.snowflake_database,
+            schema=self._settings.snowflake_schema,
+            client_session_keep_alive=True,
+        )
+
+    def ping(self, connection: Any) -> bool:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            return cursor.fetchall() == [(1,)]
+        finally:
+            cursor.close()
+
+    def close(self, connection: Any) -> None:
+        connection.close()
+
+
+class SnowflakeClient:
+    def __init__(self, settings: Settings, connector: Connector[Any] | None = None) -> None:
+        self._settings = settings
+        self._pool: AsyncConnectionPool[Any] = pool_from_settings(
+            connector or SnowflakeConnector(settings), settings, name="snowflake"
+        )
+
     @property
     def enabled(self) -> bool:
         return self._settings.snowflake_enabled
 
+    async def start(self) -> None:
+        if self.enabled:
+            await self._pool.start()
+
     async def describe(self) -> list[TableDefinition]:
         if not self.enabled:
             return []
-        # Placeholder: integrate SHOW TABLES queries with snowflake-connector.
-        await asyncio.sleep(0.05)
-        return []
+        _, rows = await self._fetch_all(DESCRIBE_SQL)
+        tables: dict[str, TableDefinition] = {}
+        for table_name, column_name, data_type, comment in rows:
+            table = tables.get(table_name)
+            if table is None:
+                table = tables[table_name] = TableDefinition(name=table_name, source="snowflake")
+            table.columns.append(ColumnDefinition(name=column_name, type=data_type, description=comment))
+        return list(tables.values())
+
+    async def schema_marker(self) -> str | None:
+        """Cheap change token for the catalog; ``None`` forces a full describe."""
+
+        if not self.enabled:
+            return None
+        _, rows = await self._fetch_all(MARKER_SQL)
+        marker = rows[0][0] if rows else None
+        return None if marker is None else str(marker)
 
     async def execute(self, sql: str) -> QueryExecutionResult:
         if not self.enabled:
             raise RuntimeError("Snowflake is not configured")
-        # Real implementation should use snowflake.connector.connect and fetch result sets.
-        await asyncio.sleep(0.1)
-        return QueryExecutionResult(rows=[{"message": "Not yet implemented"}], row_count=1, latency_ms=100, source="snowflake")
+        names, rows = await self._fetch_all(sql)
+        table = ColumnarRows.from_tuples(names, rows)
+        return QueryExecutionResult(rows=table, row_count=len(table), source="snowflake")
+
+    async def stream(
+        self, sql: str, batch_size: int = 500, stats: dict[str, Any] | None = None
+    ) -> AsyncIterator[ColumnarRows]:
+        """Yield result rows in batches of at most ``batch_size``.
+
+        The connection stays checked out until the cursor is exhausted or the
+        consumer stops iterating. ``stats`` is accepted for parity with
+        :class:`AthenaClient`; Snowflake reports nothing into it.
+        """
+
+        if not self.enabled:
+            raise RuntimeError("Snowflake is not configured")
+        async with self._pool.connection() as connection:
+            cursor = await self._pool.run(_open_cursor, connection, sql)
+            try:
+                names = _column_names(cursor)
+                while True:
+                    batch = await self._pool.run(cursor.fetchmany, batch_size)
+                    if not batch:
+                        break
+                    yield ColumnarRows.from_tuples(names, batch)
+            finally:
+                await self._pool.run(cursor.close)
 
     async def close(self) -> None:
-        await asyncio.sleep(0)
+        await self._pool.close()
+
+    def pool_stats(self) -> dict[str, float | int]:
+        return self._pool.stats()
+
+    async def _fetch_all(self, sql: str) -> tuple[list[str], list[Sequence[Any]]]:
+        async with self._pool.connection() as connection:
+            return await self._pool.run(_fetch_all, connection, sql)
+
+
+def _open_cursor(connection: Any, sql: str) -> Any:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql)
+    except BaseException:
+        cursor.close()
+        raise
+    return cursor
+
+
+def _column_names(cursor: Any) -> list[str]:
+    return [description[0] for description in cursor.description or ()]
+
+
+def _fetch_all(connection: Any, sql: str) -> tuple[list[str], list[Sequence[Any]]]:
+    cursor = _open_cursor(connection, sql)
+    try:
+        return _column_names(cursor), cursor.fetchall()
+    finally:
+        cursor.close()
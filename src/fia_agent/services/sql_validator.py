@@ -0,0 +1,364 @@
+"""Local pre-flight checks for generated SQL, run before any warehouse round trip."""
+
+from __future__ import annotations
+
+import difflib
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Literal, Sequence
+
+from fia_agent.models import TableDefinition
+from fia_agent.services.schema_discovery import schema_fingerprint
+
+IssueCode = Literal["empty", "not_select", "multiple_statements", "syntax", "unknown_table", "unknown_column"]
+
+_LEXER = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^']|'')*')
+    |(?P<qident>"(?:[^"]|"")*"|`[^`]*`)
+    |(?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<ident>[A-Za-z_][A-Za-z0-9_$]*)
+    |(?P<op><>|!=|<=|>=|\|\||::|[-+*/%=<>(),.;\[\]])
+    |(?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Statements that change data, schema or session state; never sent to a warehouse.
+_FORBIDDEN = frozenset(
+    {"insert", "update", "delete", "merge", "create", "drop", "alter", "truncate", "grant", "revoke", "copy",
+     "unload", "call"}
+)
+# Words that, after a forbidden word, show it is used as a value (``(copy IS NULL)``), not a statement.
+_PREDICATE_WORDS = frozenset(
+    {"is", "and", "or", "not", "in", "between", "like", "ilike", "rlike", "similar", "as", "asc", "desc", "nulls"}
+)
+# Functions called without parentheses; unknown bare references to them are not columns.
+_NILADIC = frozenset(
+    {"current_user", "current_role", "current_schema", "current_schemas", "current_database", "current_catalog",
+     "current_warehouse", "current_account", "current_region", "current_session", "current_client",
+     "current_version", "current_statement", "current_transaction", "current_ip_address", "session_user",
+     "system_user", "user", "sysdate", "systimestamp", "getdate", "localtime", "localtimestamp", "current_date",
+     "current_time", "current_timestamp"}
+)
+SQL_KEYWORDS = frozenset(
+    {
+        "select", "from", "where", "and", "or", "not", "in", "is", "null", "as", "on", "join", "inner", "left",
+        "right", "full", "outer", "cross", "natural", "group", "by", "order", "having", "limit", "offset", "distinct",
+        "all", "union", "intersect", "except", "minus", "case", "when", "then", "else", "end", "asc", "desc",
+        "between", "like", "ilike", "rlike", "exists", "with", "recursive", "true", "false", "interval", "date",
+        "timestamp", "time", "over", "partition", "rows", "range", "preceding", "following", "unbounded", "current",
+        "row", "fetch", "first", "next", "only", "top", "nulls", "last", "qualify", "using", "lateral", "window",
+        "filter", "within", "any", "some", "escape", "similar", "to", "values", "year", "quarter", "month", "week",
+        "day", "hour", "minute", "second", "current_date", "current_timestamp", "current_time", "localtimestamp",
+        "sample", "tablesample", "pivot", "unpivot", "for", "of", "both", "leading", "trailing", "at", "zone",
+        "ignore", "respect", "exclude",
+    }
+)
+_JOIN_WORDS = frozenset({"join", "inner", "left", "right", "full", "outer", "cross", "natural", "lateral"})
+# Keywords that end a FROM clause.
+_FROM_END = frozenset(
+    {"where", "group", "order", "having", "limit", "offset", "qualify", "union", "intersect", "except", "minus",
+     "window", "fetch"}
+)
+# Keywords that can follow a table reference and so are never its alias.
+_NOT_ALIAS = _FROM_END | _JOIN_WORDS | {"on", "using", "sample", "tablesample", "pivot", "unpivot"}
+
+
+@dataclass(frozen=True)
+class SqlIssue:
+    """One pre-flight finding, structured so repair can act on it without parsing text."""
+
+    code: IssueCode
+    message: str
+    reference: str | None = None
+    suggestion: str | None = None
+
+    def __str__(self) -> str:
+        hint = f" (did you mean {self.suggestion}?)" if self.suggestion else ""
+        return f"{self.code}: {self.message}{hint}"
+
+
+def format_issues(issues: Sequence[SqlIssue]) -> str:
+    return "Pre-flight validation failed: " + "; ".join(str(issue) for issue in issues)
+
+
+@dataclass(frozen=True)
+class _Token:
+    kind: str
+    value: str
+    depth: int
+
+    @property
+    def word(self) -> str | None:
+        """Lower-cased bare identifier, or ``None`` for anything else."""
+
+        return self.value.lower() if self.kind == "ident" else None
+
+
+def _tokenize(sql: str) -> tuple[list[_Token], list[SqlIssue]]:
+    tokens: list[_Token] = []
+    issues: list[SqlIssue] = []
+    depth = 0
+    for match in _LEXER.finditer(sql):
+        kind, value = match.lastgroup or "other", match.group()
+        if kind in ("ws", "comment"):
+            continue
+        if kind == "other":
+            if value in ("'", '"', "`"):
+                issues.append(SqlIssue("syntax", "unterminated quoted literal or identifier"))
+                break
+            continue
+        if kind == "qident":
+            value = value[1:-1].replace('""', '"')
+        if value == ")":
+            depth -= 1
+            if depth < 0:
+                issues.append(SqlIssue("syntax", "unbalanced parentheses"))
+                break
+        tokens.append(_Token(kind, value, depth))
+        if value == "(":
+            depth += 1
+    else:
+        if depth:
+            issues.append(SqlIssue("syntax", "unbalanced parentheses"))
+    return tokens, issues
+
+
+def _starts_statement(tokens: list[_Token], i: int) -> bool:
+    """Whether ``tokens[i]`` sits where a statement verb goes: first token, or opening a (sub)statement.
+
+    That is the start of the text, right after ``(`` (a subquery or CTE body),
+    or right after ``)`` (the statement following a ``WITH`` list), and followed
+    by a name or clause word rather than an operator, so a column that happens
+    to be called ``update`` or ``copy`` is not mistaken for a write.
+    """
+
+    if i and tokens[i - 1].value not in ("(", ")"):
+        return False
+    following = tokens[i + 1] if i + 1 < len(tokens) else None
+    if following is None:
+        return i == 0
+    return following.kind in ("ident", "qident") and following.word not in _PREDICATE_WORDS
+
+
+def _is_name(token: _Token) -> bool:
+    return token.kind == "qident" or (token.kind == "ident" and token.word not in SQL_KEYWORDS)
+
+
+class _Catalog:
+    def __init__(self, schema: Iterable[TableDefinition]) -> None:
+        self.columns: dict[str, frozenset[str]] = {}
+        for table in schema:
+            self.columns.setdefault(table.name.lower(), frozenset(column.name.lower() for column in table.columns))
+
+
+class SqlValidator:
+    """Parses generated SQL just enough to reject it locally.
+
+    Checks, in order: a single read-only ``SELECT``/``WITH`` statement,
+    balanced quoting and parentheses, tables present in the schema snapshot,
+    and column references (qualified ones always; unqualified ones only when
+    every FROM source is a catalog table, so CTEs and derived tables never
+    produce false positives). Anything this lexer cannot judge is passed to the
+    warehouse as before.
+    """
+
+    def __init__(self, max_snapshots: int = 4) -> None:
+        self._catalogs: OrderedDict[str, _Catalog] = OrderedDict()
+        self._max_snapshots = max_snapshots
+        self.checked = 0
+        self.rejected = 0
+        self.issue_counts: Counter[str] = Counter()
+
+    def validate(
+        self, sql: str, schema: list[TableDefinition], fingerprint: str | None = None
+    ) -> list[SqlIssue]:
+        self.checked += 1
+        issues = self._validate(sql, self._catalog(schema, fingerprint) if schema else None)
+        if issues:
+            self.rejected += 1
+            self.issue_counts.update(issue.code for issue in issues)
+        return issues
+
+    def _catalog(self, schema: list[TableDefinition], fingerprint: str | None) -> _Catalog:
+        key = fingerprint or schema_fingerprint(schema)
+        catalog = self._catalogs.get(key)
+        if catalog is None:
+            catalog = self._catalogs[key] = _Catalog(schema)
+            while len(self._catalogs) > self._max_snapshots:
+                self._catalogs.popitem(last=False)
+        else:
+            self._catalogs.move_to_end(key)
+        return catalog
+
+    def _validate(self, sql: str, catalog: _Catalog | None) -> list[SqlIssue]:
+        tokens, issues = _tokenize(sql)
+        if issues:
+            return issues
+        while tokens and tokens[-1].value == ";":
+            tokens.pop()
+        if not tokens:
+            return [SqlIssue("empty", "no SQL statement was generated")]
+        if any(token.value == ";" for token in tokens):
+            return [SqlIssue("multiple_statements", "only a single statement may be executed")]
+        first = next((token for token in tokens if token.value != "("), tokens[0])
+        if first.word not in ("select", "with"):
+            return [SqlIssue("not_select", f"statement starts with {first.value.upper()!r}; only SELECT is allowed")]
+        forbidden = next(
+            (token for i, token in enumerate(tokens) if token.word in _FORBIDDEN and _starts_statement(tokens, i)),
+            None,
+        )
+        if forbidden is not None:
+            return [SqlIssue("not_select", f"{forbidden.value.upper()} is not allowed in a read-only query")]
+        if catalog is None:
+            return []
+        return self._check_references(tokens, catalog)
+
+    def _check_references(self, tokens: list[_Token], catalog: _Catalog) -> list[SqlIssue]:
+        issues: list[SqlIssue] = []
+        ctes = {
+            tokens[i].value.lower()
+            for i in range(len(tokens) - 2)
+            if _is_name(tokens[i]) and tokens[i + 1].word == "as" and tokens[i + 2].value == "("
+        }
+        aliases: dict[str, str | None] = {}  # alias or table name -> catalog table (None: CTE/derived)
+        consumed: set[int] = set()
+        opaque = False  # a FROM source whose columns we cannot know
+        calls: list[bool] = []  # per open paren: is it a function call?
+
+        i = 0
+        in_from = False
+        from_depth = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token.value == "(":
+                calls.append(i > 0 and _is_name(tokens[i - 1]))
+            elif token.value == ")":
+                if calls:
+                    calls.pop()
+                if in_from and token.depth < from_depth:
+                    in_from = False
+            word = token.word
+            if word in ("from", "join") and not (calls and calls[-1]):
+                in_from, from_depth = True, token.depth
+                i = self._read_source(tokens, i + 1, catalog, ctes, aliases, consumed, issues)
+                if i < 0:
+                    opaque, i = True, -i
+                continue
+            if in_from and token.value == "," and token.depth == from_depth:
+                i = self._read_source(tokens, i + 1, catalog, ctes, aliases, consumed, issues)
+                if i < 0:
+                    opaque, i = True, -i
+                continue
+            if in_from and word in _FROM_END:
+                in_from = False
+            i += 1
+
+        if issues:
+            return issues
+        real_sources = {table for table in aliases.values() if table is not None}
+        known_columns: frozenset[str] = frozenset().union(*(catalog.columns[table] for table in real_sources))
+        output_aliases: set[str] = set()
+        for i, token in enumerate(tokens):
+            if i in consumed or not _is_name(token):
+                continue
+            previous = tokens[i - 1] if i else None
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+            name = token.value.lower()
+            if following is not None and following.value == "(":
+                continue  # function call
+            if previous is not None and (previous.word == "as" or previous.value == "::"):
+                output_aliases.add(name)
+                continue
+            if previous is not None and (
+                previous.word == "end"
+                or previous.value == ")"
+                or (previous.kind in ("ident", "qident", "number", "string") and previous.word not in SQL_KEYWORDS)
+            ):
+                output_aliases.add(name)  # implicit alias: ``SUM(x) total``, ``CASE ... END bucket``
+                continue
+            if following is not None and following.value == ".":
+                qualifier = name
+                column_token = tokens[i + 2] if i + 2 < len(tokens) else None
+                if qualifier in aliases and column_token is not None and column_token.value != "*":
+                    consumed.add(i + 2)
+                    table = aliases[qualifier]
+                    column = column_token.value.lower()
+                    if table is not None and column not in catalog.columns[table]:
+                        issues.append(self._unknown_column(column, table, catalog.columns[table]))
+                continue
+            if previous is not None and previous.value == ".":
+                continue
+            if opaque or not real_sources or name in aliases or name in ctes:
+                continue
+            if name not in known_columns and name not in _NILADIC:
+                issues.append(self._unknown_column(name, ", ".join(sorted(real_sources)), known_columns))
+        # A name introduced as an output alias (``... AS revenue ... ORDER BY revenue``) is not a column.
+        return [issue for issue in issues if issue.code != "unknown_column" or issue.reference not in output_aliases]
+
+    @staticmethod
+    def _read_source(
+        tokens: list[_Token],
+        i: int,
+        catalog: _Catalog,
+        ctes: set[str],
+        aliases: dict[str, str | None],
+        consumed: set[int],
+        issues: list[SqlIssue],
+    ) -> int:
+        """Read ``name [AS] alias`` starting at ``i``; returns the next index, negated for opaque sources."""
+
+        if i < len(tokens) and tokens[i].value == "(":
+            # Derived table: its own FROM is read by the caller; its alias is an opaque source.
+            return -i
+        opaque = False
+        table: str | None
+        if i < len(tokens) and _is_name(tokens[i]):
+            parts = [tokens[i].value]
+            consumed.add(i)
+            i += 1
+            while i + 1 < len(tokens) and tokens[i].value == "." and _is_name(tokens[i + 1]):
+                parts.append(tokens[i + 1].value)
+                consumed.add(i + 1)
+                i += 2
+            if i < len(tokens) and tokens[i].value == "(":
+                return -i  # table function, e.g. FLATTEN(...); leave it to the warehouse
+            name = parts[-1].lower()
+            if name in ctes:
+                table, opaque = None, True
+            elif name in catalog.columns:
+                table = name
+            else:
+                close = difflib.get_close_matches(name, list(catalog.columns), n=1)
+                message = f"table {name!r} is not in the schema"
+                issues.append(SqlIssue("unknown_table", message, name, close[0] if close else None))
+                table = None
+            aliases[name] = table
+        else:
+            return i
+        if i < len(tokens) and tokens[i].word == "as":
+            i += 1
+        if i < len(tokens) and _is_name(tokens[i]) and tokens[i].word not in _NOT_ALIAS:
+            aliases[tokens[i].value.lower()] = table
+            consumed.add(i)
+            i += 1
+        return -i if opaque else i
+
+    @staticmethod
+    def _unknown_column(column: str, where: str, available: Iterable[str]) -> SqlIssue:
+        close = difflib.get_close_matches(column, list(available), n=1)
+        message = f"column {column!r} does not exist in {where}"
+        return SqlIssue("unknown_column", message, column, close[0] if close else None)
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        # Every rejection is an execution (and usually a repair retry) the warehouse never saw.
+        return {
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "round_trips_saved": self.rejected,
+            "issues": dict(self.issue_counts),
+        }
@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable
+from typing import Iterable, Sequence
 
 from langchain_core.language_models import BaseLanguageModel
 
 from fia_agent.models import TableDefinition
+from fia_agent.services.schema_index import SchemaIndex
+from fia_agent.services.sql_validator import SqlIssue
+
+_NUMERIC_TYPES = ("FLOAT", "DOUBLE", "REAL", "NUMBER", "NUMERIC", "DECIMAL", "INT", "BIGINT")
 
 
 class Text2SQLTranslator:
@@ -15,64 +19,118 @@ class Text2SQLTranslator:
 
     def __init__(self, llm: BaseLanguageModel | None = None) -> None:
         self._llm = llm
+        self._index: SchemaIndex | None = None
+        self._indexed_schema: list[TableDefinition] | None = None
 
     async def generate_sql(
         self,
         question: str,
         schema: list[TableDefinition],
         history: Iterable[str] | None = None,
+        *,
+        index: SchemaIndex | None = None,
     ) -> tuple[str, str]:
-        """Return SQL plus rationale string."""
+        """Return SQL plus rationale string.
+
+        ``index`` ranks tables over the full snapshot when ``schema`` is a pruned
+        per-request subset, so no index is built for each request.
+        """
 
         reasoning = [f"Question: {question}"]
-        table = self._pick_table(question, schema)
+        table = self._pick_table(question, schema, index)
         reasoning.append(f"Target table: {table}")
-        sql = self._fallback_sql(question, table)
+        sql = self._fallback_sql(question, table, schema)
         if history:
-            reasoning.append("Context:" + " | ".join(history))
+            # Count, don't echo: rationales are cached and persisted, conversation text is not.
+            reasoning.append(f"Context: {len(list(history))} prior turns considered")
         return sql, "\n".join(reasoning)
 
+    def cache_context(self, question: str, history: Sequence[str]) -> list[str]:
+        """The part of ``history`` that can change the SQL for ``question``; keyed into the translation cache.
+
+        The heuristic translator reads only the question and schema, so nothing
+        in the conversation affects its SQL. Translators whose output follows
+        the conversation override this with the turns they actually use.
+        """
+
+        return []
+
     async def repair_sql(
         self,
         question: str,
         schema: list[TableDefinition],
         error: str,
         previous_sql: str,
+        issues: Sequence[SqlIssue] = (),
+        *,
+        index: SchemaIndex | None = None,
     ) -> tuple[str, str]:
-        """Attempt to repair SQL based on engine feedback."""
+        """Attempt to repair SQL based on engine feedback or pre-flight ``issues``."""
 
         reasoning = ["Repair triggered", f"Engine error: {error}"]
-        if "syntax" in error.lower() and "SELECT" not in previous_sql.upper():
+        if issues:
+            # Pre-flight findings already name the bad reference; regenerate against the schema.
+            reasoning.extend(f"Pre-flight: {issue}" for issue in issues)
+        elif "syntax" in error.lower() and "SELECT" not in previous_sql.upper():
             repaired = previous_sql.strip()
             if not repaired.endswith(";"):
                 repaired += ";"
             reasoning.append("Ensured statement termination.")
             return repaired, "\n".join(reasoning)
-        table = self._pick_table(question, schema)
-        heuristics = self._fallback_sql(question, table)
+        table = self._pick_table(question, schema, index)
+        heuristics = self._fallback_sql(question, table, schema)
         reasoning.append("Re-generated via fallback heuristics.")
         return heuristics, "\n".join(reasoning)
 
-    def _fallback_sql(self, question: str, table: str) -> str:
+    def _fallback_sql(self, question: str, table: str, schema: Sequence[TableDefinition] = ()) -> str:
         lowered = question.lower()
-        select_cols = "segment, SUM(revenue_usd) AS revenue" if "segment" in lowered else "*"
-        metric = "ebitda_usd" if "ebitda" in lowered else "revenue_usd"
+        if "guidance" in lowered and (not schema or any(t.name == "guidance" for t in schema)):
+            table = "guidance"
+        # Only reference columns the target table has; without schema, assume the financials layout.
+        definition = next((t for t in schema if t.name == table), None)
+        columns = {column.name for column in definition.columns} if definition else None
+        has = (lambda name: True) if columns is None else columns.__contains__
+        grouped = "segment" in lowered and has("segment")
+        select_cols = ["*"]
+        if grouped:
+            revenue = self._metric_column("revenue", definition)
+            select_cols = ["segment", *([f"SUM({revenue}) AS revenue"] if revenue else [])]
+        metric = self._metric_column(lowered, definition)
+        if metric:
+            select_cols.append(f"AVG({metric}) AS metric")
         filters = []
         quarter_match = re.search(r"(20\d{2})\s*(q[1-4])", lowered)
-        if quarter_match:
+        if quarter_match and has("fiscal_quarter"):
             filters.append(f"fiscal_quarter = '{quarter_match.group(1)}-{quarter_match.group(2).upper()}'")
-        if "guidance" in lowered:
-            table = "guidance"
         where_clause = f" WHERE {' AND '.join(filters)}" if filters else ""
-        group_clause = " GROUP BY segment" if "segment" in lowered else ""
-        sql = f"SELECT {select_cols}, AVG({metric}) AS metric FROM {table}{where_clause}{group_clause} LIMIT 200"
+        group_clause = " GROUP BY segment" if grouped else ""
+        sql = f"SELECT {', '.join(select_cols)} FROM {table}{where_clause}{group_clause} LIMIT 200"
         return sql
 
-    def _pick_table(self, question: str, schema: list[TableDefinition]) -> str:
+    @staticmethod
+    def _metric_column(lowered: str, definition: TableDefinition | None) -> str | None:
+        preferred = "ebitda_usd" if "ebitda" in lowered else "revenue_usd"
+        if definition is None:
+            return preferred
+        names = [column.name for column in definition.columns]
+        if preferred in names:
+            return preferred
+        stem = preferred.split("_")[0]
+        numeric = [
+            column.name for column in definition.columns if column.type.upper().startswith(_NUMERIC_TYPES)
+        ]
+        return next((name for name in numeric if stem in name.lower()), numeric[0] if numeric else None)
+
+    def _schema_index(self, schema: list[TableDefinition]) -> SchemaIndex:
+        # Schema discovery hands out the same list object until the snapshot
+        # changes, so identity is enough to know when to rebuild.
+        if self._index is None or self._indexed_schema is not schema:
+            self._index = SchemaIndex(schema)
+            self._indexed_schema = schema
+        return self._index
+
+    def _pick_table(self, question: str, schema: list[TableDefinition], index: SchemaIndex | None = None) -> str:
         default = schema[0].name if schema else "financials_quarterly"
-        for table in schema:
-            if table.name in question.lower():
-                return table.name
-            if table.description and any(keyword in question.lower() for keyword in table.description.lower().split()):
-                return table.name
-        return default
+        if not schema:
+            return default
+        return (index or self._schema_index(schema)).best(question) or default
@@ -0,0 +1,211 @@
+"""Persistent cache of Text2SQL translations."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Collection, Iterable
+
+import orjson
+
+from fia_agent.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+_WHITESPACE = re.compile(r"\s+")
+FORMAT_VERSION = 2
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", question.strip().lower()))
+
+
+def context_digest(context: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for item in context:
+        digest.update(item.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class TranslationEntry:
+    sql: str
+    rationale: str
+    fingerprint: str
+    expires_at: float
+
+
+class TranslationCache:
+    """LRU + TTL cache of ``(sql, rationale)`` keyed on question, schema fingerprint and SQL-relevant context.
+
+    Entries are written back to ``path`` as JSON (atomically, via a temp file
+    and rename) every ``flush_interval`` seconds while dirty and on
+    :meth:`stop`, so hits survive restarts. Expiry uses wall-clock time for the
+    same reason. Entries for fingerprints that no longer exist are dropped by
+    :meth:`retain`.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400.0,
+        flush_interval: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._path = Path(path) if path is not None else None
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._flush_interval = flush_interval
+        self._clock = clock
+        self._entries: OrderedDict[str, TranslationEntry] = OrderedDict()
+        self._flights: SingleFlight[str, tuple[str, str]] = SingleFlight()
+        self._dirty = False
+        self._flusher: asyncio.Task[None] | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(question: str, fingerprint: str, context: Iterable[str] = ()) -> str:
+        payload = "\x1f".join((normalize_question(question), fingerprint, context_digest(context)))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.load)
+        if self._path is not None and self._flusher is None and self._flush_interval > 0:
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+            self._flusher = None
+        await self.flush()
+
+    async def get_or_generate(
+        self,
+        key: str,
+        fingerprint: str,
+        generate: Callable[[], Awaitable[tuple[str, str]]],
+    ) -> tuple[tuple[str, str], bool]:
+        """Return ``((sql, rationale), hit)``; concurrent misses for one key generate once."""
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > self._clock() and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return (entry.sql, entry.rationale), True
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        translation, _ = await self._flights.do(key, lambda: self._generate(key, fingerprint, generate))
+        return translation, False
+
+    async def _generate(
+        self, key: str, fingerprint: str, generate: Callable[[], Awaitable[tuple[str, str]]]
+    ) -> tuple[str, str]:
+        sql, rationale = await generate()
+        if self._ttl > 0 and self._max_entries > 0:
+            self._entries[key] = TranslationEntry(sql, rationale, fingerprint, self._clock() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+        return sql, rationale
+
+    def retain(self, fingerprints: Collection[str]) -> int:
+        """Drop entries built against schemas other than ``fingerprints``."""
+
+        stale = [key for key, entry in self._entries.items() if entry.fingerprint not in fingerprints]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._dirty = True
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def load(self) -> None:
+        if self._path is None or not self._path.exists():
+            return
+        try:
+            payload = orjson.loads(self._path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            logger.warning("Ignoring unreadable translation cache at %s", self._path, exc_info=True)
+            return
+        if payload.get("version") != FORMAT_VERSION:
+            return
+        now = self._clock()
+        # The file is written least- to most-recently used, so insertion order restores the LRU order.
+        for key, raw in payload.get("entries", []):
+            entry = TranslationEntry(**raw)
+            if entry.expires_at > now:
+                self._entries[key] = entry
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def flush(self) -> None:
+        if self._path is None or not self._dirty:
+            return
+        self._dirty = False
+        payload = orjson.dumps(
+            {"version": FORMAT_VERSION, "entries": [[key, asdict(entry)] for key, entry in self._entries.items()]}
+        )
+        try:
+            await asyncio.to_thread(_atomic_write, self._path, payload)
+        except OSError:
+            self._dirty = True
+            logger.warning("Writing translation cache to %s failed", self._path, exc_info=True)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    def stats(self) -> dict[str, float | int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._flights.shared,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
@@ -0,0 +1,120 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.config import Settings
+from fia_agent.models import QueryExecutionResult
+from fia_agent.services.athena_client import (
+    AthenaClient,
+    AthenaQueryError,
+    AthenaTimeoutError,
+    _to_columnar,
+)
+from fia_agent.services.fakes import FakeAthenaAPI
+
+
+def athena_settings(**overrides) -> Settings:
+    return Settings(
+        ATHENA_REGION="us-east-1",
+        ATHENA_DATABASE="finance",
+        AWS_ACCESS_KEY_ID="key",
+        ATHENA_POLL_MAX_SECONDS=0.005,
+        **overrides,
+    )
+
+
+async def _run(client: AthenaClient, scenario):
+    await client.start()
+    try:
+        return await scenario(client)
+    finally:
+        await client.close()
+
+
+def test_execute_polls_until_success_and_pages_results():
+    api = FakeAthenaAPI(row_count=2500, queued_polls=2, running_polls=3)
+    client = AthenaClient(athena_settings(), connector=api, poll_initial=0.001)
+
+    result = asyncio.run(_run(client, lambda c: c.execute("select * from financials_quarterly")))
+
+    assert result.row_count == 2500
+    assert result.rows.numeric("revenue_usd") is not None
+    assert result.bytes_scanned == 2500 * api.bytes_per_row
+    assert api.pages_served == 3
+    assert client.stats()["polls"] == 6
+
+
+def test_empty_result_keeps_its_columns():
+    client = AthenaClient(athena_settings(), connector=FakeAthenaAPI(row_count=0), poll_initial=0.001)
+
+    result = asyncio.run(_run(client, lambda c: c.execute("select * from financials_quarterly where false")))
+
+    assert result.row_count == 0
+    assert result.rows.columns == ("fiscal_quarter", "revenue_usd", "segment")
+
+
+def test_failed_query_raises_with_reason():
+    api = FakeAthenaAPI(fail=True)
+    client = AthenaClient(athena_settings(), connector=api, poll_initial=0.001)
+
+    with pytest.raises(AthenaQueryError, match="SYNTAX_ERROR"):
+        asyncio.run(_run(client, lambda c: c.execute("select broken")))
+    assert api.stopped == []
+
+
+def test_deadline_stops_the_running_query():
+    api = FakeAthenaAPI(running_polls=10_000)
+    client = AthenaClient(athena_settings(QUERY_TIMEOUT_SECONDS=0.05), connector=api, poll_initial=0.001)
+
+    with pytest.raises(AthenaTimeoutError):
+        asyncio.run(_run(client, lambda c: c.execute("select * from financials_quarterly")))
+    assert len(api.stopped) == 1
+    assert next(iter(api.executions.values()))["state"] == "CANCELLED"
+
+
+def test_cancelled_consumer_stops_the_query():
+    api = FakeAthenaAPI(running_polls=10_000)
+    client = AthenaClient(athena_settings(), connector=api, poll_initial=0.001)
+
+    async def scenario(c: AthenaClient):
+        task = asyncio.create_task(c.execute("select * from financials_quarterly"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return c.stats()
+
+    stats = asyncio.run(_run(client, scenario))
+    assert stats["cancelled"] == 1
+    assert len(api.stopped) == 1
+
+
+def test_stream_reports_bytes_scanned():
+    api = FakeAthenaAPI(row_count=1200)
+    client = AthenaClient(athena_settings(), connector=api, poll_initial=0.001)
+    stats: dict = {}
+
+    async def scenario(c: AthenaClient):
+        return [len(batch) async for batch in c.stream("select * from financials_quarterly", 500, stats=stats)]
+
+    assert sum(asyncio.run(_run(client, scenario))) == 1200
+    assert stats["bytes_scanned"] == 1200 * api.bytes_per_row
+
+
+def test_decimal_columns_keep_their_exact_value():
+    info = [{"Name": "segment", "Type": "varchar"}, {"Name": "revenue_usd", "Type": "decimal"}]
+    rows = [
+        {"Data": [{"VarCharValue": "Cloud"}, {"VarCharValue": "12345678901234567.89"}]},
+        {"Data": [{"VarCharValue": "Payments"}, {}]},
+    ]
+
+    decoded = _to_columnar(info, rows)
+    visual = VisualizationAgent().build(QueryExecutionResult(rows=decoded, row_count=2), "chart")
+
+    assert decoded.to_rows() == [
+        {"segment": "Cloud", "revenue_usd": Decimal("12345678901234567.89")},
+        {"segment": "Payments", "revenue_usd": None},
+    ]
+    assert visual.kind == "bar"
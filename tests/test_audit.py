@@ -0,0 +1,101 @@
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fia_agent.models import AuditRecord
+from fia_agent.services.audit import AuditFilter, AuditService, SQLiteAuditStore
+
+T0 = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+PLUS_TWO = timezone(timedelta(hours=2))
+
+
+def make_record(i: int) -> AuditRecord:
+    return AuditRecord(
+        user_id=f"user-{i % 2}",
+        role="analyst",
+        question=f"question {i}",
+        sql_query="SELECT 1",
+        status="failed" if i % 3 == 0 else "success",
+        latency_ms=i,
+        created_at=T0 + timedelta(minutes=i),
+    )
+
+
+def test_durable_audit_survives_restart_and_pages_by_filter(tmp_path: Path):
+    path = tmp_path / "audit.sqlite3"
+
+    async def write():
+        audit = AuditService(store=SQLiteAuditStore(path), batch_size=4)
+        await audit.start()
+        for i in range(10):
+            audit.record(make_record(i))
+        await audit.stop()
+        return audit.stats()
+
+    async def read():
+        audit = AuditService(store=SQLiteAuditStore(path))
+        await audit.start()
+        try:
+            first, cursor = await audit.search(AuditFilter(user_id="user-0"), limit=3)
+            second, end = await audit.search(AuditFilter(user_id="user-0"), limit=3, cursor=cursor)
+            failed, _ = await audit.search(AuditFilter(status="failed", since=T0 + timedelta(minutes=1)))
+            window, _ = await audit.search(AuditFilter(since=(T0 + timedelta(minutes=3)).astimezone(PLUS_TWO)))
+            return first, second, end, failed, window
+        finally:
+            await audit.stop()
+
+    stats = asyncio.run(write())
+    first, second, end, failed, window = asyncio.run(read())
+
+    assert stats["written"] == 10 and stats["dropped"] == 0
+    assert [r.question for r in first + second] == [f"question {i}" for i in (8, 6, 4, 2, 0)]
+    assert end is None
+    assert [r.latency_ms for r in failed] == [9, 6, 3]
+    assert failed[0].created_at.replace(tzinfo=timezone.utc) == T0 + timedelta(minutes=9)
+    assert [r.latency_ms for r in window] == [9, 8, 7, 6, 5, 4, 3]
+
+
+class SlowStore(SQLiteAuditStore):
+    def write_many(self, records):
+        time.sleep(0.3)
+        super().write_many(records)
+
+
+def test_stop_waits_for_the_batch_being_written(tmp_path: Path):
+    path = tmp_path / "audit.sqlite3"
+
+    async def scenario():
+        audit = AuditService(store=SlowStore(path))
+        await audit.start()
+        for i in range(5):
+            audit.record(make_record(i))
+        await asyncio.sleep(0.05)  # the writer is now inside write_many
+        audit.record(make_record(5))
+        await audit.stop()
+        return audit.stats()
+
+    stats = asyncio.run(scenario())
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM audit").fetchone() == (6,)
+    assert stats["written"] == 6 and stats["failures"] == 0
+
+
+def test_record_never_blocks_and_memory_search_pages():
+    audit = AuditService(max_records=100, store=SQLiteAuditStore(Path("unused.sqlite3")), queue_size=2)
+    for i in range(5):
+        audit.record(make_record(i))  # writer not started: the queue fills and the rest are dropped
+
+    page, cursor = asyncio.run(audit.search(AuditFilter(role="analyst"), limit=2))
+
+    assert audit.stats()["dropped"] == 3
+    assert [r.latency_ms for r in audit.recent(3)] == [4, 3, 2]
+    assert [r.latency_ms for r in page] == [4, 3] and cursor == 4
+    audit.record(make_record(5))  # a concurrent write must not shift the next page
+    rest, end = asyncio.run(audit.search(AuditFilter(role="analyst"), limit=2, cursor=cursor))
+    assert [r.latency_ms for r in rest] == [2, 1] and end == 2
+    until = (T0 + timedelta(minutes=2)).astimezone(PLUS_TWO)
+    early, _ = asyncio.run(audit.search(AuditFilter(until=until)))
+    assert [r.latency_ms for r in early] == [1, 0]
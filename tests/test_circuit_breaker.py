@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from fia_agent.agents.conductor import ConductorGraph
+from fia_agent.agents.query_generator import QueryGenerationAgent
+from fia_agent.agents.verifier import QueryVerificationAgent
+from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.config import BASE_DIR, Settings
+from fia_agent.models import QueryExecutionResult, QueryRequest
+from fia_agent.services.audit import AuditService
+from fia_agent.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from fia_agent.services.memory import MemoryManager
+from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.schema_discovery import SchemaDiscoveryService
+from fia_agent.services.security import RBACService
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakySource:
+    enabled = True
+
+    def __init__(self, name: str, error: Exception | None = None) -> None:
+        self.name = name
+        self.error = error
+        self.calls = 0
+
+    async def execute(self, sql: str) -> QueryExecutionResult:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return QueryExecutionResult(rows=[{"value": 1}], row_count=1, source=self.name)
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker("snowflake", failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        breaker.acquire()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 20
+    breaker.acquire()
+    breaker.record_success()
+    assert breaker.snapshot()["state"] == "closed"
+
+
+def test_transient_failures_fail_over_and_open_breaker_skips_source():
+    snowflake = FlakySource("snowflake", ConnectionError("connection reset"))
+    athena = FlakySource("athena")
+    breakers = {"snowflake": CircuitBreaker("snowflake", failure_threshold=2)}
+    executor = QueryExecutor(snowflake, athena, breakers=breakers)
+
+    async def scenario():
+        return [await executor.execute("SELECT 1", "auto", "analyst") for _ in range(4)]
+
+    results = asyncio.run(scenario())
+    assert {result.source for result in results} == {"athena"}
+    assert snowflake.calls == 2
+    assert executor.breaker_states()["snowflake"]["state"] == "open"
+
+
+def test_open_breaker_fails_fast_and_query_errors_are_not_retried():
+    broken = FlakySource("snowflake", ConnectionError("down"))
+    executor = QueryExecutor(broken, None, breakers={"snowflake": CircuitBreaker("snowflake", failure_threshold=1)})
+    for _ in range(2):
+        # The retry after the first failure already finds the breaker open.
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(executor.execute("SELECT 1", "snowflake", "analyst"))
+    assert broken.calls == 1
+
+    bad_sql = FlakySource("snowflake", ValueError("invalid identifier"))
+    executor = QueryExecutor(bad_sql, None, max_attempts=3)
+    with pytest.raises(ValueError):
+        asyncio.run(executor.execute("SELECT nope", "snowflake", "analyst"))
+    assert bad_sql.calls == 1
+    assert executor.breaker_states()["snowflake"]["state"] == "closed"
+
+
+def test_conductor_skips_sql_repair_when_the_source_is_down():
+    memory = MemoryManager()
+    executor = QueryExecutor(
+        FlakySource("snowflake", ConnectionError("down")),
+        None,
+        breakers={"snowflake": CircuitBreaker("snowflake", failure_threshold=1)},
+    )
+    conductor = ConductorGraph(
+        schema_service=SchemaDiscoveryService(BASE_DIR / "src" / "fia_agent" / "data" / "sample_schema.yaml"),
+        generator=QueryGenerationAgent(translator=Text2SQLTranslator(), memory=memory),
+        verifier=QueryVerificationAgent(executor=executor, security=RBACService(Settings())),
+        visualizer=VisualizationAgent(),
+        memory=memory,
+        audit=AuditService(),
+    )
+    request = QueryRequest(question="Show revenue by segment", user_id="u", role="analyst", preferred_source="snowflake")
+
+    response = asyncio.run(conductor.run(request))
+
+    assert response.self_corrections == []
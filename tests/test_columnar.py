@@ -0,0 +1,31 @@
+import numpy as np
+
+from fia_agent.columnar import ColumnarRows
+from fia_agent.config import Settings
+from fia_agent.models import QueryExecutionResult
+from fia_agent.services.security import RBACService
+
+
+def test_round_trip_and_typed_columns():
+    rows = [{"segment": "Cloud", "revenue_usd": 1.5}, {"segment": "Payments", "revenue_usd": 2}, {"geo": "EMEA"}]
+    table = ColumnarRows.from_rows(rows)
+
+    assert table.columns == ("segment", "revenue_usd", "geo")
+    assert table.to_rows() == [
+        {"segment": "Cloud", "revenue_usd": 1.5, "geo": None},
+        {"segment": "Payments", "revenue_usd": 2, "geo": None},
+        {"segment": None, "revenue_usd": None, "geo": "EMEA"},
+    ]
+    numeric = ColumnarRows.from_columns({"revenue_usd": [1, 2.5]}).numeric("revenue_usd")
+    assert isinstance(numeric, np.ndarray) and numeric.dtype == np.float64
+
+
+def test_redaction_shares_untouched_columns_and_serializes_as_rows():
+    table = ColumnarRows.from_columns({"name": ["a", "b"], "salary": [10, 20]})
+    redacted = RBACService(Settings()).redact_columns(table, {"salary", "ssn"})
+
+    assert redacted.column("name") is table.column("name")
+    assert list(table.column("salary")) == [10, 20]
+    result = QueryExecutionResult(rows=redacted, row_count=2)
+    assert result.model_dump()["rows"] == [{"name": "a", "salary": "***"}, {"name": "b", "salary": "***"}]
+    assert QueryExecutionResult(rows=[{"x": 1}]).rows.column("x").tolist() == [1]
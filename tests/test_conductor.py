@@ -0,0 +1,97 @@
+import asyncio
+
+from fia_agent.agents.conductor import ConductorGraph
+from fia_agent.agents.query_generator import QueryGenerationAgent
+from fia_agent.agents.verifier import QueryVerificationAgent
+from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.config import BASE_DIR, Settings
+from fia_agent.models import QueryRequest
+from fia_agent.services.audit import AuditService
+from fia_agent.services.memory import MemoryManager
+from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.schema_discovery import SchemaDiscoveryService
+from fia_agent.services.security import RBACService
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+
+class CountingTranslator(Text2SQLTranslator):
+    calls = 0
+
+    async def generate_sql(self, question, schema, history=None):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return await super().generate_sql(question, schema, history)
+
+
+def build_conductor(translator: Text2SQLTranslator) -> tuple[ConductorGraph, MemoryManager, AuditService]:
+    memory = MemoryManager()
+    audit = AuditService()
+    conductor = ConductorGraph(
+        schema_service=SchemaDiscoveryService(BASE_DIR / "src" / "fia_agent" / "data" / "sample_schema.yaml"),
+        generator=QueryGenerationAgent(translator=translator, memory=memory),
+        verifier=QueryVerificationAgent(executor=QueryExecutor(None, None), security=RBACService(Settings())),
+        visualizer=VisualizationAgent(),
+        memory=memory,
+        audit=audit,
+    )
+    return conductor, memory, audit
+
+
+def test_identical_questions_share_one_pipeline_run():
+    translator = CountingTranslator()
+    conductor, memory, audit = build_conductor(translator)
+    requests = [
+        QueryRequest(question=f"Show revenue  by segment{' ' * i}", user_id=f"user-{i}", role="analyst")
+        for i in range(4)
+    ]
+
+    responses = asyncio.run(_gather(conductor, requests))
+
+    assert translator.calls == 1
+    assert len({response.sql_query for response in responses}) == 1
+    assert conductor.stats()["coalesced"] == 3
+    assert {record.user_id for record in audit.recent()} == {f"user-{i}" for i in range(4)}
+    assert all(asyncio.run(memory.recall_long_term(f"user-{i}")) for i in range(4))
+
+
+async def _gather(conductor: ConductorGraph, requests: list[QueryRequest]):
+    return await asyncio.gather(*(conductor.run(request) for request in requests))
+
+
+def test_stream_yields_metadata_rows_then_summary():
+    conductor, memory, audit = build_conductor(Text2SQLTranslator())
+    request = QueryRequest(question="Show revenue by segment", user_id="streamer", role="analyst")
+
+    async def collect():
+        return [frame async for frame in conductor.stream(request, batch_size=1)]
+
+    frames = asyncio.run(collect())
+
+    assert [frame["type"] for frame in frames] == ["metadata", "rows", "summary"]
+    assert frames[0]["sql_query"].startswith("SELECT")
+    assert frames[-1]["row_count"] == 2
+    assert frames[-1]["time_to_first_row_ms"] is not None
+    assert audit.recent(1)[0].status == "success"
+
+
+def test_run_many_dedupes_and_yields_every_item():
+    translator = CountingTranslator()
+    conductor, memory, audit = build_conductor(translator)
+    questions = ["Show revenue by segment", "Show EBITDA by quarter", "show revenue  by segment", "Top segments"]
+    requests = [
+        QueryRequest(question=question, user_id=f"user-{index}", role="analyst")
+        for index, question in enumerate(questions)
+    ]
+    requests.append(QueryRequest(question="Drop everything", user_id="intruder", role="guest"))
+
+    async def collect():
+        return [frame async for frame in conductor.run_many(requests, concurrency=2)]
+
+    frames = asyncio.run(collect())
+
+    assert sorted(frame["index"] for frame in frames) == list(range(5))
+    assert translator.calls == 4
+    by_index = {frame["index"]: frame for frame in frames}
+    assert by_index[0]["response"].sql_query == by_index[2]["response"].sql_query
+    assert by_index[4]["status"] == "error" and by_index[4]["status_code"] == 403
+    assert len(audit.recent(10)) == 5
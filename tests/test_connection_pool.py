@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import pytest
+
+from fia_agent.config import Settings
+from fia_agent.services.connection_pool import AsyncConnectionPool, PoolTimeoutError
+from fia_agent.services.fakes import FakeConnector
+from fia_agent.services.snowflake_client import SnowflakeClient
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _query(connection, sql: str = "select revenue_usd from financials_quarterly"):
+    cursor = connection.cursor()
+    cursor.execute(sql)
+    return cursor.fetchall()
+
+
+def test_pool_bounds_concurrency_and_reuses_connections():
+    connector = FakeConnector(query_latency=0.01)
+
+    async def scenario():
+        pool = AsyncConnectionPool(connector, max_size=4, min_size=2, io_threads=16)
+        await pool.start()
+
+        async def one():
+            async with pool.connection() as connection:
+                return await pool.run(_query, connection)
+
+        results = await asyncio.gather(*(one() for _ in range(40)))
+        stats = pool.stats()
+        await pool.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert all(len(rows) == 4 for rows in results)
+    assert connector.peak_queries <= 4
+    assert stats["created"] == 4
+    assert stats["acquired"] == 40
+    assert connector.open_connections == 0
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    async def scenario():
+        pool = AsyncConnectionPool(FakeConnector(), max_size=1, min_size=0, acquire_timeout=0.05)
+        held = await pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            await pool.acquire()
+        pool.release(held)
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    assert asyncio.run(scenario())["timeouts"] == 1
+
+
+def test_unhealthy_idle_connections_are_replaced_and_idle_ones_reaped():
+    connector = FakeConnector()
+    clock = FakeClock()
+
+    async def scenario():
+        pool = AsyncConnectionPool(
+            connector, max_size=3, min_size=1, idle_timeout=60, health_check_interval=10, clock=clock
+        )
+        await pool.start()
+        held = [await pool.acquire() for _ in range(3)]
+        for pooled in held:
+            pool.release(pooled)
+        held[-1].connection.healthy = False
+        clock.now = 30.0
+        async with pool.connection() as connection:
+            replaced = connection is not held[-1].connection
+        clock.now = 120.0
+        reaped = await pool.reap_idle()
+        stats = pool.stats()
+        await pool.close()
+        return replaced, reaped, stats
+
+    replaced, reaped, stats = asyncio.run(scenario())
+    assert replaced
+    assert stats["health_failures"] == 1
+    assert reaped == 1
+    assert stats["open"] == 1
+
+
+def test_cancelled_caller_keeps_connection_until_thread_call_returns():
+    connector = FakeConnector()
+    gate = threading.Event()
+
+    async def scenario():
+        pool = AsyncConnectionPool(connector, max_size=2, min_size=1)
+        await pool.start()
+        entered = asyncio.Event()
+        used: list[object] = []
+
+        async def stuck():
+            async with pool.connection() as connection:
+                used.append(connection)
+                entered.set()
+                await pool.run(lambda conn: gate.wait(), connection)
+
+        task = asyncio.create_task(stuck())
+        await entered.wait()
+        await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        held = pool.stats()
+        async with pool.connection() as other:
+            reused = other is used[0]
+        gate.set()
+        for _ in range(100):
+            if pool.stats()["in_use"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        stats = pool.stats()
+        await pool.close()
+        return held, reused, stats
+
+    held, reused, stats = asyncio.run(scenario())
+    assert held["in_use"] == 1 and held["idle"] == 0
+    assert not reused
+    assert stats["in_use"] == 0 and stats["idle"] == 2
+
+
+def test_snowflake_client_streams_through_pool():
+    connector = FakeConnector(row_count=1200)
+    settings = Settings(
+        SNOWFLAKE_ACCOUNT="acct", SNOWFLAKE_USER="svc", SNOWFLAKE_PASSWORD="secret", WAREHOUSE_POOL_SIZE=2
+    )
+
+    async def scenario():
+        client = SnowflakeClient(settings, connector=connector)
+        await client.start()
+        batches = [len(batch) async for batch in client.stream("select * from financials_quarterly", 500)]
+        result = await client.execute("select * from financials_quarterly")
+        tables = await client.describe()
+        marker = await client.schema_marker()
+        stats = client.pool_stats()
+        await client.close()
+        return batches, result, tables, marker, stats
+
+    batches, result, tables, marker, stats = asyncio.run(scenario())
+    assert batches == [500, 500, 200]
+    assert result.row_count == 1200 and result.rows.numeric("revenue_usd") is not None
+    assert [table.name for table in tables] == ["financials_quarterly", "guidance"]
+    assert marker == connector.catalog_version
+    assert stats["created"] == 1
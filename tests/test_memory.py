@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from fia_agent.config import Settings
+from fia_agent.services.fakes import FakeRedis
+from fia_agent.services.memory import InProcessMemoryBackend, MemoryManager, RedisMemoryBackend
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_in_process_memory_evicts_idle_lru_and_oversized_state():
+    clock = FakeClock()
+    backend = InProcessMemoryBackend(max_turns=2, max_sessions=2, session_ttl=60, max_bytes=1_000, clock=clock)
+    memory = MemoryManager(backend)
+
+    async def scenario():
+        for turn in range(3):
+            await memory.capture_turn("s1", "user", f"q{turn}")
+        await memory.capture_turn("s2", "user", "hello")
+        await memory.capture_turn("s3", "user", "hello")  # over max_sessions: s1 is least recently used
+        evicted = await memory.recall_short_term("s1")
+        clock.now = 61
+        await memory.capture_turn("s4", "user", "hello")  # s2 and s3 are idle past the TTL
+        for _ in range(3):
+            await memory.record_success("u", "SELECT 1")
+        live = await memory.recall("s4", "u")
+        await memory.record_success("u", "x" * 990)  # over the global cap: sessions are shed first
+        return evicted, live, await memory.recall("s4", "u")
+
+    evicted, live, (short, long) = asyncio.run(scenario())
+    assert evicted == []
+    assert live == (["user: hello"], ["SELECT 1"])
+    assert short == [] and long == ["SELECT 1", "x" * 990]
+    stats = memory.stats()
+    assert stats["expired"] == 2 and stats["evicted"] == 2 and stats["bytes"] <= 1_000
+
+
+def test_redis_backend_shares_memory_across_workers_in_one_round_trip():
+    clock = FakeClock()
+    server = FakeRedis(clock=clock)
+    worker_a = MemoryManager(RedisMemoryBackend(server, max_turns=2, session_ttl=60))
+    worker_b = MemoryManager(RedisMemoryBackend(server, max_turns=2, session_ttl=60))
+
+    async def scenario():
+        for turn in range(3):
+            await worker_a.capture_turn("s1", "user", f"q{turn}")
+        await worker_a.record_success("u", "SELECT 1")
+        await worker_a.record_success("u", "SELECT 1")
+        before = server.round_trips
+        recalled = await worker_b.recall("s1", "u")
+        trips = server.round_trips - before
+        clock.now = 61
+        return recalled, trips, await worker_b.recall("s1", "u")
+
+    (short, long), trips, (expired_short, _) = asyncio.run(scenario())
+    assert short == ["summary: 1 earlier turn | asked: q0", "user: q1", "user: q2"] and long == ["SELECT 1"]
+    assert trips == 1
+    assert expired_short == []
+
+
+def test_session_recall_is_a_cached_summary_plus_recent_turns():
+    memory = MemoryManager(InProcessMemoryBackend(max_turns=3))
+
+    async def scenario():
+        for turn in range(200):
+            await memory.capture_turn("s1", "user", f"revenue for region {turn}")
+            await memory.capture_turn("s1", "assistant", f"SELECT * FROM sales_{turn % 12} LIMIT 10")
+        first = await memory.recall_short_term("s1")
+        again = await memory.recall_short_term("s1")
+        await memory.capture_turn("s1", "user", "and margins?")
+        return first, again, await memory.recall_short_term("s1")
+
+    first, again, after = asyncio.run(scenario())
+    assert len(first) == 4 and first[0].startswith("summary: 397 earlier turns | asked: revenue for region 196;")
+    assert "tables: " in first[0] and first[0].count("sales_") == 8
+    assert first[1:] == ["assistant: SELECT * FROM sales_6 LIMIT 10", "user: revenue for region 199",
+                         "assistant: SELECT * FROM sales_7 LIMIT 10"]
+    assert again is first
+    assert after is not first and after[-1] == "user: and margins?"
+
+
+def test_redis_backend_degrades_to_empty_context_when_unreachable():
+    class DownPipeline:
+        def __getattr__(self, name):
+            return lambda *args: self
+
+        async def execute(self):
+            raise ConnectionError("redis down")
+
+    class DownRedis:
+        def pipeline(self, transaction=True):
+            return DownPipeline()
+
+    backend = RedisMemoryBackend(DownRedis())
+    assert asyncio.run(MemoryManager(backend).recall("s1", "u")) == ([], [])
+    assert backend.stats()["errors"] == 1
+
+
+def test_long_term_recall_returns_most_relevant_past_queries():
+    memory = MemoryManager(recall_top_k=2)
+    history = [
+        ("Show revenue by segment", "SELECT segment, SUM(revenue_usd) FROM financials_quarterly GROUP BY segment"),
+        ("Latest revenue guidance", "SELECT revenue_low, revenue_high FROM guidance"),
+        ("EBITDA by geography", "SELECT geo, SUM(ebitda_usd) FROM financials_quarterly GROUP BY geo"),
+    ] + [(f"Unrelated question {i}", f"SELECT col_{i} FROM other_{i}") for i in range(40)]
+
+    async def scenario():
+        for question, sql in history:
+            await memory.record_success("u", sql, question)
+        first = await memory.recall_long_term("u", "ebitda per geo for 2024")
+        second = await memory.recall_long_term("u", "what is the revenue guidance")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    # Unrelated history falls below the relevance floor and is not replayed at all.
+    assert first == ["-- EBITDA by geography\nSELECT geo, SUM(ebitda_usd) FROM financials_quarterly GROUP BY geo"]
+    assert len(second) == 2 and second[-1] == "-- Latest revenue guidance\nSELECT revenue_low, revenue_high FROM guidance"
+    # Signatures are computed once per stored entry, not once per recall.
+    assert memory.stats()["computed"] == len(history)
+
+
+def test_zero_turn_limits_are_rejected_or_clamped():
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None, MEMORY_MAX_TURNS=0)
+    memory = MemoryManager(InProcessMemoryBackend(max_turns=0, max_patterns=0))
+
+    async def scenario():
+        for turn in range(3):
+            await memory.capture_turn("s1", "user", f"q{turn}")
+            await memory.record_success("u", f"SELECT {turn}")
+        return await memory.recall("s1", "u")
+
+    short, long = asyncio.run(scenario())
+    assert short[-1] == "user: q2" and long == ["SELECT 2"]
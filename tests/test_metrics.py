@@ -0,0 +1,36 @@
+import pytest
+
+from fia_agent.services.metrics import StageMetrics
+
+
+def test_stage_percentiles_and_target_in_exposition():
+    metrics = StageMetrics(latency_target_ms=100)
+    for ms in range(1, 101):
+        metrics.observe("generate_sql", float(ms), "snowflake", "analyst")
+    metrics.observe("generate_sql", 250.0, "snowflake", "analyst")
+    with metrics.span("execute_sql", "auto", "cfo") as span:
+        span.source = "athena"
+
+    text = metrics.render()
+
+    assert metrics.quantile("generate_sql", 0.5, "snowflake", "analyst") == pytest.approx(51, rel=0.03)
+    assert metrics.quantile("execute_sql", 0.5, "athena", "cfo") is not None
+    labels = 'stage="generate_sql",source="snowflake",role="analyst"'
+    assert f"fia_stage_duration_ms_count{{{labels}}} 101" in text
+    assert f"fia_stage_over_target_total{{{labels}}} 1" in text
+    assert f'fia_stage_duration_ms{{{labels},quantile="0.99"}}' in text
+    assert "# TYPE fia_stage_duration_ms summary" in text
+
+
+def test_collectors_become_labelled_gauges():
+    metrics = StageMetrics()
+    metrics.register("scheduler", lambda: {"running": 2, "queued_by_priority": {"batch": 3}, "name": "x"})
+    metrics.register("pool", lambda: {"snow\"flake": {"in_use": 1, "durable": True}}, label="source")
+
+    text = metrics.render()
+
+    assert "fia_scheduler_running 2" in text
+    assert 'fia_scheduler_queued_by_priority{key="batch"} 3' in text
+    assert 'fia_pool_in_use{source="snow\\"flake"} 1' in text
+    assert 'fia_pool_durable{source="snow\\"flake"} 1' in text
+    assert "fia_scheduler_name" not in text
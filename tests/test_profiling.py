@@ -0,0 +1,67 @@
+import asyncio
+import time
+from datetime import timezone
+
+from fia_agent.services.profiling import ProfilingMiddleware, RequestProfiler
+
+
+def busy_pipeline(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    busy_pipeline(0.05)  # work after the endpoint returned, like a streamed body
+    await send({"type": "http.response.body", "body": b"{}", "more_body": False})
+
+
+def call(middleware, path: str, headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": path, "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+def test_header_triggers_capture_that_covers_the_whole_response():
+    profiler = RequestProfiler(interval_ms=1)
+    middleware = ProfilingMiddleware(app, profiler)
+
+    plain = call(middleware, "/query")
+    profiled = call(middleware, "/query", [(b"x-debug-profile", b"1")])
+    call(middleware, "/health", [(b"x-debug-profile", b"1")])
+
+    assert b"x-profile-id" not in plain
+    [capture] = profiler.captures()
+    assert profiled[b"x-profile-id"] == str(capture.id).encode()
+    assert capture.trigger == "header" and capture.status_code == 200
+    assert capture.samples > 0 and "busy_pipeline" in capture.collapsed()
+    assert capture.summary()["top_frames"]
+    assert capture.started_at.tzinfo is timezone.utc
+    assert profiler.stats()["active"] == 0
+    # The sampler is signalled, not joined; anything it records afterwards stays out of the capture.
+    collapsed = capture.collapsed()
+    busy_pipeline(0.01)
+    assert capture.collapsed() == collapsed
+
+
+def test_sample_rate_selects_requests_and_concurrency_is_capped():
+    profiler = RequestProfiler(sample_rate=1.0, max_captures=2, max_concurrent=1)
+    middleware = ProfilingMiddleware(app, profiler)
+
+    for _ in range(3):
+        call(middleware, "/query/stream")
+
+    assert [capture.trigger for capture in profiler.captures()] == ["sampled", "sampled"]
+    assert profiler.get(1) is None  # evicted, newest two kept
+    profile, sampler = profiler.begin("/query", "header")
+    assert profiler.should_profile(forced=True) is None and profiler.skipped == 1
+    profiler.end(profile, sampler, time.perf_counter())
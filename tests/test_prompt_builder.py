@@ -0,0 +1,75 @@
+import asyncio
+
+from fia_agent.agents.query_generator import QueryGenerationAgent
+from fia_agent.models import ColumnDefinition, TableDefinition
+from fia_agent.services.memory import MemoryManager
+from fia_agent.services.prompt_builder import PromptBuilder
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+
+def wide_catalog(tables: int = 300, columns: int = 60) -> list[TableDefinition]:
+    catalog = [
+        TableDefinition(
+            name=f"dim_table_{i}",
+            description="Warehouse dimension",
+            columns=[ColumnDefinition(name=f"attr_{j}", type="VARCHAR") for j in range(columns)],
+        )
+        for i in range(tables)
+    ]
+    catalog.append(
+        TableDefinition(
+            name="financials_quarterly",
+            description="Quarterly revenue by segment",
+            columns=[ColumnDefinition(name=f"filler_{j}", type="FLOAT") for j in range(columns)]
+            + [ColumnDefinition(name="revenue_usd", type="FLOAT"), ColumnDefinition(name="segment", type="VARCHAR")],
+        )
+    )
+    return catalog
+
+
+def test_prompt_keeps_relevant_tables_and_columns_within_budget():
+    builder = PromptBuilder(token_budget=400, max_tables=3, max_columns=10, history_share=0.25)
+    catalog = wide_catalog()
+    session = [f"user: turn {i} " + "x" * 80 for i in range(20)]
+
+    context = builder.build("Show revenue by segment", catalog, session=session, fingerprint="v1")
+    again = builder.build("Show revenue by segment", catalog, fingerprint="v1")
+
+    assert context.tables[0].name == "financials_quarterly"
+    assert len(context.tables) <= 3
+    columns = [column.name for column in context.tables[0].columns]
+    assert {"revenue_usd", "segment"} <= set(columns) and len(columns) <= 10
+    assert context.history and context.history[-1] == session[-1]
+    assert context.history_tokens <= 100 and context.dropped_history > 0
+    assert context.tokens <= 400
+    assert again.schema_text == context.schema_text
+    assert builder.stats()["render_misses"] == 1
+
+
+def test_generator_reports_prompt_tokens_and_passes_pruned_schema():
+    seen: list[list[str]] = []
+
+    class RecordingTranslator(Text2SQLTranslator):
+        async def generate_sql(self, question, schema, history=None, **kwargs):
+            seen.append([table.name for table in schema])
+            return await super().generate_sql(question, schema, history, **kwargs)
+
+    translator = RecordingTranslator()
+    builder = PromptBuilder(max_tables=2)
+    generator = QueryGenerationAgent(translator=translator, memory=MemoryManager(), prompts=builder)
+    catalog = wide_catalog()
+    stats: dict[str, int] = {}
+
+    async def scenario():
+        return [
+            await generator.run(question, catalog, session_id=None, user_id="u", schema_fingerprint="fp", stats=stats)
+            for question in ("Show revenue by segment", "Show revenue by segment for 2024 Q1")
+        ]
+
+    (sql, _), _ = asyncio.run(scenario())
+
+    assert "financials_quarterly" in sql
+    assert seen[0][0] == "financials_quarterly" and len(seen[0]) <= 2
+    assert stats["prompt_tokens"] > 0
+    # Tables are ranked with the builder's per-snapshot index, not one rebuilt over each pruned list.
+    assert translator._index is None and builder.stats()["render_misses"] == 1
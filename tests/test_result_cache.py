@@ -0,0 +1,34 @@
+import asyncio
+
+from fia_agent.models import QueryExecutionResult
+from fia_agent.services.result_cache import QueryResultCache, normalize_sql
+
+
+def test_normalize_sql_preserves_literals():
+    assert normalize_sql("SELECT  *\nFROM t WHERE s = 'Cloud ';") == "select * from t where s = 'Cloud '"
+
+
+def test_single_flight_and_role_isolation():
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+    calls = 0
+
+    async def loader() -> QueryExecutionResult:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return QueryExecutionResult(rows=[{"x": 1}], row_count=1)
+
+    async def scenario() -> None:
+        key = cache.make_key("SELECT 1", "auto", "analyst")
+        results = await asyncio.gather(*(cache.get_or_load(key, loader) for _ in range(5)))
+        assert calls == 1
+        assert sum(result.cache_hit for result in results) == 4
+        assert (await cache.get_or_load(key, loader)).cache_hit
+        await cache.get_or_load(cache.make_key("select 1", "auto", "admin"), loader)
+        assert calls == 2
+        cache.invalidate()
+        await cache.get_or_load(key, loader)
+        assert calls == 3
+
+    asyncio.run(scenario())
+    assert cache.stats()["hits"] == 1
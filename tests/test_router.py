@@ -0,0 +1,100 @@
+import asyncio
+
+import numpy as np
+
+from fia_agent.models import QueryExecutionResult
+from fia_agent.services.latency import LatencySketch
+from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.router import SourceRouter, referenced_tables
+
+
+class StubCatalog:
+    def __init__(self, owners: dict[str, frozenset[str]]) -> None:
+        self.owners = owners
+
+    def sources_for(self, table: str) -> frozenset[str]:
+        return self.owners.get(table, frozenset())
+
+
+class SlowSource:
+    enabled = True
+
+    def __init__(self, name: str, delay: float) -> None:
+        self.name = name
+        self.delay = delay
+        self.cancelled = 0
+
+    async def execute(self, sql: str) -> QueryExecutionResult:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return QueryExecutionResult(rows=[{"value": 1}], row_count=1, source=self.name)
+
+
+class FailingSource(SlowSource):
+    async def execute(self, sql: str) -> QueryExecutionResult:
+        raise ConnectionError(f"{self.name} unreachable")
+
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    values = np.random.default_rng(7).lognormal(mean=4, sigma=1, size=5000)
+    sketch = LatencySketch(relative_accuracy=0.02, window=10_000)
+    for value in values:
+        sketch.add(float(value))
+
+    for q in (0.5, 0.95, 0.99):
+        exact = float(np.quantile(values, q, method="lower"))
+        assert abs(sketch.quantile(q) - exact) / exact < 0.03
+
+
+def test_router_prefers_fastest_source_that_holds_every_table():
+    catalog = StubCatalog({"ledger": frozenset({"athena"}), "financials_quarterly": frozenset({"snowflake", "athena"})})
+    router = SourceRouter(catalog)
+    for _ in range(5):
+        router.observe("snowflake", 200, ok=True)
+        router.observe("athena", 50, ok=True)
+    router.observe("athena", 50, ok=False)
+
+    assert referenced_tables('SELECT * FROM finance."Ledger" l JOIN financials_quarterly f ON 1=1') == {
+        "ledger",
+        "financials_quarterly",
+    }
+    assert router.rank("SELECT * FROM financials_quarterly", ["snowflake", "athena"]) == ["athena", "snowflake"]
+    assert router.rank("SELECT * FROM ledger", ["snowflake", "athena"]) == ["athena"]
+    for _ in range(10):
+        router.observe("athena", 50, ok=False)
+    assert router.rank("SELECT * FROM financials_quarterly", ["snowflake", "athena"])[0] == "snowflake"
+
+
+def test_hedged_request_returns_first_answer_and_cancels_the_other():
+    router = SourceRouter(min_samples=5)
+    for _ in range(5):
+        router.observe("snowflake", 10, ok=True)
+        router.observe("athena", 30, ok=True)
+    snowflake, athena = SlowSource("snowflake", delay=1.0), SlowSource("athena", delay=0.02)
+    executor = QueryExecutor(snowflake, athena, router=router)
+
+    async def scenario():
+        result = await executor.execute("SELECT 1", "auto", "analyst")
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(scenario())
+    assert result.source == "athena"
+    assert snowflake.cancelled == 1
+    assert router.stats()["athena"]["hedge_wins"] == 1
+
+
+def test_hedged_primary_failing_fast_fails_over_to_secondary():
+    router = SourceRouter(min_samples=5)
+    for _ in range(5):
+        router.observe("snowflake", 100, ok=True)
+        router.observe("athena", 300, ok=True)
+    snowflake, athena = FailingSource("snowflake", delay=0), SlowSource("athena", delay=0.01)
+    executor = QueryExecutor(snowflake, athena, router=router, max_attempts=1)
+
+    result = asyncio.run(executor.execute("SELECT 1", "auto", "analyst"))
+
+    assert result.source == "athena"
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from fia_agent.mcp.tools import QueryTool
+from fia_agent.models import QueryExecutionResult, QueryRequest, QueryResponse, VisualizationSpec
+from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.result_cache import QueryResultCache
+from fia_agent.services.scheduler import AdmissionScheduler
+
+
+def test_interactive_waiters_are_admitted_before_batch_and_mcp():
+    scheduler = AdmissionScheduler(global_limit=1, per_user_limit=4)
+    order: list[str] = []
+
+    async def job(user: str, priority: str, hold: asyncio.Event | None = None):
+        async with scheduler.slot(user, "analyst", priority):
+            order.append(user)
+            if hold is not None:
+                await hold.wait()
+
+    async def scenario():
+        hold = asyncio.Event()
+        first = asyncio.create_task(job("first", "interactive", hold))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(job("mcp", "mcp")),
+            asyncio.create_task(job("batch", "batch")),
+            asyncio.create_task(job("interactive", "interactive")),
+        ]
+        await asyncio.sleep(0.01)
+        queued = scheduler.stats()["queued"]
+        hold.set()
+        await asyncio.gather(first, *waiters)
+        return queued
+
+    assert asyncio.run(scenario()) == 3
+    assert order == ["first", "interactive", "batch", "mcp"]
+    assert scheduler.stats()["admitted"] == 4
+
+
+def test_busy_user_does_not_block_other_users():
+    scheduler = AdmissionScheduler(global_limit=4, per_user_limit=1)
+
+    async def scenario():
+        hold = asyncio.Event()
+
+        async def job(user: str):
+            async with scheduler.slot(user, "analyst"):
+                await hold.wait()
+
+        tasks = [asyncio.create_task(job("alice")), asyncio.create_task(job("alice"))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(job("bob")))
+        await asyncio.sleep(0.01)
+        stats = scheduler.stats()
+        hold.set()
+        await asyncio.gather(*tasks)
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["running"] == 2
+    assert stats["queued"] == 1
+
+
+def test_sheds_load_with_429_and_retry_after():
+    scheduler = AdmissionScheduler(global_limit=1, queue_timeout=0.05, max_queue_depth=1)
+
+    async def scenario():
+        hold = asyncio.Event()
+
+        async def job(user: str):
+            async with scheduler.slot(user, "analyst"):
+                await hold.wait()
+
+        async with scheduler.slot("warmup", "analyst"):
+            pass
+        running = asyncio.create_task(job("a"))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(job("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as full:
+            await job("c")
+        with pytest.raises(HTTPException) as timed_out:
+            await waiting
+        hold.set()
+        await running
+        return full.value, timed_out.value
+
+    full, timed_out = asyncio.run(scenario())
+    assert full.status_code == timed_out.status_code == 429
+    assert int(full.headers["Retry-After"]) >= 1
+    assert scheduler.stats()["rejected"] == 2
+    assert scheduler.stats()["timed_out"] == 1
+
+
+def test_cache_hits_do_not_take_execution_slots():
+    scheduler = AdmissionScheduler(global_limit=2)
+    executor = QueryExecutor(None, None, cache=QueryResultCache(), scheduler=scheduler)
+
+    async def scenario():
+        for _ in range(3):
+            await executor.execute("select 1", "auto", "analyst", user_id="alice")
+
+    asyncio.run(scenario())
+    assert scheduler.stats()["admitted"] == 1
+
+
+def test_mcp_query_tool_runs_at_mcp_priority():
+    class RecordingConductor:
+        def __init__(self) -> None:
+            self.requests: list[QueryRequest] = []
+
+        async def run(self, request: QueryRequest) -> QueryResponse:
+            self.requests.append(request)
+            execution = QueryExecutionResult(rows=[], row_count=0, source="snowflake")
+            return QueryResponse(
+                sql_query="SELECT 1",
+                execution=execution,
+                visualization=VisualizationSpec(kind="table", spec={}),
+                schema_used=[],
+            )
+
+    conductor = RecordingConductor()
+    asyncio.run(QueryTool(conductor)(question="Show revenue", user_id="agent", role="analyst"))
+    assert [request.priority for request in conductor.requests] == ["mcp"]
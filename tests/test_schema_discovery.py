@@ -0,0 +1,135 @@
+import asyncio
+import os
+from pathlib import Path
+
+from fia_agent.models import ColumnDefinition, TableDefinition
+from fia_agent.services.schema_discovery import SchemaDiscoveryService
+
+SCHEMA_YAML = """
+tables:
+  - name: financials_quarterly
+    columns:
+      - name: revenue_usd
+        type: FLOAT
+"""
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeWarehouse:
+    def __init__(self, tables: list[str], delay: float = 0.05) -> None:
+        self.tables = tables
+        self.delay = delay
+        self.fail = False
+
+    async def schema_marker(self) -> str | None:
+        return None
+
+    async def describe(self) -> list[TableDefinition]:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("warehouse unavailable")
+        return [TableDefinition(name=name, columns=[ColumnDefinition(name="id", type="NUMBER")]) for name in self.tables]
+
+
+def test_snapshot_versions_follow_schema_changes(tmp_path: Path):
+    path = tmp_path / "schema.yaml"
+    path.write_text(SCHEMA_YAML, encoding="utf-8")
+    clock = FakeClock()
+    service = SchemaDiscoveryService(path, ttl_seconds=10, clock=clock)
+    invalidations: list[int] = []
+    service.add_refresh_listener(lambda: invalidations.append(1))
+
+    async def scenario() -> None:
+        first = await service.get_snapshot()
+        assert first.version == 1
+        assert (await service.get_schema()) is first.tables
+
+        clock.now = 20
+        os.utime(path, ns=(1, 1))
+        await service.get_snapshot()  # stale read returns immediately, refresh runs in background
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert service.snapshot is first
+        assert service.loaded_at == 20
+
+        clock.now = 40
+        path.write_text(SCHEMA_YAML + "  - name: guidance\n", encoding="utf-8")
+        await service._reload()
+        changed = service.snapshot
+        assert changed.version == 2
+        assert [table.name for table in changed.tables] == ["financials_quarterly", "guidance"]
+
+    asyncio.run(scenario())
+    assert invalidations == [1]
+
+
+def test_sources_are_described_concurrently_into_per_source_views(tmp_path: Path):
+    path = tmp_path / "schema.yaml"
+    path.write_text(SCHEMA_YAML, encoding="utf-8")
+    service = SchemaDiscoveryService(
+        path,
+        snowflake_client=FakeWarehouse(["ledger", "trades"]),
+        athena_client=FakeWarehouse(["trades", "clickstream"]),
+    )
+
+    async def scenario() -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        merged = await service.get_snapshot("auto")
+        assert loop.time() - started < 0.09
+        assert [(table.name, table.source) for table in merged.tables] == [
+            ("ledger", "snowflake"),
+            ("trades", "snowflake"),
+            ("clickstream", "athena"),
+        ]
+        athena = await service.get_snapshot("athena")
+        assert [table.name for table in athena.tables] == ["trades", "clickstream"]
+        assert service.sources_for("TRADES") == {"snowflake", "athena"}
+
+    asyncio.run(scenario())
+
+
+def test_empty_or_slow_warehouse_falls_back_to_file(tmp_path: Path):
+    path = tmp_path / "schema.yaml"
+    path.write_text(SCHEMA_YAML, encoding="utf-8")
+    service = SchemaDiscoveryService(
+        path,
+        snowflake_client=FakeWarehouse(["ledger"], delay=1.0),
+        discovery_timeout=0.01,
+    )
+    snapshot = asyncio.run(service.get_snapshot("snowflake"))
+    assert snapshot.source == "file"
+    assert [table.name for table in snapshot.tables] == ["financials_quarterly"]
+
+
+def test_failed_refresh_keeps_the_last_warehouse_catalog(tmp_path: Path):
+    path = tmp_path / "schema.yaml"
+    path.write_text(SCHEMA_YAML, encoding="utf-8")
+    snowflake = FakeWarehouse(["ledger"], delay=0)
+    athena = FakeWarehouse(["clickstream"], delay=0)
+    service = SchemaDiscoveryService(path, snowflake_client=snowflake, athena_client=athena)
+    invalidations: list[int] = []
+    service.add_refresh_listener(lambda: invalidations.append(1))
+
+    async def scenario():
+        before = {view: await service.get_snapshot(view) for view in ("snowflake", "athena", "auto")}
+        snowflake.fail = True
+        await service._reload(force=True)
+        after = {view: await service.get_snapshot(view) for view in ("snowflake", "athena", "auto")}
+        snowflake.fail = False
+        snowflake.tables = ["ledger", "trades"]
+        await service._reload(force=True)
+        return before, after, await service.get_snapshot("snowflake")
+
+    before, after, recovered = asyncio.run(scenario())
+    assert all(after[view] is before[view] for view in before)
+    assert service.sources_for("ledger") == {"snowflake"}
+    assert [table.name for table in recovered.tables] == ["ledger", "trades"] and recovered.version == 2
+    assert invalidations == []
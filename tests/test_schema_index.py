@@ -0,0 +1,35 @@
+from fia_agent.models import ColumnDefinition, TableDefinition
+from fia_agent.services.schema_index import SchemaIndex
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+schema = [
+    TableDefinition(
+        name="financials_quarterly",
+        description="Quarterly revenue and segment metrics.",
+        columns=[ColumnDefinition(name="segment", type="STRING"), ColumnDefinition(name="revenue_usd", type="FLOAT")],
+    ),
+    TableDefinition(
+        name="guidance",
+        description="Forward-looking guidance figures.",
+        columns=[ColumnDefinition(name="revenue_low", type="FLOAT")],
+    ),
+    TableDefinition(name="payroll", columns=[ColumnDefinition(name="salary", type="FLOAT")]),
+]
+
+
+def test_rank_prefers_name_then_columns():
+    index = SchemaIndex(schema)
+    assert index.best("What is the latest guidance?") == "guidance"
+    assert index.best("average salaries") == "payroll"
+    assert [name for name, _ in index.rank("revenue by segment")][:2] == ["financials_quarterly", "guidance"]
+    assert index.rank("weather forecast") == []
+
+
+def test_index_rebuilt_only_when_schema_changes():
+    translator = Text2SQLTranslator()
+    assert translator._pick_table("guidance please", schema) == "guidance"
+    first = translator._index
+    translator._pick_table("revenue", schema)
+    assert translator._index is first
+    translator._pick_table("revenue", list(schema))
+    assert translator._index is not first
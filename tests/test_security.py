@@ -0,0 +1,44 @@
+from fia_agent.columnar import ColumnarRows
+from fia_agent.config import BASE_DIR, Settings
+from fia_agent.services.security import RBACService, load_policies
+
+POLICIES = load_policies(BASE_DIR / "src" / "fia_agent" / "data" / "redaction_policies.yaml")
+
+
+def test_role_policy_is_compiled_once_per_column_set():
+    security = RBACService(Settings(), policies=POLICIES)
+    rows = ColumnarRows.from_rows(
+        [
+            {"customer_name": "Ada", "client_email": "a@x.io", "salary": 10, "api_secret": "s", "revenue_usd": 5.0},
+            {"customer_name": "Bob", "client_email": "a@x.io", "salary": 20, "api_secret": "t", "revenue_usd": 7.0},
+        ]
+    )
+
+    compiled = security.compile_policy("analyst", rows.columns)
+    assert security.compile_policy("ANALYST", rows.columns) is compiled
+    assert [name for name, _ in compiled.transforms] == ["customer_name", "client_email", "salary"]
+    assert compiled.drops == ("api_secret",)
+
+    redacted = security.redact(rows, "analyst")
+    assert redacted.columns == ("customer_name", "client_email", "salary", "revenue_usd")
+    assert list(redacted.column("customer_name")) == ["A", "B"]
+    assert list(redacted.column("salary")) == ["***", "***"]
+    emails = list(redacted.column("client_email"))
+    assert emails[0] == emails[1] and len(emails[0]) == 64
+    assert redacted.column("revenue_usd") is rows.column("revenue_usd")
+
+
+def test_unknown_roles_fall_back_to_default_policy():
+    security = RBACService(Settings(), policies={})
+    rows = ColumnarRows.from_rows([{"ssn": "123", "segment": "Cloud"}])
+    assert security.redact(rows, "auditor").to_rows() == [{"ssn": "***", "segment": "Cloud"}]
+
+
+def test_admin_policy_hashes_ssn_and_still_masks_salary():
+    security = RBACService(Settings(), policies=POLICIES)
+    rows = ColumnarRows.from_rows([{"ssn": "123", "salary": 10, "client_email": "a@x.io", "segment": "Cloud"}])
+
+    redacted = security.redact(rows, "admin").to_rows()[0]
+
+    assert len(redacted.pop("ssn")) == 64
+    assert redacted == {"salary": "***", "client_email": "a@x.io", "segment": "Cloud"}
@@ -0,0 +1,114 @@
+import asyncio
+
+from fia_agent.agents.conductor import ConductorGraph
+from fia_agent.agents.query_generator import QueryGenerationAgent
+from fia_agent.agents.verifier import QueryVerificationAgent
+from fia_agent.agents.visualizer import VisualizationAgent
+from fia_agent.config import BASE_DIR, Settings
+from fia_agent.models import ColumnDefinition, QueryExecutionResult, QueryRequest, TableDefinition
+from fia_agent.services.audit import AuditService
+from fia_agent.services.memory import MemoryManager
+from fia_agent.services.query_executor import QueryExecutor
+from fia_agent.services.schema_discovery import SchemaDiscoveryService
+from fia_agent.services.security import RBACService
+from fia_agent.services.sql_validator import SqlValidator
+from fia_agent.services.text2sql import Text2SQLTranslator
+
+SCHEMA_PATH = BASE_DIR / "src" / "fia_agent" / "data" / "sample_schema.yaml"
+
+
+def sample_tables():
+    return asyncio.run(SchemaDiscoveryService(SCHEMA_PATH).get_snapshot("auto")).tables
+
+
+class RecordingSource:
+    name = "snowflake"
+    enabled = True
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, sql: str) -> QueryExecutionResult:
+        self.statements.append(sql)
+        return QueryExecutionResult(rows=[{"segment": "cloud", "revenue": 1.0}], row_count=1, source=self.name)
+
+
+class TypoTranslator(Text2SQLTranslator):
+    def __init__(self) -> None:
+        super().__init__()
+        self.repairs: list[list] = []
+
+    async def generate_sql(self, question, schema, history=None):
+        return "SELECT segmnt, SUM(revenue_usd) AS revenue FROM financials_quarterly GROUP BY segmnt", "typo"
+
+    async def repair_sql(self, question, schema, error, previous_sql, issues=()):
+        self.repairs.append(list(issues))
+        return await super().repair_sql(question, schema, error, previous_sql, issues)
+
+
+def test_validator_rejects_writes_and_unknown_references():
+    validator = SqlValidator()
+    tables = sample_tables()
+
+    def codes(sql: str) -> list[str]:
+        return [issue.code for issue in validator.validate(sql, tables, "v1")]
+
+    assert codes("SELECT segment, SUM(revenue_usd) AS total FROM financials_quarterly GROUP BY segment ORDER BY total") == []
+    assert codes("WITH q AS (SELECT segment s FROM financials_quarterly) SELECT s FROM q") == []
+    assert codes("SELECT f.segment, g.revenue_low FROM financials_quarterly f JOIN guidance g ON 1 = 1") == []
+    assert codes("DELETE FROM guidance") == ["not_select"]
+    assert codes("SELECT 1; DROP TABLE guidance") == ["multiple_statements"]
+    assert codes("SELECT (1") == ["syntax"]
+    assert codes("SELECT * FROM financials_quartely") == ["unknown_table"]
+    issue = validator.validate("SELECT f.segmnt FROM financials_quarterly f", tables, "v1")[0]
+    assert (issue.code, issue.reference, issue.suggestion) == ("unknown_column", "segmnt", "segment")
+    assert validator.stats()["round_trips_saved"] == 5
+
+
+def test_validator_accepts_niladic_functions_and_columns_named_like_statements():
+    validator = SqlValidator()
+    tables = [
+        *sample_tables(),
+        TableDefinition(
+            name="journal_entries",
+            columns=[ColumnDefinition(name=name, type="varchar") for name in ("update", "copy", "call", "amount")],
+        ),
+    ]
+
+    def codes(sql: str) -> list[str]:
+        return [issue.code for issue in validator.validate(sql, tables, "v1")]
+
+    assert codes("SELECT segment, CURRENT_USER FROM financials_quarterly") == []
+    assert codes("SELECT segment, current_role, sysdate FROM financials_quarterly WHERE fiscal_quarter <= CURRENT_DATE") == []
+    assert codes("SELECT update, copy, call FROM journal_entries WHERE (copy IS NOT NULL) ORDER BY update") == []
+    assert codes("SELECT j.update, COUNT(call) FROM journal_entries j GROUP BY j.update") == []
+    assert codes("WITH q AS (DELETE FROM guidance) SELECT 1") == ["not_select"]
+    assert codes("WITH q AS (SELECT amount FROM journal_entries) UPDATE journal_entries SET amount = 0") == ["not_select"]
+    assert codes("SELECT amount FROM journal_entries WHERE amount IN (CALL refresh_ledger())") == ["not_select"]
+    assert codes("SELECT bogus FROM journal_entries") == ["unknown_column"]
+
+
+def test_preflight_repairs_without_touching_the_warehouse():
+    source = RecordingSource()
+    memory = MemoryManager()
+    translator = TypoTranslator()
+    validator = SqlValidator()
+    conductor = ConductorGraph(
+        schema_service=SchemaDiscoveryService(SCHEMA_PATH),
+        generator=QueryGenerationAgent(translator=translator, memory=memory),
+        verifier=QueryVerificationAgent(executor=QueryExecutor(source, None), security=RBACService(Settings())),
+        visualizer=VisualizationAgent(),
+        memory=memory,
+        audit=AuditService(),
+        validator=validator,
+    )
+    request = QueryRequest(
+        question="Show revenue by segment", user_id="u", role="analyst", preferred_source="snowflake"
+    )
+
+    response = asyncio.run(conductor.run(request))
+
+    assert len(source.statements) == 1 and "segmnt" not in source.statements[0]
+    assert translator.repairs[0][0].suggestion == "segment"
+    assert len(response.self_corrections) == 1
+    assert validator.stats()["round_trips_saved"] == 1
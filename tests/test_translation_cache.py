@@ -0,0 +1,115 @@
+import asyncio
+from pathlib import Path
+
+from fia_agent.agents.query_generator import QueryGenerationAgent
+from fia_agent.models import ColumnDefinition, TableDefinition
+from fia_agent.services.memory import MemoryManager
+from fia_agent.services.text2sql import Text2SQLTranslator
+from fia_agent.services.translation_cache import TranslationCache
+
+SCHEMA = [TableDefinition(name="financials_quarterly", columns=[ColumnDefinition(name="revenue_usd", type="FLOAT")])]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingTranslator(Text2SQLTranslator):
+    calls = 0
+
+    async def generate_sql(self, question, schema, history=None):
+        self.calls += 1
+        return await super().generate_sql(question, schema, history)
+
+
+def test_keys_cover_question_fingerprint_and_context():
+    cache = TranslationCache()
+    translator = CountingTranslator()
+
+    async def translate(question: str, fingerprint: str, context: list[str]):
+        key = cache.make_key(question, fingerprint, context)
+        return await cache.get_or_generate(key, fingerprint, lambda: translator.generate_sql(question, SCHEMA))
+
+    async def scenario():
+        first = await translate("Show revenue by segment?", "fp-1", [])
+        repeat = await translate("  show REVENUE by segment ", "fp-1", [])
+        await translate("Show revenue by segment", "fp-1", ["previous turn"])
+        await translate("Show revenue by segment", "fp-2", [])
+        return first, repeat
+
+    (first, first_hit), (repeat, repeat_hit) = asyncio.run(scenario())
+    assert repeat == first and repeat_hit and not first_hit
+    assert translator.calls == 3
+    assert cache.retain({"fp-2"}) == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_persist_across_restarts_until_they_expire(tmp_path: Path):
+    path = tmp_path / "translations.json"
+    clock = FakeClock()
+    key = TranslationCache.make_key("Show revenue", "fp")
+
+    async def generate():
+        return "SELECT 1", "rationale"
+
+    async def write():
+        cache = TranslationCache(path, ttl_seconds=60, clock=clock)
+        await cache.start()
+        await cache.get_or_generate(key, "fp", generate)
+        await cache.stop()
+
+    async def read():
+        cache = TranslationCache(path, ttl_seconds=60, clock=clock)
+        await cache.start()
+        translation, hit = await cache.get_or_generate(key, "fp", generate)
+        await cache.stop()
+        return translation, hit
+
+    asyncio.run(write())
+    assert path.exists()
+    assert asyncio.run(read()) == (("SELECT 1", "rationale"), True)
+    clock.now += 61
+    assert asyncio.run(read())[1] is False
+
+
+def test_generator_reuses_cached_translation():
+    translator = CountingTranslator()
+    generator = QueryGenerationAgent(translator=translator, memory=MemoryManager(), cache=TranslationCache())
+
+    async def scenario():
+        return [
+            await generator.run("Show revenue", SCHEMA, session_id=None, user_id="u", schema_fingerprint="fp")
+            for _ in range(3)
+        ]
+
+    results = asyncio.run(scenario())
+    assert translator.calls == 1
+    assert len(set(results)) == 1
+
+
+def test_repeated_question_in_a_session_hits_the_cache(tmp_path: Path):
+    translator = CountingTranslator()
+    memory = MemoryManager()
+    cache = TranslationCache(tmp_path / "translations.json")
+    generator = QueryGenerationAgent(translator=translator, memory=memory, cache=cache)
+
+    async def scenario():
+        results = []
+        for question in ("Show revenue", "Show ebitda", "Show revenue"):
+            await memory.capture_turn("s-1", "user", question)
+            await memory.record_success("u", "SELECT 1", "secret project aurora")
+            results.append(
+                await generator.run(question, SCHEMA, session_id="s-1", user_id="u", schema_fingerprint="fp")
+            )
+        await cache.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert translator.calls == 2
+    assert results[2] == results[0]
+    assert cache.stats()["hits"] == 1
+    assert "aurora" not in (tmp_path / "translations.json").read_text()
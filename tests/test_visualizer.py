@@ -0,0 +1,55 @@
+import numpy as np
+
+from fia_agent.agents.visualizer import RESULT_DATASET, VisualizationAgent, _lttb
+from fia_agent.columnar import ColumnarRows
+from fia_agent.models import QueryExecutionResult
+
+
+def chart(rows: ColumnarRows, **kwargs):
+    return VisualizationAgent(**kwargs).build(QueryExecutionResult(rows=rows, row_count=len(rows)), "chart")
+
+
+def test_small_results_are_referenced_not_copied():
+    rows = ColumnarRows.from_rows(
+        [
+            {"fiscal_quarter": "2024-Q1", "revenue_usd": 1240.0, "segment": "Cloud"},
+            {"fiscal_quarter": "2024-Q1", "revenue_usd": 909.0, "segment": "Payments"},
+        ]
+    )
+
+    visual = chart(rows)
+    table = VisualizationAgent().build(QueryExecutionResult(rows=rows, row_count=2), "table")
+
+    assert visual.kind == "bar" and visual.spec["data"] == {"name": RESULT_DATASET}
+    assert visual.insight_summary.startswith("Top segment: Cloud (58%")
+    assert table.spec == {"columns": ["fiscal_quarter", "revenue_usd", "segment"], "data": {"name": RESULT_DATASET}}
+
+
+def test_bar_keeps_top_categories_and_buckets_the_rest():
+    count = 10_000
+    rows = ColumnarRows.from_columns(
+        {"desk": [f"desk-{i % 30}" for i in range(count)], "pnl": [float(i % 30) for i in range(count)]}
+    )
+
+    visual = chart(rows, top_n=5)
+
+    values = visual.spec["data"]["values"]
+    assert [value["desk"] for value in values] == ["desk-29", "desk-28", "desk-27", "desk-26", "desk-25", "Other"]
+    assert sum(value["pnl"] for value in values) == sum(float(i % 30) for i in range(count))
+    assert visual.spec["usermeta"] == {"source_rows": count, "reduction": "top_n"}
+
+
+def test_line_downsampling_keeps_endpoints_and_spikes():
+    count = 50_000
+    y = np.sin(np.arange(count) / 500.0)
+    y[31_337] = 40.0
+    rows = ColumnarRows.from_columns({"trade_date": [f"d{i:06d}" for i in range(count)], "exposure": y.tolist()})
+
+    visual = chart(rows, max_points=200)
+
+    points = visual.spec["data"]["values"]
+    assert visual.kind == "line" and len(points) == 200
+    assert points[0]["trade_date"] == "d000000" and points[-1]["trade_date"] == f"d{count - 1:06d}"
+    assert {"trade_date": "d031337", "exposure": 40.0} in points
+    assert "ranged" in visual.insight_summary and "40.00" in visual.insight_summary
+    assert list(_lttb(np.arange(4.0), np.zeros(4), 10)) == [0, 1, 2, 3]